@@ -1,26 +1,24 @@
 import argparse
-import os
-import inspect
 import json
+import os
 
-from beacon.objects.person import Person
-from beacon.objects.person_locator import PersonLocator
+from beacon.util.budget import LocateBudget
+from beacon.util.records import RECORD_FORMATS, read_person_records
 
-__version__ = '0.1'
-ASSESTS_PATH = os.path.realpath(os.path.join(os.path.dirname(inspect.stack()[0][1]), 'assets'))
+# The locators, miners, and database (SQLAlchemy, requests, dnspython) are imported by the
+# functions that use them, so importing beacon, e.g. to parse arguments, stays fast
 
-# TODO: Move to real DB or fix the way we initialize the DB so it doesn't happen on import
-from beacon.db import create_db
-create_db()
+__version__ = '0.1'
+ASSESTS_PATH = os.path.realpath(os.path.join(os.path.dirname(__file__), 'assets'))
 
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Locate someone on the internet.')
 
-    # Required arguments
-    parser.add_argument('first_name', type=str, action='store',
+    # Required arguments, unless people are streamed in with --input
+    parser.add_argument('first_name', type=str, action='store', nargs='?',
                         help="The person's first name")
-    parser.add_argument('last_name', type=str, action='store',
+    parser.add_argument('last_name', type=str, action='store', nargs='?',
                         help="The person's last name")
 
     # Optional arguments
@@ -36,15 +34,125 @@ def parse_arguments():
     parser.add_argument('-t', '--twitter_url', type=str, action='store',
                         help="The person's Twitter profile URL")
 
+    # Streaming
+    parser.add_argument('-i', '--input', type=str, action='store',
+                        help='Locate every person in a JSONL or CSV file, or - for stdin, and '
+                             'write one JSON result per line as each person is located')
+    parser.add_argument('-f', '--format', type=str, action='store', choices=RECORD_FORMATS,
+                        help='The format of --input. Guessed from the file extension by default')
+    parser.add_argument('-o', '--output', type=str, action='store',
+                        help='Write streamed results to a file instead of stdout')
+    parser.add_argument('-w', '--workers', type=int, action='store',
+                        help='Locate streamed people across this many worker processes')
+
+    # Budgets for brute forcing each person
+    parser.add_argument('--max_dns_queries', type=int, action='store',
+                        help='The most uncached MX lookups made per person')
+    parser.add_argument('--max_smtp_probes', type=int, action='store',
+                        help='The most candidate email addresses verified per person')
+    parser.add_argument('--max_social_calls', type=int, action='store',
+                        help='The most social service requests made per person')
+    parser.add_argument('--deadline', type=float, action='store',
+                        help='Seconds each person may take before their partial results are '
+                             'returned')
+    parser.add_argument('--budget_report', action='store_true',
+                        help="Add what each person's budget spent and skipped to their result")
+
+    # Social services, each searched only when its credentials are given
+    parser.add_argument('--twitter_token', type=str, action='store',
+                        help='A Twitter application bearer token, to look people up on Twitter')
+    parser.add_argument('--angellist_token', type=str, action='store',
+                        help='An AngelList access token, to look people up on AngelList')
+    parser.add_argument('--social_cache', type=str, action='store',
+                        help='A SQLite file to keep social service answers in between runs')
+    parser.add_argument('--rate_limits', type=str, action='store',
+                        help='A SQLite file to share rate limits to mail servers, nameservers, '
+                             'and social services in, between worker processes and runs')
+
+    # Storage
+    parser.add_argument('--database', type=str, action='store',
+                        help='A database URL, e.g. sqlite:////var/lib/beacon.sqlite, to keep '
+                             'nicknames, lookups, and located people in between runs')
+    parser.add_argument('--max_age', type=float, action='store', default=86400,
+                        help='Seconds a person located by an earlier run is reused for, with '
+                             '--database. Defaults to a day')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only probe candidates that earlier runs with --database did not, '
+                             'e.g. at domains a person has gained')
+
     # Misc
     parser.add_argument('--version', action='version', version=__version__)
 
     args = parser.parse_args()
+    if not args.input and not (args.first_name and args.last_name):
+        parser.error('first_name and last_name are required unless --input is given')
+
     return args
 
 
+def budget_from_arguments(args):
+    """
+    :param args: Arguments returned by :func:`parse_arguments`
+    :return: The :class:`beacon.util.budget.LocateBudget` described by ``args``, or None if no
+             limits were given
+    """
+    limits = {
+        'max_dns_queries': args.max_dns_queries,
+        'max_smtp_probes': args.max_smtp_probes,
+        'max_social_calls': args.max_social_calls,
+        'deadline': args.deadline
+    }
+    if all(limit is None for limit in limits.values()):
+        return None
+    return LocateBudget(**limits)
+
+
+def limits_from_arguments(args):
+    """
+    :param args: Arguments returned by :func:`parse_arguments`
+    :return: The :class:`beacon.util.rate_limit.RateLimiterRegistry` every miner is paced by,
+             shared through ``args.rate_limits`` if it's given
+    """
+    from beacon.util.rate_limit import RateLimiterRegistry
+    return RateLimiterRegistry(shared_path=args.rate_limits)
+
+
+def social_backends_from_arguments(args):
+    """
+    :param args: Arguments returned by :func:`parse_arguments`
+    :return: The settings of each social service ``args`` has credentials for, see
+             :func:`beacon.objects.social_miner.build_social_miner`
+    """
+    from beacon.objects.social_miner import AngelListBackend, TwitterBackend
+
+    backends = []
+    if args.twitter_token:
+        backends.append((TwitterBackend, {'bearer_token': args.twitter_token,
+                                          'cache_path': args.social_cache}))
+    if args.angellist_token:
+        backends.append((AngelListBackend, {'access_token': args.angellist_token,
+                                            'cache_path': args.social_cache}))
+    return backends
+
+
+def social_miner_from_arguments(args, limits=None):
+    """
+    :param args: Arguments returned by :func:`parse_arguments`
+    :param limits: The :class:`beacon.util.rate_limit.RateLimiterRegistry` requests to each
+                   service are paced by
+    :return: A :class:`beacon.objects.social_miner.SocialMiner` searching each social service
+             ``args`` has credentials for, or None if there are none
+    """
+    from beacon.objects.social_miner import build_social_miner
+
+    backends = social_backends_from_arguments(args)
+    return build_social_miner(backends, limits) if backends else None
+
+
 def find_online_presence(first_name, last_name, middle_name=None, domains=None,
-                         linkedin_url=None, angellist_url=None, twitter_url=None):
+                         linkedin_url=None, angellist_url=None, twitter_url=None, budget=None,
+                         store=None, result_cache=None, incremental=False, social_miner=None,
+                         limits=None, budget_report=False):
     """
     Discover a single person's online presence, if possible.
 
@@ -62,8 +170,27 @@ def find_online_presence(first_name, last_name, middle_name=None, domains=None,
     :param linkedin_url: The person's profile URL
     :param angellist_url: The person's AngelList URL
     :param twitter_url: The person's Twitter URL
+    :param budget: A :class:`beacon.util.budget.LocateBudget` limiting the requests made and
+                   time taken to brute force the person. None for no limits
+    :param store: A :class:`beacon.db.lookups.LookupStore` that MX lookups and probed email
+                  addresses are kept in and reused from
+    :param result_cache: A :class:`beacon.objects.result_cache.ResultCache` to return a recent
+                         result from, if there is one, instead of locating the person again
+    :param incremental: Skip the candidates earlier searches for someone with the same names
+                        already probed, keeping what they found. Requires ``store``
+    :param social_miner: The :class:`beacon.objects.social_miner.SocialMiner` whose services the
+                         person is looked up on. None to not search any
+    :param limits: The :class:`beacon.util.rate_limit.RateLimiterRegistry` pacing requests to
+                   nameservers and mail servers, e.g. the one ``social_miner`` shares
+    :param budget_report: Add a ``budget`` key to the result, of what locating the person spent
+                          and skipped, see :meth:`PersonLocator.budget_report`.  None if the
+                          result came from ``result_cache``
     :return: JSON representation of the person's online presence information
     """
+    from beacon.objects.checkpoint import LocatorCheckpoint
+    from beacon.objects.email_miner import EmailMiner
+    from beacon.objects.person import Person
+    from beacon.objects.person_locator import PersonLocator
 
     # Create our person to be found
     hidden_person = Person(
@@ -76,10 +203,161 @@ def find_online_presence(first_name, last_name, middle_name=None, domains=None,
         twitter_url
     )
 
-    # Create a locator to find the person
-    locator = PersonLocator(hidden_person)
+    email_miner = EmailMiner(store=store, limits=limits) if store or limits else None
+    reports = []
+
+    def locate(person):
+        checkpoint = LocatorCheckpoint.load(store, person) if incremental and store else None
+        # Create a locator to find the person, and do whatever it takes (brute_force=True)
+        locator = PersonLocator(person, email_miner, budget=budget, checkpoint=checkpoint,
+                                social_miner=social_miner)
+        locator.locate(brute_force=True)
+        reports.append(locator.budget_report())
+        if checkpoint is not None:
+            checkpoint.save(store, person)
+        return locator.stop_reason
+
+    if result_cache:
+        result_cache.locate(hidden_person, locate)
+    else:
+        locate(hidden_person)
+
+    if budget_report:
+        return _to_json(hidden_person, reports[0] if reports else None)
+    return hidden_person.to_json()
+
+
+def find_online_presence_batch(people, stats=None, email_miner=None, budget=None, workers=None,
+                               store=None, max_age=86400, incremental=False, social_miner=None,
+                               limits=None, budget_report=False, social_backends=None):
+    """
+    Discover the online presence of many people, streaming each result as soon as the person
+    has been located.  Nickname lookups, MX lookups, and generated candidates are shared between
+    people with the same names or domains.
+
+    :param people: An iterable of dicts keyed by :func:`find_online_presence`'s parameter names
+    :param stats: A :class:`beacon.objects.batch_locator.BatchStats` updated with the batch's
+                  throughput as each person is located
+    :param email_miner: The :class:`beacon.objects.email_miner.EmailMiner` shared by everyone
+    :param budget: A :class:`beacon.util.budget.LocateBudget` applied to each person
+    :param workers: The number of worker processes to locate people across. None to locate them
+                    in this process.  Workers each build their own miners, so ``email_miner``
+                    and ``social_miner`` can't be given with it
+    :param store: A :class:`beacon.db.lookups.LookupStore` that lookups and located people are
+                  kept in and reused from.  Workers open their own store on the same database
+    :param max_age: Seconds a located person kept in ``store`` is reused for. None for no limit
+    :param incremental: Only probe the candidates earlier searches for each person didn't.
+                        Requires ``store``
+    :param social_miner: The :class:`beacon.objects.social_miner.SocialMiner` whose services
+                         everyone is looked up on
+    :param limits: The :class:`beacon.util.rate_limit.RateLimiterRegistry` pacing requests to
+                   nameservers, mail servers, and social services.  Workers share its
+                   ``shared_path``, if it has one, instead
+    :param budget_report: Add a ``budget`` key to each result, see
+                          :func:`find_online_presence`
+    :param social_backends: The settings of the social services everyone is looked up on, see
+                            :func:`beacon.objects.social_miner.build_social_miner`.  Unlike
+                            ``social_miner``, these can be sent to workers
+    :return: A generator of JSON representations of each person's online presence information,
+             in the same order as ``people``
+    :raises ValueError: If ``email_miner`` or ``social_miner`` is given with ``workers``
+    """
+    from beacon.objects.batch_locator import BatchLocator
+    from beacon.objects.email_miner import EmailMiner
+    from beacon.objects.parallel_batch_locator import ParallelBatchLocator
+    from beacon.objects.person import Person
+    from beacon.objects.result_cache import ResultCache
+    from beacon.objects.social_miner import build_social_miner
+
+    if workers:
+        if email_miner is not None or social_miner is not None:
+            raise ValueError('Miners can\'t be shared with workers, give social_backends instead')
+        locator = ParallelBatchLocator(workers=workers, stats=stats,
+                                       share_database=store is not None, max_age=max_age,
+                                       incremental=incremental,
+                                       rate_limits_path=limits.shared_path if limits else None,
+                                       social_backends=social_backends, budget=budget)
+    else:
+        if email_miner is None and (store or limits):
+            email_miner = EmailMiner(store=store, limits=limits)
+        if social_miner is None and social_backends:
+            social_miner = build_social_miner(social_backends, limits)
+        result_cache = ResultCache(store, max_age) if store else None
+        locator = BatchLocator(stats=stats, email_miner=email_miner, result_cache=result_cache,
+                               checkpoint_store=store if incremental else None, budget=budget,
+                               social_miner=social_miner)
+    hidden_people = (Person(**person) for person in people)
+
+    if budget_report:
+        for located_person, report in locator.locate_all(hidden_people, brute_force=True,
+                                                         reports=True):
+            yield _to_json(located_person, report)
+    else:
+        for located_person in locator.locate_all(hidden_people, brute_force=True):
+            yield located_person.to_json()
 
-    # Find them. Do whatever it takes (brute_force=True)
-    locator.locate(brute_force=True)
 
-    return json.dumps(hidden_person.__dict__)
+def stream_online_presence(input_stream, output_stream, record_format='jsonl',
+                           email_miner=None, budget=None, workers=None, store=None,
+                           max_age=86400, incremental=False, social_miner=None, limits=None,
+                           budget_report=False, on_invalid=None, social_backends=None):
+    """
+    Locate every person read from ``input_stream`` and write each result to ``output_stream`` as
+    a line of JSON as soon as that person is located.  Records are read and written one at a
+    time, so memory use doesn't grow with the size of the input.  Invalid records, e.g. without
+    a last name, are skipped and counted in the stats' ``invalid``.
+
+    :param input_stream: A text stream of person records
+    :param output_stream: A text stream to write results to
+    :param record_format: The format of ``input_stream``, see
+                          :func:`beacon.util.records.read_person_records`
+    :param email_miner: The :class:`beacon.objects.email_miner.EmailMiner` shared by everyone
+    :param budget: A :class:`beacon.util.budget.LocateBudget` applied to each person
+    :param workers: The number of worker processes to locate people across. None to locate them
+                    in this process.  Can't be given with ``email_miner`` or ``social_miner``
+    :param store: A :class:`beacon.db.lookups.LookupStore` that lookups and located people are
+                  kept in and reused from
+    :param max_age: Seconds a located person kept in ``store`` is reused for. None for no limit
+    :param incremental: Only probe the candidates earlier searches for each person didn't.
+                        Requires ``store``
+    :param social_miner: The :class:`beacon.objects.social_miner.SocialMiner` whose services
+                         everyone is looked up on
+    :param limits: The :class:`beacon.util.rate_limit.RateLimiterRegistry` pacing requests to
+                   nameservers and mail servers
+    :param budget_report: Add a ``budget`` key to each result, see
+                          :func:`find_online_presence`
+    :param on_invalid: A function called with the number and
+                       :class:`beacon.util.records.InvalidRecord` of each record skipped
+    :param social_backends: The settings of the social services everyone is looked up on, see
+                            :func:`find_online_presence_batch`
+    :return: The :class:`beacon.objects.batch_locator.BatchStats` for the stream
+    :raises ValueError: If ``email_miner`` or ``social_miner`` is given with ``workers``
+    """
+    from beacon.objects.batch_locator import BatchStats
+
+    stats = BatchStats()
+
+    def skip(number, error):
+        stats.invalid += 1
+        if on_invalid:
+            on_invalid(number, error)
+
+    people = read_person_records(input_stream, record_format, skip)
+
+    for located_person in find_online_presence_batch(people, stats, email_miner, budget,
+                                                     workers, store, max_age, incremental,
+                                                     social_miner, limits, budget_report,
+                                                     social_backends):
+        output_stream.write(located_person + '\n')
+        output_stream.flush()
+
+    return stats
+
+
+def _to_json(person, report):
+    """
+    :return: ``person`` as a JSON object, with their budget ``report`` under ``budget``
+    """
+    result = person.to_dict()
+    result['budget'] = report
+    return json.dumps(result)
@@ -1,15 +1,70 @@
-from sqlalchemy import create_engine
+import os
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
 from contextlib import contextmanager
 
+# The database used when none is configured: rebuilt in memory by every process
+MEMORY_URL = 'sqlite:///:memory:'
+# The environment variable that configures the database URL, e.g. sqlite:////var/lib/beacon.db
+DATABASE_URL_ENV = 'BEACON_DATABASE_URL'
+
+
+def _create_engine(url, **pool_options):
+    """
+    :param url: A SQLAlchemy database URL
+    :param pool_options: Connection pool keyword arguments for :func:`create_engine`, e.g.
+                         ``pool_size`` or ``pool_recycle``, overriding the defaults
+    :return: An engine for ``url``, configured for how it's shared between threads
+    """
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        # Server databases: a bounded pool of connections checked before they're reused
+        options = {'pool_size': 5, 'max_overflow': 10, 'pool_recycle': 3600,
+                   'pool_pre_ping': True}
+        options.update(pool_options)
+        return create_engine(url, **options)
+
+    if url.database in (None, '', ':memory:'):
+        # A single in-memory database shared by every thread in the process.  The default pool
+        # for in-memory SQLite hands each thread its own (empty) database.
+        return create_engine(url, connect_args={'check_same_thread': False},
+                             poolclass=StaticPool, **pool_options)
+
+    # A file shared by threads and processes.  WAL lets readers carry on while another
+    # connection writes, and waiting on locks avoids spurious "database is locked" errors.
+    file_engine = create_engine(url, connect_args={'check_same_thread': False, 'timeout': 30},
+                                **pool_options)
+
+    @event.listens_for(file_engine, 'connect')
+    def _use_wal(connection, record):
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
 
-engine = create_engine('sqlite:///:memory:')#, echo=True)
+    return file_engine
+
+
+engine = _create_engine(os.environ.get(DATABASE_URL_ENV) or MEMORY_URL)
 Session = scoped_session(sessionmaker(bind=engine))
 
+# The prebuilt copy of the Names tables, stored next to the nickname CSV in assets/
+SNAPSHOT_FILENAME = 'nicknames.sqlite'
+# Bump whenever the schema or snapshot layout changes so stale snapshots are ignored
+SNAPSHOT_VERSION = 2
+
+_db_ready = False
+_db_lock = threading.Lock()
+# Incremented whenever the contents of the Names tables change so caches know to invalidate
+_names_version = 0
+
 
 @contextmanager
 def db_connect():
     """Scope our db session around our transactional operations"""
+    ensure_db()
     session = Session()
     try:
         yield session
@@ -20,6 +75,52 @@ def db_connect():
         session.close()
 
 
+def names_version():
+    """
+    :return: A number that changes every time the contents of the Names tables change
+    """
+    return _names_version
+
+
+def _names_changed():
+    global _names_version
+    _names_version += 1
+
+
+def configure(url=None, **pool_options):
+    """
+    Use the database at ``url`` from now on.  Persistent databases keep the Names tables and
+    cached lookups between runs, so they're only built the first time they're used.
+
+    :param url: A SQLAlchemy database URL, e.g. ``sqlite:////var/lib/beacon.sqlite`` or
+                ``postgresql://beacon@localhost/beacon``.  Defaults to the URL in the
+                ``BEACON_DATABASE_URL`` environment variable, or an in-memory database
+    :param pool_options: Connection pool keyword arguments for
+                         :func:`sqlalchemy.create_engine`, e.g. ``pool_size``, ``max_overflow``,
+                         or ``pool_recycle``
+    :return: None
+    """
+    global engine, _db_ready
+
+    with _db_lock:
+        previous = engine
+        engine = _create_engine(url or os.environ.get(DATABASE_URL_ENV) or MEMORY_URL,
+                                **pool_options)
+        Session.remove()
+        Session.configure(bind=engine)
+        _db_ready = False
+        previous.dispose()
+
+    _names_changed()
+
+
+def is_persistent():
+    """
+    :return: True if the database outlives this process, i.e. it isn't in memory
+    """
+    return engine.url.database not in (None, '', ':memory:')
+
+
 def init_db():
     """
     Create all database tables
@@ -36,56 +137,296 @@ def destroy_db():
     """
     Drop all database tables
     """
+    global _db_ready
     from .models import (
         Base,
         realname_nickname_association_table,
         Name
     )
     Base.metadata.drop_all(bind=engine)
+    _db_ready = False
+    _names_changed()
 
 
-def create_db():
+def ensure_db():
     """
-    Initialize the database and populate the Names table.
+    Make sure the database is populated, building it the first time it's needed.
+
+    In memory, loads the prebuilt snapshot from assets/ when it's available and current,
+    otherwise falls back to building the Names table from assets/nicknames.csv.  Persistent
+    databases are only populated if their Names table is empty, and gain any tables they're
+    missing.
+    """
+    global _db_ready
+    if _db_ready:
+        return
+
+    with _db_lock:
+        if not _db_ready:
+            if is_persistent():
+                init_db()
+                if not _has_names() and not _copy_snapshot():
+                    _load_nicknames_csv(_nicknames_csv_path())
+            elif load_snapshot():
+                # Add the tables the snapshot doesn't hold, e.g. the lookup caches
+                init_db()
+            else:
+                _create_db()
+            _db_ready = True
+
+
+def snapshot_path():
+    """
+    :return: The path to the prebuilt Names snapshot
     """
-    import os
-    import csv
     from beacon import ASSESTS_PATH
+    return os.path.join(ASSESTS_PATH, SNAPSHOT_FILENAME)
+
+
+def load_snapshot(path=None):
+    """
+    Replace the contents of the database with a prebuilt snapshot using SQLite's backup API.
+
+    :param path: The snapshot to load. Defaults to the snapshot packaged in assets/
+    :return: True if the snapshot was loaded, False if it's missing or out of date
+    """
+    path = path or snapshot_path()
+    snapshot = _connect_snapshot(path)
+    if snapshot is None:
+        return False
+
+    try:
+        connection = engine.raw_connection()
+        try:
+            snapshot.backup(connection.connection)
+        finally:
+            connection.close()
+    finally:
+        snapshot.close()
+
+    _names_changed()
+    return True
+
+
+def open_snapshot(path=None):
+    """
+    Serve the Names tables straight from a snapshot file, opened read-only, instead of copying
+    it into memory.  The file's pages are shared between processes through the OS page cache, so
+    any number of worker processes can open it cheaply.  The Names tables can't be modified
+    afterwards.
+
+    :param path: The snapshot to open. Defaults to the snapshot packaged in assets/
+    :return: True if the snapshot was opened, False if it's missing or out of date, in which
+             case the database is left as it was
+    """
+    global engine, _db_ready
+
+    path = path or snapshot_path()
+    snapshot = _connect_snapshot(path)
+    if snapshot is None:
+        return False
+    snapshot.close()
+
+    with _db_lock:
+        engine = create_engine('sqlite://', creator=lambda: _connect_snapshot(path),
+                               poolclass=StaticPool)
+        Session.remove()
+        Session.configure(bind=engine)
+        _db_ready = True
+
+    _names_changed()
+    return True
+
+
+def _connect_snapshot(path):
+    """
+    :return: A read-only connection to the snapshot at ``path``, or None if it's missing or out
+             of date
+    """
+    import sqlite3
+
+    if not os.path.exists(path):
+        return None
 
+    snapshot = sqlite3.connect('file:{p}?mode=ro'.format(p=path), uri=True,
+                               check_same_thread=False)
+    if snapshot.execute('PRAGMA user_version').fetchone()[0] != SNAPSHOT_VERSION:
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def build_snapshot(path=None):
+    """
+    Build the Names tables from assets/nicknames.csv and write them to a snapshot file that
+    :func:`load_snapshot` can load.  Run whenever nicknames.csv or the models change.
+
+    :param path: Where to write the snapshot. Defaults to the snapshot packaged in assets/
+    :return: The path of the snapshot written
+    """
+    import sqlite3
+
+    path = path or snapshot_path()
+    destroy_db()
+    create_db()
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    snapshot = sqlite3.connect(path)
+    try:
+        connection = engine.raw_connection()
+        try:
+            connection.connection.backup(snapshot)
+        finally:
+            connection.close()
+        snapshot.execute('PRAGMA user_version = {v}'.format(v=SNAPSHOT_VERSION))
+        snapshot.commit()
+        snapshot.execute('VACUUM')
+    finally:
+        snapshot.close()
+
+    return path
+
+
+def create_db(nicknames_path=None):
+    """
+    Initialize the database and populate the Names table.
+
+    :param nicknames_path: A CSV of ``nickname,real_name,likelihood`` rows to populate the Names
+                           table with. Defaults to assets/nicknames.csv
+    """
+    global _db_ready
+    with _db_lock:
+        _create_db(nicknames_path)
+        _db_ready = True
+
+
+def load_nicknames(nicknames_path, batch_size=10000):
+    """
+    Add the names in an external nickname dataset to the Names table.  Names and nicknames that
+    already exist are reused.
+
+    :param nicknames_path: A CSV of ``nickname,real_name,likelihood`` rows
+    :param batch_size: The number of rows sent to the database per insert statement
+    :return: None
+    """
+    ensure_db()
+    with _db_lock:
+        _load_nicknames_csv(nicknames_path, batch_size)
+
+
+def _create_db(nicknames_path=None):
     init_db()
 
     # Populate our Names table with the Nicknames mapping found in assets/nicknames.csv
-    with open(os.path.join(ASSESTS_PATH, 'nicknames.csv'), 'r') as nicknames_csv:
-        from .models import Name
-        for row in csv.reader(nicknames_csv):
-            nickname, real_name, likelihood = row
-            nickname = nickname.capitalize()
-            real_name = real_name.capitalize()
-
-            with db_connect() as session:
-                # Pull the existing name and nickname out of the db if they exist
-                db_name = session.query(Name).filter_by(real_name=real_name).first()
-                db_nickname = session.query(Name).filter_by(real_name=nickname).first()
-
-                if db_name:
-                    # Both names existed, add existing nickname to name
-                    if db_nickname:
-                        db_name.nick_names.append(db_nickname)
-                    # The nickname didn't exist in the db - create, add to name, add to db
-                    else:
-                        new_nickname = Name(nickname)
-                        db_name.nick_names.append(new_nickname)
-                        session.add(new_nickname)
-                else:
-                    # The real_name didn't exist in the db - create one and add to db
-                    new_name = Name(real_name)
-                    session.add(new_name)
-
-                    # The nickname exists in the db - add to name
-                    if db_nickname:
-                        new_name.nick_names.append(db_nickname)
-                    # The nickname didn't exist in the db - create, add to name, add to db
-                    else:
-                        new_nickname = Name(nickname)
-                        new_name.nick_names.append(new_nickname)
-                        session.add(new_nickname)
+    _load_nicknames_csv(nicknames_path or _nicknames_csv_path())
+
+
+def _nicknames_csv_path():
+    from beacon import ASSESTS_PATH
+    return os.path.join(ASSESTS_PATH, 'nicknames.csv')
+
+
+def _has_names():
+    """
+    :return: True if the Names table has any rows
+    """
+    from sqlalchemy import select
+    from .models import Name
+
+    with engine.connect() as connection:
+        return connection.execute(select([Name.__table__.c.ID]).limit(1)).first() is not None
+
+
+def _copy_snapshot(path=None, batch_size=10000):
+    """
+    Copy the Names tables from a snapshot into the database row by row, which works with any
+    database rather than only in-memory SQLite like :func:`load_snapshot`.
+
+    :return: True if the snapshot was copied, False if it's missing or out of date
+    """
+    from .models import Name, realname_nickname_association_table as association_table
+
+    snapshot = _connect_snapshot(path or snapshot_path())
+    if snapshot is None:
+        return False
+
+    try:
+        with engine.begin() as connection:
+            for table in (Name.__table__, association_table):
+                columns = [column.name for column in table.columns]
+                rows = snapshot.execute('SELECT {c} FROM {t}'.format(
+                    c=', '.join(columns), t=table.name
+                ))
+                for batch in iter(lambda: rows.fetchmany(batch_size), []):
+                    connection.execute(table.insert(), [dict(zip(columns, row)) for row in batch])
+    finally:
+        snapshot.close()
+
+    _names_changed()
+    return True
+
+
+def _load_nicknames_csv(nicknames_path, batch_size=10000):
+    """
+    Bulk load a nickname CSV in a single transaction.  The whole file is parsed and deduplicated
+    in memory so the database only sees batched inserts of new rows.
+    """
+    import csv
+    from sqlalchemy import select
+    from .models import Name, realname_nickname_association_table as association_table
+
+    names_table = Name.__table__
+    with engine.begin() as connection:
+        # Start from what's already stored so external datasets can be layered on top
+        name_ids = dict(
+            (real_name, name_id) for name_id, real_name in
+            connection.execute(select([names_table.c.ID, names_table.c.RealName]))
+        )
+        associations = set(
+            tuple(row) for row in connection.execute(select([
+                association_table.c.RealNameID, association_table.c.NickNameID
+            ]))
+        )
+        next_id = max(name_ids.values()) + 1 if name_ids else 1
+        new_names = []
+        new_associations = []
+
+        with open(nicknames_path, 'r', newline='') as nicknames_csv:
+            for row in csv.reader(nicknames_csv):
+                if len(row) < 2:
+                    continue
+                nickname = row[0].strip().capitalize()
+                real_name = row[1].strip().capitalize()
+                likelihood = _parse_likelihood(row[2] if len(row) > 2 else None)
+
+                for name in (real_name, nickname):
+                    if name not in name_ids:
+                        name_ids[name] = next_id
+                        new_names.append({'ID': next_id, 'RealName': name})
+                        next_id += 1
+
+                association = (name_ids[real_name], name_ids[nickname])
+                if association not in associations:
+                    associations.add(association)
+                    new_associations.append({
+                        'RealNameID': association[0], 'NickNameID': association[1],
+                        'Likelihood': likelihood
+                    })
+
+        for table, rows in ((names_table, new_names), (association_table, new_associations)):
+            for start in range(0, len(rows), batch_size):
+                connection.execute(table.insert(), rows[start:start + batch_size])
+
+    _names_changed()
+
+
+def _parse_likelihood(likelihood):
+    """
+    :return: ``likelihood`` as a probability. 1.0 if it's missing or malformed
+    """
+    try:
+        return min(max(float(likelihood), 0.0), 1.0)
+    except (TypeError, ValueError):
+        return 1.0
@@ -0,0 +1,174 @@
+import json
+import time
+
+from sqlalchemy import and_, select
+
+import beacon.db as db
+from beacon.db.models import LocatedProfile, LocatorCheckpointRecord, MXRecord, ProbeResult
+
+
+class LookupStore(object):
+    """
+    Caches the results of lookups in the database, i.e. MX answers, SMTP probe outcomes, located
+    profiles, and what locating each person has tried, so later runs pointed at the same
+    persistent database (see :func:`beacon.db.configure`) reuse earlier work instead of repeating
+    it.
+
+    :param clock: A function returning the current time in seconds since the epoch
+    """
+    def __init__(self, clock=time.time):
+        self.clock = clock
+
+    def get_mx(self, domain):
+        """
+        :param domain: The domain that was looked up
+        :return: An (expires, mail servers) tuple, or None if no unexpired answer is stored
+        """
+        table = MXRecord.__table__
+        row = self._first(select([table.c.Expires, table.c.MailServers]).where(and_(
+            table.c.Domain == domain, table.c.Expires > self.clock()
+        )))
+        return (row[0], row[1].split()) if row else None
+
+    def put_mx(self, domain, expires, mail_servers):
+        """
+        Store the answer to an MX lookup
+
+        :param domain: The domain that was looked up
+        :param expires: When the answer expires, in seconds since the epoch
+        :param mail_servers: The list of mail servers found, most preferred first
+        :return: None
+        """
+        self._replace(MXRecord.__table__, {
+            'Domain': domain, 'MailServers': ' '.join(mail_servers), 'Expires': expires
+        }, 'Domain')
+
+    def clear_mx(self):
+        """
+        Forget every MX answer
+        """
+        db.ensure_db()
+        with db.engine.begin() as connection:
+            connection.execute(MXRecord.__table__.delete())
+
+    def get_probes(self, email_addresses):
+        """
+        :param email_addresses: An iterable of email addresses
+        :return: A dict of each email address with an unexpired probe outcome to True if it
+                 exists or False if it doesn't
+        """
+        table = ProbeResult.__table__
+        email_addresses = list(email_addresses)
+        results = {}
+        # Stay well under the most parameters a statement can have
+        for start in range(0, len(email_addresses), 500):
+            results.update(self._all(select([table.c.EmailAddress, table.c.Exists]).where(and_(
+                table.c.EmailAddress.in_(email_addresses[start:start + 500]),
+                table.c.Expires > self.clock()
+            ))))
+        return results
+
+    def put_probes(self, results, ttl):
+        """
+        Store probe outcomes.  Inconclusive outcomes (None) aren't stored.
+
+        :param results: A dict of email address to True, False, or None
+        :param ttl: Seconds until the outcomes expire
+        :return: None
+        """
+        table = ProbeResult.__table__
+        expires = self.clock() + ttl
+        rows = [
+            {'EmailAddress': address, 'Exists': exists, 'Expires': expires}
+            for address, exists in results.items() if exists is not None
+        ]
+        if not rows:
+            return
+
+        db.ensure_db()
+        with db.engine.begin() as connection:
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500]
+                connection.execute(table.delete().where(
+                    table.c.EmailAddress.in_([row['EmailAddress'] for row in batch])
+                ))
+                connection.execute(table.insert(), batch)
+
+    def get_profile(self, key):
+        """
+        :param key: Who the profile belongs to, see :meth:`beacon.objects.person.Person.key`
+        :return: A (located, profile dict) tuple, or None if nobody with ``key`` was located
+        """
+        table = LocatedProfile.__table__
+        row = self._first(select([table.c.Located, table.c.Profile]).where(table.c.Key == key))
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put_profile(self, key, profile, located=None):
+        """
+        Store a located profile
+
+        :param key: Who the profile belongs to, see :meth:`beacon.objects.person.Person.key`
+        :param profile: A dict of the person's online presence, e.g. from
+                        :meth:`beacon.objects.person.Person.to_dict`
+        :param located: When the person was located. Defaults to now
+        :return: None
+        """
+        self._replace(LocatedProfile.__table__, {
+            'Key': key, 'Profile': json.dumps(profile, sort_keys=True),
+            'Located': located if located is not None else self.clock()
+        }, 'Key')
+
+    def get_checkpoint(self, key):
+        """
+        :param key: Whose checkpoint it is, see :meth:`beacon.objects.person.Person.name_key`
+        :return: The checkpoint dict stored for ``key``, or None if there isn't one
+        """
+        table = LocatorCheckpointRecord.__table__
+        row = self._first(select([table.c.State]).where(table.c.Key == key))
+        return json.loads(row[0]) if row else None
+
+    def put_checkpoint(self, key, checkpoint):
+        """
+        Store what locating someone has tried
+
+        :param key: Whose checkpoint it is, see :meth:`beacon.objects.person.Person.name_key`
+        :param checkpoint: A dict from :meth:`beacon.objects.checkpoint.LocatorCheckpoint.to_dict`
+        :return: None
+        """
+        self._replace(LocatorCheckpointRecord.__table__, {
+            'Key': key, 'State': json.dumps(checkpoint, sort_keys=True), 'Updated': self.clock()
+        }, 'Key')
+
+    def purge_expired(self):
+        """
+        Delete expired MX answers and probe outcomes
+
+        :return: None
+        """
+        now = self.clock()
+        db.ensure_db()
+        with db.engine.begin() as connection:
+            for table in (MXRecord.__table__, ProbeResult.__table__):
+                connection.execute(table.delete().where(table.c.Expires <= now))
+
+    @staticmethod
+    def _first(query):
+        db.ensure_db()
+        with db.engine.connect() as connection:
+            return connection.execute(query).first()
+
+    @staticmethod
+    def _all(query):
+        db.ensure_db()
+        with db.engine.connect() as connection:
+            return connection.execute(query).fetchall()
+
+    @staticmethod
+    def _replace(table, row, key):
+        """
+        Insert ``row`` into ``table``, replacing the row with the same ``key`` column
+        """
+        db.ensure_db()
+        with db.engine.begin() as connection:
+            connection.execute(table.delete().where(table.c[key] == row[key]))
+            connection.execute(table.insert(), row)
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Table, Column, Integer, String, ForeignKey
+from sqlalchemy import Table, Column, Boolean, Integer, Float, String, Text, ForeignKey
 from sqlalchemy.orm import relationship
 
 
@@ -14,12 +14,16 @@ Column     Type
 ---------- -----------
 RealNameID Integer
 NickNameID String(100)
+Likelihood Float
 ========== ===========
+
+Likelihood is the probability that someone with the real name goes by the nickname.
 """
 realname_nickname_association_table = Table(
     'RealnameNicknameAssociation', Base.metadata,
     Column('RealNameID', Integer, ForeignKey('Names.ID'), primary_key=True),
-    Column('NickNameID', Integer, ForeignKey('Names.ID'), primary_key=True)
+    Column('NickNameID', Integer, ForeignKey('Names.ID'), primary_key=True),
+    Column('Likelihood', Float, nullable=False, default=1.0)
 )
 
 
@@ -54,3 +58,88 @@ class Name(Base):
 
     def __repr__(self):
         return 'Name({n})'.format(n=self.real_name)
+
+
+class MXRecord(Base):
+    """
+    The answer to an MX lookup, cached until it expires
+
+    ===========  ===========
+    Column       Type
+    -----------  -----------
+    Domain       String(255)
+    MailServers  Text
+    Expires      Float
+    ===========  ===========
+
+    MailServers is a space separated list, most preferred first.  Empty if the domain has none.
+    Expires is in seconds since the epoch.
+    """
+    __tablename__ = 'MXRecords'
+
+    domain = Column('Domain', String(255), primary_key=True)
+    mail_servers = Column('MailServers', Text, nullable=False)
+    expires = Column('Expires', Float, nullable=False, index=True)
+
+
+class ProbeResult(Base):
+    """
+    Whether a mail server accepted an email address, cached until it expires
+
+    ============  ===========
+    Column        Type
+    ------------  -----------
+    EmailAddress  String(254)
+    Exists        Boolean
+    Expires       Float
+    ============  ===========
+    """
+    __tablename__ = 'ProbeResults'
+
+    email_address = Column('EmailAddress', String(254), primary_key=True)
+    exists = Column('Exists', Boolean, nullable=False)
+    expires = Column('Expires', Float, nullable=False, index=True)
+
+
+class LocatedProfile(Base):
+    """
+    The online presence found for a person, keyed by who they are
+
+    =======  ===========
+    Column   Type
+    -------  -----------
+    Key      String(512)
+    Profile  Text
+    Located  Float
+    =======  ===========
+
+    Profile is the JSON representation of the located person.  Located is when they were
+    located, in seconds since the epoch.
+    """
+    __tablename__ = 'LocatedProfiles'
+
+    key = Column('Key', String(512), primary_key=True)
+    profile = Column('Profile', Text, nullable=False)
+    located = Column('Located', Float, nullable=False)
+
+
+class LocatorCheckpointRecord(Base):
+    """
+    What locating a person has already tried, keyed by their names
+
+    =======  ===========
+    Column   Type
+    -------  -----------
+    Key      String(512)
+    State    Text
+    Updated  Float
+    =======  ===========
+
+    State is the JSON representation of a :class:`beacon.objects.checkpoint.LocatorCheckpoint`.
+    Updated is in seconds since the epoch.
+    """
+    __tablename__ = 'LocatorCheckpoints'
+
+    key = Column('Key', String(512), primary_key=True)
+    state = Column('State', Text, nullable=False)
+    updated = Column('Updated', Float, nullable=False)
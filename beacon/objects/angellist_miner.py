@@ -1,12 +1,28 @@
-import birdy   # This Twitter API package can easily be slightly modified and used for AngelList
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from beacon.util.cache import ExpiringCache
+from beacon.util.hashing import EmailHasher, md5_hexdigests, normalize_email
+from beacon.util.http import destination, is_failure, pooled_session
+from beacon.util.rate_limit import RateLimiterRegistry
 
 
 class AngelListMiner(object):
     """
     Retrieves information about an AngelList user.
 
-    profile picture, and full name.  We may be able to parse the bio, what_i_do
-    and what_ive_built, for email and username information.
+    Users are looked up by the MD5 hex hash of an email address or by URL slug.  Other notable
+    information we can gather is blog_url, online_bio_url, twitter_url, facebook_url,
+    linkedin_url, angellist_url, dribble_url, github_url, resume_url, profile picture, and full
+    name.  We may be able to parse the bio, what_i_do and what_ive_built, for email and username
+    information.
+
+    Requests go over one pooled :class:`requests.Session`, so connections are kept alive and
+    reused, and are limited to ``requests_per_hour`` by a token bucket from ``limits``.  Answers
+    are cached for ``ttl`` seconds, and "no such user" answers for ``negative_ttl`` seconds, in
+    memory and in ``cache_path`` when it's given.  Failed requests aren't cached.
 
     API Endpoints:
     * GET /users/search
@@ -30,6 +46,194 @@ class AngelListMiner(object):
     * *what_i_do* - A blurb about the person's career, may contain email/username information
     * *what_ive_built* - A blurb abut the person's achievements, may contain email/username
       information
+
+    :param access_token: An AngelList OAuth access token. Requests are anonymous if None
+    :param api_url: The root of the AngelList API
+    :param session: The :class:`requests.Session` to send requests with. Defaults to one pooling
+                    ``concurrency`` connections
+    :param requests_per_hour: The most requests sent per hour
+    :param cache: The :class:`beacon.util.cache.ExpiringCache` answers are kept in. Defaults to
+                  one persisted to ``cache_path``
+    :param cache_path: A SQLite file to persist answers to. Answers only live in memory if None
+    :param ttl: Seconds a user found is cached for
+    :param negative_ttl: Seconds a "no such user" answer is cached for
+    :param concurrency: The number of requests in flight at once
+    :param timeout: Seconds to wait on the network before giving up
+    :param hasher: The :class:`beacon.util.hashing.EmailHasher` email addresses are hashed with
+    :param limits: The :class:`beacon.util.rate_limit.RateLimiterRegistry` pacing requests to the
+                   API, e.g. one shared with other miners.  ``requests_per_hour`` applies unless
+                   it has limits for the API's host.  Requests aren't made while the host's
+                   circuit is open
+    """
+    profile_fields = (
+        'angellist_url', 'twitter_url', 'linkedin_url', 'facebook_url', 'github_url',
+        'dribble_url', 'behance_url', 'aboutme_url', 'blog_url', 'online_bio_url', 'resume_url'
+    )
+
+    def __init__(self, access_token=None, api_url='https://api.angel.co/1/', session=None,
+                 requests_per_hour=1000, cache=None, cache_path=None, ttl=7 * 86400,
+                 negative_ttl=86400, concurrency=8, timeout=10.0, hasher=None,
+                 limits=None):
+        self.access_token = access_token
+        self.api_url = api_url.rstrip('/') + '/'
+        self.session = session if session else pooled_session(concurrency)
+        self.destination = destination(self.api_url)
+        self.limits = limits if limits else RateLimiterRegistry()
+        self.limits.set_default(self.destination, requests_per_hour / 3600.0,
+                                min(requests_per_hour, concurrency))
+        self.cache = cache if cache else ExpiringCache(cache_path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.hasher = hasher if hasher else EmailHasher()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def user_by_email(self, email_address):
+        """
+        :param email_address: An email address
+        :return: The AngelList user dict of whoever signed up with ``email_address``, or None
+        """
+        return self.users_by_emails([email_address]).get(email_address)
+
+    def users_by_emails(self, email_addresses):
+        """
+        Look up everyone who signed up with any of ``email_addresses``.  Cached answers are read
+        in one go and the rest are requested concurrently.
+
+        :param email_addresses: An iterable of email addresses
+        :return: A dict of each email address to its AngelList user dict, or None if there's no
+                 such user.  Addresses that couldn't be looked up are left out
+        """
+        email_addresses = list(email_addresses)
+        hashes = self.hasher.hash_many(email_addresses)
+        users = self.users_by_hashes(hashes.values())
+        found = {}
+        for address in email_addresses:
+            md5 = hashes[normalize_email(address)]
+            if md5 in users:
+                found[address] = users[md5]
+        return found
+
+    def users_by_hashes(self, md5s):
+        """
+        Look up everyone who signed up with an email address hashed to any of ``md5s``, e.g. the
+        hashes of a :class:`beacon.util.hashing.EmailHashIndex`
+
+        :param md5s: An iterable of MD5 hex hashes of normalized email addresses
+        :return: A dict of each hash to its AngelList user dict, or None if there's no such user.
+                 Hashes that couldn't be looked up are left out
+        """
+        return self._search('md5', set(md5s))
+
+    def user_by_slug(self, slug):
+        """
+        :param slug: The link text of a profile, i.e. https://angel.co/{slug}
+        :return: The AngelList user dict for ``slug``, or None if there's no such user or they
+                 couldn't be looked up
+        """
+        return self.users_by_slugs([slug]).get(slug)
+
+    def users_by_slugs(self, slugs):
+        """
+        Look up the profile of every slug in ``slugs``.  Cached answers are read in one go and
+        the rest are requested concurrently.
+
+        :param slugs: An iterable of profile link texts, e.g. usernames
+        :return: A dict of each slug to its AngelList user dict, or None if there's no such user.
+                 Slugs that couldn't be looked up are left out
+        """
+        slugs = list(slugs)
+        users = self._search('slug', set(slug.lower() for slug in slugs))
+        return dict((slug, users[slug.lower()]) for slug in slugs if slug.lower() in users)
+
+    def profile_urls(self, user):
+        """
+        :param user: An AngelList user dict
+        :return: A dict of field name to each of the user's profile URLs that are filled in
+        """
+        return {field: user[field] for field in self.profile_fields if user.get(field)}
+
+    @property
+    def limiter(self):
+        """
+        :return: The :class:`beacon.util.rate_limit.TokenBucket` pacing requests to our API
+        """
+        return self.limits.limiter(self.destination)
+
+    def close(self):
+        """
+        Close every pooled connection
+        """
+        self.session.close()
+
+    def _search(self, field, values):
+        """
+        :param field: ``md5`` or ``slug``
+        :param values: The values of ``field`` to look up
+        :return: A dict of each value that could be looked up to its user dict or None
+        """
+        keys = {'{f}:{v}'.format(f=field, v=value): value for value in values}
+        users = {keys[key]: user for key, user in self.cache.get_many(keys).items()}
+        missing = [value for value in keys.values() if value not in users]
+        if not missing:
+            return users
+
+        fetch = lambda value: (value, self._fetch(field, value))
+        if len(missing) == 1:
+            fetched = [fetch(missing[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(missing))) as executor:
+                fetched = list(executor.map(fetch, missing))
+
+        found, not_found = {}, {}
+        for value, (succeeded, user) in fetched:
+            if not succeeded:
+                continue
+            users[value] = user
+            key = '{f}:{v}'.format(f=field, v=value)
+            if user is None:
+                not_found[key] = None
+            else:
+                found[key] = user
+        self.cache.put_many(found, self.ttl)
+        self.cache.put_many(not_found, self.negative_ttl)
+        return users
+
+    def _fetch(self, field, value):
+        """
+        :return: A (succeeded, user dict or None) tuple
+        """
+        params = {field: value}
+        if self.access_token:
+            params['access_token'] = self.access_token
+
+        if not self.limits.acquire(self.destination):
+            return False, None
+        with self._lock:
+            self.requests += 1
+        try:
+            response = self.session.get(self.api_url + 'users/search', params=params,
+                                        timeout=self.timeout)
+        except requests.RequestException:
+            self.limits.record(self.destination, False)
+            return False, None
+
+        self.limits.record(self.destination, not is_failure(response))
+        if response.status_code == 404:
+            return True, None
+        if response.status_code != 200:
+            return False, None
+        try:
+            return True, response.json()
+        except ValueError:
+            return False, None
+
+
+def email_hash(email_address):
+    """
+    :param email_address: An email address
+    :return: The MD5 hex hash AngelList looks ``email_address`` up by
     """
-    def __init__(self):
-        pass
+    return md5_hexdigests([normalize_email(email_address)])[0]
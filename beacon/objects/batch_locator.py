@@ -0,0 +1,375 @@
+import itertools
+import time
+from collections import defaultdict
+
+from beacon.objects.checkpoint import LocatorCheckpoint
+from beacon.objects.email_miner import EmailMiner
+from beacon.objects.person_locator import PersonLocator
+from beacon.objects.social_miner import BY_EMAIL_HASH, merge_information
+from beacon.util.budget import SMTP_PROBES
+from beacon.util.cache import LRUCache
+from beacon.util.candidate_index import CandidateIndex
+from beacon.util.hashing import EmailHashIndex
+from beacon.util.names import FullNameIndex, nickname_cache
+from beacon.util.scheduler import DEADLINE_EXCEEDED
+
+
+class BatchStats(object):
+    """
+    Throughput and cache statistics for a batch of people being located.
+    """
+    def __init__(self):
+        self.people = 0
+        self.reused = 0
+        self.invalid = 0
+        self.started = None
+        self.elapsed = 0.0
+        self.nickname_cache = {}
+        self.candidate_cache = {}
+        self.domain_cache = {}
+        self.candidate_index = {}
+
+    def people_per_second(self):
+        """
+        :return: The number of people located per second so far
+        """
+        return self.people / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self):
+        """
+        :return: A dict of every statistic, suitable for logging
+        """
+        return {
+            'people': self.people,
+            'reused': self.reused,
+            'invalid': self.invalid,
+            'elapsed': self.elapsed,
+            'people_per_second': self.people_per_second(),
+            'nickname_cache': self.nickname_cache,
+            'candidate_cache': self.candidate_cache,
+            'domain_cache': self.domain_cache,
+            'candidate_index': self.candidate_index
+        }
+
+
+class BatchLocator(object):
+    """
+    Locates the online presence of many people, sharing work between them.
+
+    Every person shares the nickname cache, a single :class:`EmailMiner` (and its MX results), and
+    a cache of the full names and usernames generated for each distinct name, so people with the
+    same names or domains only pay for those lookups once.
+
+    When brute forcing, people are located ``chunk_size`` at a time.  The candidate email
+    addresses of everyone in a chunk are gathered into a :class:`CandidateIndex` so each one is
+    verified once, most likely first, and the result shared with everyone who generated it.  The
+    email addresses found are gathered into an :class:`EmailHashIndex` the same way, so social
+    services that look people up by email hash get each distinct hash once per chunk.
+
+    :param candidate_cache_size: The number of distinct names to keep generated candidates for
+    :param stats: A :class:`BatchStats` to update as people are located
+    :param email_miner: The :class:`EmailMiner` shared by every person, e.g. one whose DNS cache
+                        is persisted to disk
+    :param full_name_index: A :class:`beacon.util.names.FullNameIndex` every located person's
+                            full names are added to, so names returned by services can be
+                            matched against everyone with :meth:`match_full_name`.  None to
+                            not keep one
+    :param chunk_size: The number of people whose candidates are verified together
+    :param result_cache: A :class:`beacon.objects.result_cache.ResultCache` located people are
+                         kept in.  People with fresh results, e.g. from an earlier run, are
+                         restored instead of being located again.  None to always locate
+                         everyone
+    :param checkpoint_store: A :class:`beacon.db.lookups.LookupStore` each person's
+                             :class:`beacon.objects.checkpoint.LocatorCheckpoint` is kept in, so
+                             locating someone again, e.g. once their record gains a domain, only
+                             probes candidates that weren't probed before.  None to probe every
+                             candidate
+    :param materialize_nicknames: Load every name's nicknames into the shared
+                                  :data:`beacon.util.names.nickname_cache` up front, for batches
+                                  large enough that most names will be looked up.  This changes
+                                  the cache for the whole process
+    :param locator_options: Keyword arguments for each :class:`PersonLocator`, e.g.
+                            ``min_likelihood`` or ``max_candidates``
+    """
+    def __init__(self, candidate_cache_size=10000, stats=None, email_miner=None,
+                 full_name_index=None, chunk_size=100, result_cache=None, checkpoint_store=None,
+                 materialize_nicknames=False, **locator_options):
+        self.locator_options = locator_options
+        self.chunk_size = chunk_size
+        self.result_cache = result_cache
+        self.checkpoint_store = checkpoint_store
+        self.email_miner = email_miner if email_miner else EmailMiner()
+        self.candidate_cache = LRUCache(candidate_cache_size)
+        self.stats = stats if stats else BatchStats()
+        self.full_name_index = full_name_index
+
+        if materialize_nicknames:
+            nickname_cache.materialize()
+
+    def locate_all(self, people, brute_force=True, reports=False):
+        """
+        Locate each person in ``people``, yielding them as soon as they've been located
+
+        :param people: An iterable of :class:`beacon.objects.person.Person`
+        :param brute_force: Attempt to brute force usernames, email addresses, and social profiles
+        :param reports: Yield a (person, report) tuple for each person instead, where the report
+                        is :meth:`PersonLocator.budget_report`, or None if the person was restored
+                        from ``result_cache``
+        :return: A generator of located people in the same order as ``people``
+        """
+        self.stats.started = time.time()
+        people = iter(people)
+        for chunk in iter(lambda: list(itertools.islice(people, self.chunk_size)), []):
+            cached = [self._get_cached(person) for person in chunk]
+            locators = [
+                PersonLocator(person, self.email_miner, self.candidate_cache,
+                              **self.locator_options)
+                for person in chunk
+            ]
+            unlocated = [locator for locator, is_cached in zip(locators, cached) if not is_cached]
+            for locator in unlocated:
+                if self.checkpoint_store:
+                    locator.checkpoint = LocatorCheckpoint.load(self.checkpoint_store,
+                                                                locator.person)
+                locator.locate(brute_force=False)
+
+            # Everyone is yielded in order, as soon as they and everyone before them are done
+            done = set(locator for locator, is_cached in zip(locators, cached) if is_cached)
+            rounds = self._locate_brute_force(unlocated) if brute_force else [unlocated]
+            position = 0
+            # The last, empty, round yields anyone cached after the last person located
+            for finished in itertools.chain(rounds, [[]]):
+                for locator in finished:
+                    if locator not in done:
+                        self._finish(locator)
+                        done.add(locator)
+
+                while position < len(locators) and locators[position] in done:
+                    locator = locators[position]
+                    if cached[position]:
+                        self.stats.reused += 1
+                    if self.full_name_index is not None:
+                        self.full_name_index.add(locator.person, locator.full_name_index)
+                    self._update_stats()
+                    position += 1
+                    if reports:
+                        report = None if cached[position - 1] else locator.budget_report()
+                        yield locator.person, report
+                    else:
+                        yield locator.person
+
+    def _finish(self, locator):
+        """
+        Keep what was found about a person who was just located
+        """
+        if locator.checkpoint is not None:
+            locator.checkpoint.save(self.checkpoint_store, locator.person)
+        if self.result_cache:
+            self.result_cache.put(locator.person, locator.stop_reason)
+
+    def _locate_brute_force(self, locators):
+        """
+        Brute force a chunk of people together (see :meth:`PersonLocator._locate_brute_force`),
+        verifying each candidate email address once no matter how many people generated it.
+
+        Candidates are generated lazily, a round at a time: each round takes the next
+        ``email_batch_size`` candidates of everyone who isn't done, gathers those their budgets
+        afford into a :class:`CandidateIndex`, and verifies them most likely first.  Everyone
+        pays for the candidates of theirs that are verified, even those shared with someone else.
+        Verification stops early once everyone has enough email addresses, and people are done
+        once they have enough, run out of candidates or budget, or their deadline passes.
+
+        Only email addresses are indexed.  Guessed usernames are never looked up on the social
+        services, they're only used to generate email addresses, and people with the same name
+        already share them through ``candidate_cache``.
+
+        :param locators: The :class:`PersonLocator` of each person in the chunk
+        :return: A generator of lists of the people done after each round
+        """
+        batch_size = locators[0].email_batch_size if locators else 0
+        # People who ran out of time or found enough without brute forcing are done already
+        active = [
+            owner for owner, locator in enumerate(locators)
+            if not locator.scheduler.stopped and not locator.has_enough_email_addresses()
+        ]
+        yield [locator for owner, locator in enumerate(locators) if owner not in active]
+
+        candidates = dict(
+            (owner, locators[owner].iter_ranked_email_addresses(
+                locators[owner].untried_usernames().items()
+            )) for owner in active
+        )
+        new_email_addresses = [[] for _ in locators]
+        email_hash_index = EmailHashIndex()
+        # What each candidate verified for the chunk turned out to be, shared with later rounds
+        results = {}
+        candidate_index = {'candidates': 0, 'postings': 0}
+
+        def is_done(owner):
+            locator = locators[owner]
+            return locator.has_enough_email_addresses() or locator.is_out_of_time()
+
+        while active:
+            index = CandidateIndex()
+            exhausted = set()
+            for owner in active:
+                locator = locators[owner]
+                if locator.is_out_of_time():
+                    continue
+                batch, affordable = locator.take_email_address_batch(candidates[owner], results)
+                if len(batch) < batch_size:
+                    exhausted.add(owner)
+
+                # Candidates verified in an earlier round are shared straight away
+                for address, _ in batch:
+                    if address in results:
+                        self._share_result(locator, address, results[address],
+                                           new_email_addresses[owner])
+                index.add(owner, affordable)
+            for key, value in index.info().items():
+                candidate_index[key] += value
+            self.stats.candidate_index = candidate_index
+
+            # Skip candidates once everyone they belong to is done
+            ranked = (
+                address for address in index.ranked()
+                if not all(is_done(owner) for owner in index.owners(address))
+            )
+            for batch in iter(lambda: list(itertools.islice(ranked, batch_size)), []):
+                verified = self.email_miner.verify_email_addresses(batch)
+                results.update((address, verified.get(address)) for address in batch)
+                probes = defaultdict(int)
+                for address in batch:
+                    for owner in index.owners(address):
+                        probes[owner] += 1
+                        self._share_result(locators[owner], address, verified.get(address),
+                                           new_email_addresses[owner])
+                for owner, count in probes.items():
+                    locators[owner].spending.spend(SMTP_PROBES, count)
+
+            finished = [
+                owner for owner in active
+                if owner in exhausted or is_done(owner)
+                or locators[owner].spending.remaining(SMTP_PROBES) == 0
+            ]
+            for owner in finished:
+                locator = locators[owner]
+                if owner not in exhausted and not locator.has_enough_email_addresses() and \
+                        locator.spending.remaining(SMTP_PROBES) == 0:
+                    locator.spending.skip_rest(SMTP_PROBES)
+                if locator.is_out_of_time():
+                    locator.scheduler.stop(DEADLINE_EXCEEDED)
+                    locator.stop_reason = DEADLINE_EXCEEDED
+
+            # Only people who'll follow up on what's found pay to look it up
+            following = [
+                owner for owner in finished if not locators[owner].scheduler.stopped
+                and not locators[owner].has_enough_email_addresses()
+            ]
+            found = self._search_email_hashes(locators, following, new_email_addresses,
+                                              email_hash_index)
+            for owner in finished:
+                locators[owner].follow_new_email_addresses(new_email_addresses[owner],
+                                                           found.get(owner))
+            active = [owner for owner in active if owner not in finished]
+            yield [locators[owner] for owner in finished]
+
+    @staticmethod
+    def _search_email_hashes(locators, owners, new_email_addresses, email_hash_index):
+        """
+        Look up the email addresses just found for ``owners`` on every social service that finds
+        people by email hash, hashing and looking up each distinct address once however many
+        people found it.  Everyone pays for the lookups of their own addresses they can afford.
+        Profiles that go by a name are only given to the people the name matches, all of them
+        matched at once with a :class:`FullNameIndex` of the people looked up.
+
+        :param locators: The :class:`PersonLocator` of each person in the chunk
+        :param owners: The people to look up the ``new_email_addresses`` of
+        :param new_email_addresses: A list of the email addresses just found for each person
+        :param email_hash_index: The chunk's :class:`EmailHashIndex`
+        :return: A dict of each person to a dict of backend to what it found for them, see
+                 :meth:`PersonLocator.follow_new_email_addresses`
+        """
+        owners = [owner for owner in owners if new_email_addresses[owner]]
+        if not owners:
+            return {}
+        for owner in owners:
+            email_hash_index.add(owner, ((address, 1.0) for address in new_email_addresses[owner]))
+        email_hash_index.hash_pending()
+
+        full_name_index = FullNameIndex()
+        for owner in owners:
+            full_name_index.add(owner, locators[owner].full_name_index)
+
+        found = defaultdict(dict)
+        for backend in locators[owners[0]].social_miner.backends:
+            if BY_EMAIL_HASH not in backend.capabilities:
+                continue
+            affordable = {}
+            for owner in owners:
+                _, email_addresses = locators[owner].take_social_requests(
+                    backend, [], new_email_addresses[owner]
+                )
+                affordable[owner] = set(email_hash_index.md5(address)
+                                        for address in email_addresses)
+            wanted = set().union(*affordable.values())
+            md5s = [md5 for md5 in email_hash_index.ranked() if md5 in wanted]
+
+            results = backend.find_hashes(md5s) if md5s else {}
+            matches = full_name_index.match_many(set(
+                name for information in results.values()
+                for name in information.get('full_names', [])
+            ))
+
+            by_owner = defaultdict(list)
+            for md5, information in results.items():
+                full_names = information.get('full_names')
+                named = set(owner for name in full_names or [] for owner, _ in matches[name])
+                for owner in email_hash_index.owners(md5):
+                    if owner in affordable and md5 in affordable[owner] and \
+                            (not full_names or owner in named):
+                        by_owner[owner].append(information)
+            for owner in owners:
+                found[owner][backend] = merge_information(by_owner[owner])
+        return found
+
+    @staticmethod
+    def _share_result(locator, address, exists, new_email_addresses):
+        """
+        Give ``locator``'s person a candidate that was verified, recording the candidate in their
+        checkpoint if its mail server answered
+        """
+        if exists is None:
+            return
+        if locator.checkpoint is not None:
+            locator.checkpoint.record([address], [address] if exists else [])
+        person = locator.person
+        if exists and address not in person.email_addresses and \
+                not locator.has_enough_email_addresses():
+            person.email_addresses.append(address)
+            new_email_addresses.append(address)
+
+    def match_full_name(self, name):
+        """
+        Match a full name, e.g. one returned by a service, against everyone located so far
+
+        :param name: A full name
+        :return: A list of (person, likelihood) tuples, most likely first
+        """
+        if self.full_name_index is None:
+            raise ValueError('BatchLocator was created without a full_name_index')
+        return self.full_name_index.match(name)
+
+    def _get_cached(self, person):
+        """
+        :return: True if ``person`` was restored from ``result_cache``, False if they need locating
+        """
+        return self.result_cache.get(person) if self.result_cache else False
+
+    def _update_stats(self):
+        self.stats.people += 1
+        self.stats.elapsed = time.time() - self.stats.started
+        self.stats.nickname_cache = nickname_cache.info()
+        self.stats.candidate_cache = self.candidate_cache.info()
+        self.stats.domain_cache = self.email_miner.mx_resolver.cache.info()
+
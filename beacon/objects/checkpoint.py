@@ -0,0 +1,99 @@
+import threading
+from collections import defaultdict
+
+
+class LocatorCheckpoint(object):
+    """
+    What locating a person has already tried, so locating them again, e.g. once their record
+    gains a domain or profile URL, only probes candidates that are new.
+
+    Email addresses are remembered once their mail server has told us whether or not they exist,
+    along with those that were found.  Addresses it couldn't tell us about, e.g. because it timed
+    out or greylisted us, aren't remembered, so they're tried again.
+
+    :param tried: An iterable of email addresses already verified
+    :param found: A list of email addresses found to exist, in the order they were found
+    """
+    def __init__(self, tried=None, found=None):
+        self.tried = set(tried) if tried else set()
+        self.found = list(found) if found else []
+        self._lock = threading.Lock()
+
+    def is_tried(self, email_address):
+        """
+        :param email_address: A candidate email address
+        :return: True if ``email_address`` was already verified
+        """
+        return email_address in self.tried
+
+    def record(self, tried, found=None):
+        """
+        Remember email addresses that were verified
+
+        :param tried: An iterable of email addresses that were verified
+        :param found: The email addresses among ``tried`` that exist
+        :return: None
+        """
+        with self._lock:
+            self.tried.update(tried)
+            for address in found or []:
+                if address not in self.found:
+                    self.found.append(address)
+
+    def found_at(self, domains):
+        """
+        :param domains: The domains the person could have email addresses at
+        :return: The email addresses found at ``domains``, in the order they were found
+        """
+        domains = set(domain.lower() for domain in domains)
+        return [
+            address for address in self.found if address.rsplit('@', 1)[-1].lower() in domains
+        ]
+
+    def to_dict(self):
+        """
+        :return: A dict of the email addresses ``found`` and those ``tried``, grouped by domain
+                 so it stays compact when serialized
+        """
+        tried = defaultdict(list)
+        with self._lock:
+            for address in self.tried:
+                username, domain = address.rsplit('@', 1)
+                tried[domain].append(username)
+            found = list(self.found)
+        return {
+            'tried': {domain: sorted(usernames) for domain, usernames in tried.items()},
+            'found': found
+        }
+
+    @classmethod
+    def from_dict(cls, checkpoint):
+        """
+        :param checkpoint: A dict from :meth:`to_dict`
+        :return: The checkpoint described by ``checkpoint``
+        """
+        return cls(
+            ('{u}@{d}'.format(u=username, d=domain)
+             for domain, usernames in checkpoint['tried'].items() for username in usernames),
+            checkpoint['found']
+        )
+
+    @classmethod
+    def load(cls, store, person):
+        """
+        :param store: The :class:`beacon.db.lookups.LookupStore` checkpoints are kept in
+        :param person: The :class:`beacon.objects.person.Person` being located
+        :return: The checkpoint kept for someone with ``person``'s names, or a new one
+        """
+        checkpoint = store.get_checkpoint(person.name_key())
+        return cls.from_dict(checkpoint) if checkpoint else cls()
+
+    def save(self, store, person):
+        """
+        Keep the checkpoint for the next time someone with ``person``'s names is located
+
+        :param store: The :class:`beacon.db.lookups.LookupStore` checkpoints are kept in
+        :param person: The :class:`beacon.objects.person.Person` that was located
+        :return: None
+        """
+        store.put_checkpoint(person.name_key(), self.to_dict())
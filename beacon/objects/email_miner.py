@@ -1,4 +1,8 @@
-import dns.resolver
+import heapq
+
+from beacon.objects.smtp_prober import SMTPProber
+from beacon.util.domains import DNSCache, MXResolver
+
 
 class EmailMiner(object):
     """
@@ -16,15 +20,35 @@ class EmailMiner(object):
         vrfy <somereallylongemailaddressthatdoesntwork584@gmail.com>
         252 2.1.5 Send some mail, I'll try my best d10sm3853854qhc.36 - gsmtp
 
+    :param mx_resolver: The :class:`beacon.util.domains.MXResolver` used to find mail servers
+    :param prober: The :class:`beacon.objects.smtp_prober.SMTPProber` used to verify addresses
+    :param store: A :class:`beacon.db.lookups.LookupStore` the default ``mx_resolver`` and
+                  ``prober`` keep their results in, so later runs reuse them
+    :param limits: A :class:`beacon.util.rate_limit.RateLimiterRegistry` the default
+                   ``mx_resolver`` and ``prober`` pace their calls with, e.g. one shared with the
+                   social miners
     """
     max_email_address_length = 254
+    # Most popular first, so the likeliest addresses are enumerated first
     email_services = [
-        'aol.com', 'atmail.com', 'fastmail.com', 'getanemailaddress.info', 'gmail.com', 'gmx.com',
-        'gmx.net', 'gmx.us', 'hushmail.com', 'hushmail.me', 'hush.com', 'hush.ai', 'mac.hush.com',
-        'icloud.com', 'me.com', 'lycos.com', 'mail.com', 'email.com', 'outlook.com', 'hotmail.com',
-        'protonmail.com', 'rediffmail.com', 'runbox.com', 'yahoo.com', 'yahdex.com', 'zoho.com'
+        'gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com', 'icloud.com', 'aol.com', 'me.com',
+        'mail.com', 'gmx.com', 'zoho.com', 'protonmail.com', 'email.com', 'gmx.net', 'gmx.us',
+        'fastmail.com', 'lycos.com', 'rediffmail.com', 'hushmail.com', 'hushmail.me', 'hush.com',
+        'hush.ai', 'mac.hush.com', 'runbox.com', 'atmail.com', 'yahdex.com',
+        'getanemailaddress.info'
     ]
 
+    # How much less likely each domain is than the domain ranked before it
+    domain_decay = 0.9
+
+    def __init__(self, mx_resolver=None, prober=None, store=None, limits=None):
+        # MX lookups, and their cache, are shared by everyone using this miner
+        self.mx_resolver = mx_resolver if mx_resolver else MXResolver(
+            cache=DNSCache(store=store) if store else None, limits=limits
+        )
+        self.prober = prober if prober else SMTPProber(self.mx_resolver, store=store,
+                                                       limits=limits)
+
     def get_email_addresses_with_usernames(self, usernames):
         """
         Enumerate possible email addresses for ``usernames``
@@ -32,19 +56,108 @@ class EmailMiner(object):
         :param usernames: A list of usernames
         :return: A list of email addresses
         """
-        email_addresses = []
+        return list(self.iter_email_addresses_with_usernames(usernames))
+
+    def iter_email_addresses_with_usernames(self, usernames, domains=None):
+        """
+        Lazily enumerate possible email addresses for ``usernames``, in priority order: every
+        domain for the first username, most popular domain first, then every domain for the
+        second username, and so on.
+
+        :param usernames: An iterable of usernames, most likely first
+        :param domains: The domains to enumerate, most likely first. Defaults to
+                        ``email_services``
+        :return: A generator of email addresses
+        """
+        domains = self.email_services if domains is None else domains
         for username in usernames:
-            for service in self.email_services:
-                if len(username) + len('@') + len(service) <= self.max_email_address_length:
-                    email_addresses.append(username + '@' + service)
+            for domain in domains:
+                if len(username) + len('@') + len(domain) <= self.max_email_address_length:
+                    yield username + '@' + domain
+
+    def iter_scored_email_addresses(self, scored_usernames, domains=None):
+        """
+        Lazily enumerate possible email addresses for ``scored_usernames``, most likely first.
+        An address is as likely as its username, discounted by ``domain_decay`` for every domain
+        ranked ahead of its domain.
+
+        :param scored_usernames: An iterable of (username, likelihood) tuples
+        :param domains: The domains to enumerate, most likely first. Defaults to
+                        ``email_services``
+        :return: A generator of (email address, likelihood) tuples
+        """
+        domains = self.email_services if domains is None else domains
+        domain_likelihoods = [
+            (domain, self.domain_decay ** rank) for rank, domain in enumerate(domains)
+        ]
+
+        def addresses_for(username, likelihood):
+            # Most likely domain first. Negated so heapq.merge() puts the most likely first
+            for domain, domain_likelihood in domain_likelihoods:
+                if len(username) + len('@') + len(domain) <= self.max_email_address_length:
+                    yield -likelihood * domain_likelihood, username + '@' + domain
+
+        merged = heapq.merge(*[
+            addresses_for(username, likelihood) for username, likelihood in scored_usernames
+        ])
+        for negative_likelihood, email_address in merged:
+            yield email_address, -negative_likelihood
 
-        return email_addresses
+    def iter_email_address_batches(self, usernames, domains=None, batch_size=500):
+        """
+        Lazily enumerate possible email addresses for ``usernames`` in lists of ``batch_size``,
+        in the same order as :meth:`iter_email_addresses_with_usernames`
+
+        :param usernames: An iterable of usernames, most likely first
+        :param domains: The domains to enumerate, most likely first
+        :param batch_size: The most email addresses per batch
+        :return: A generator of lists of email addresses
+        """
+        batch = []
+        for email_address in self.iter_email_addresses_with_usernames(usernames, domains):
+            batch.append(email_address)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def verify_email_addresses(self, email_addresses):
+        """
+        Ask the mail servers of ``email_addresses`` which of them exist with ``RCPT TO``
+
+        :param email_addresses: An iterable of email addresses
+        :return: A dict of email address to True if it exists or False if it doesn't, in the
+                 order they were given.  Addresses their mail servers couldn't tell us about,
+                 e.g. because they timed out, greylisted us, or accept everything, are left out
+        """
+        email_addresses = list(email_addresses)
+        results = self.prober.probe(email_addresses)
+        return dict(
+            (address, results[address]) for address in email_addresses
+            if results.get(address) is not None
+        )
 
     def is_valid_email_domain(self, domain):
-        try:
-            records = dns.resolver.query(domain, 'MX')
-        except dns.exception.DNSException as e:
-            # The domain doesn't exist
-            return False
+        """
+        Determine if ``domain`` has MX records
+
+        :param domain: The domain to check
+        :return: True if the domain accepts email
+        """
+        return self.validate_email_domains([domain])[domain]
 
-        return len(records) > 0
+    def validate_email_domains(self, domains):
+        """
+        Determine which of ``domains`` have MX records.  Domains ``mx_resolver`` doesn't have
+        cached answers for are looked up concurrently.  Lookups that fail, e.g. by timing out,
+        report the domain as invalid.
+
+        :param domains: An iterable of domains to check
+        :return: A dict of domain to True if the domain accepts email
+        """
+        return dict(
+            (domain, bool(mail_servers))
+            for domain, mail_servers in self.mx_resolver.resolve_many(domains).items()
+        )
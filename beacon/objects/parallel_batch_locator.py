@@ -0,0 +1,154 @@
+import collections
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import beacon.db as db
+from beacon.db import configure, ensure_db, open_snapshot
+from beacon.db.lookups import LookupStore
+from beacon.objects.batch_locator import BatchLocator, BatchStats
+from beacon.objects.email_miner import EmailMiner
+from beacon.objects.result_cache import ResultCache
+from beacon.objects.social_miner import build_social_miner
+from beacon.util.domains import DNSCache, MXResolver
+from beacon.util.rate_limit import RateLimiterRegistry
+
+# The BatchLocator of each worker process, created when the worker starts
+_worker_locator = None
+
+
+class ParallelBatchLocator(object):
+    """
+    Locates the online presence of many people across a pool of worker processes, so generating
+    candidates isn't limited to a single core.
+
+    People are sent to the workers ``chunk_size`` at a time, and each worker locates its chunks
+    with its own :class:`BatchLocator`.  Workers open the prebuilt nickname snapshot read-only
+    rather than each building their own copy of the Names tables, and load every nickname from it
+    up front unless ``materialize_nicknames=False`` is given.  Results are yielded in the
+    same order as the people were given, as soon as every person before them is located.
+
+    :param workers: The number of worker processes. Defaults to the number of CPUs
+    :param chunk_size: The number of people sent to a worker at once
+    :param stats: A :class:`BatchStats` to update as people are located
+    :param dns_cache_path: A SQLite file every worker shares MX answers through. None for each
+                           worker to keep its own in memory
+    :param share_database: Have workers keep their lookups and located people in the persistent
+                           database this process is configured with, see
+                           :func:`beacon.db.configure`.  Otherwise workers open the nickname
+                           snapshot and keep nothing
+    :param max_age: Seconds a shared located person is reused for, see
+                    :class:`beacon.objects.result_cache.ResultCache`. None for no limit
+    :param incremental: Have workers keep what locating each person tried in the shared database,
+                        so people located again only probe what's new.  Requires
+                        ``share_database``
+    :param rate_limits_path: A SQLite file every worker shares its rate limits to mail servers
+                             and nameservers through, see
+                             :class:`beacon.util.rate_limit.RateLimiterRegistry`.  None for each
+                             worker to pace itself alone
+    :param social_backends: The settings of the social services each worker builds its own
+                            :class:`beacon.objects.social_miner.SocialMiner` from, see
+                            :func:`beacon.objects.social_miner.build_social_miner`.  None to not
+                            search any
+    :param mp_context: The :mod:`multiprocessing` context workers are started with. Defaults to
+                       ``spawn`` so workers never inherit the parent's database or threads
+    :param locator_options: Keyword arguments for each worker's :class:`BatchLocator`, e.g.
+                            ``budget`` or ``max_candidates``.  Must be picklable
+    """
+    def __init__(self, workers=None, chunk_size=100, stats=None, dns_cache_path=None,
+                 share_database=False, max_age=86400, incremental=False, rate_limits_path=None,
+                 social_backends=None, mp_context=None, **locator_options):
+        self.workers = workers if workers else os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.stats = stats if stats else BatchStats()
+        self.dns_cache_path = dns_cache_path
+        self.share_database = share_database
+        self.max_age = max_age
+        self.incremental = incremental
+        self.rate_limits_path = rate_limits_path
+        self.social_backends = social_backends
+        self.mp_context = mp_context if mp_context else multiprocessing.get_context('spawn')
+        self.locator_options = locator_options
+
+    def locate_all(self, people, brute_force=True, reports=False):
+        """
+        Locate each person in ``people``, yielding them in order as soon as they've been located.
+        At most two chunks per worker are in flight, so ``people`` is read lazily.
+
+        :param people: An iterable of :class:`beacon.objects.person.Person`
+        :param brute_force: Attempt to brute force usernames, email addresses, and social profiles
+        :param reports: Yield (person, budget report) tuples instead, see
+                        :meth:`BatchLocator.locate_all`
+        :return: A generator of located people in the same order as ``people``
+        """
+        self.stats.started = time.time()
+        database_url = None
+        if self.share_database:
+            # Populate the database here once rather than racing to in every worker
+            ensure_db()
+            database_url = str(db.engine.url)
+
+        people = iter(people)
+        chunks = iter(lambda: list(itertools.islice(people, self.chunk_size)), [])
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=self.mp_context,
+                                 initializer=_start_worker,
+                                 initargs=(self.dns_cache_path, database_url, self.max_age,
+                                           self.incremental, self.rate_limits_path,
+                                           self.social_backends,
+                                           self.locator_options)) as pool:
+            in_flight = collections.deque()
+            for chunk in itertools.islice(chunks, 2 * self.workers):
+                in_flight.append(pool.submit(_locate_chunk, chunk, brute_force, reports))
+
+            while in_flight:
+                located = in_flight.popleft().result()
+                for chunk in itertools.islice(chunks, 1):
+                    in_flight.append(pool.submit(_locate_chunk, chunk, brute_force, reports))
+
+                for result in located:
+                    self.stats.people += 1
+                    self.stats.elapsed = time.time() - self.stats.started
+                    yield result
+
+
+def _start_worker(dns_cache_path, database_url, max_age, incremental, rate_limits_path,
+                  social_backends, locator_options):
+    """
+    Prepare a worker process: connect to the persistent database, or open the nickname snapshot
+    read-only, falling back to building the Names tables if it's missing, and create the
+    worker's :class:`BatchLocator` and social backends
+    """
+    global _worker_locator
+
+    store = result_cache = None
+    if database_url:
+        configure(database_url)
+        ensure_db()
+        store = LookupStore()
+        result_cache = ResultCache(store, max_age)
+    elif not open_snapshot():
+        ensure_db()
+
+    limits = RateLimiterRegistry(shared_path=rate_limits_path)
+    mx_resolver = None
+    if dns_cache_path:
+        mx_resolver = MXResolver(cache=DNSCache(dns_cache_path, store=store), limits=limits)
+    social_miner = build_social_miner(social_backends, limits) if social_backends else None
+    # Each worker has its own nickname cache, and locates enough people to use most of it
+    locator_options = dict(locator_options)
+    locator_options.setdefault('materialize_nicknames', True)
+    _worker_locator = BatchLocator(email_miner=EmailMiner(mx_resolver, store=store, limits=limits),
+                                   result_cache=result_cache,
+                                   checkpoint_store=store if incremental else None,
+                                   social_miner=social_miner, **locator_options)
+
+
+def _locate_chunk(people, brute_force, reports):
+    """
+    :return: The list of ``people``, located by this worker's :class:`BatchLocator`, with their
+             budget reports if ``reports`` is set
+    """
+    return list(_worker_locator.locate_all(people, brute_force=brute_force, reports=reports))
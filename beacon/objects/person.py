@@ -1,3 +1,6 @@
+import json
+import sys
+
 from beacon.db.models import Name
 from beacon.db import db_connect
 
@@ -5,20 +8,27 @@ from beacon.db import db_connect
 class Person(object):
     """
     An object to represent a person and their online presence.
+
+    People are slotted and their names and domains interned, since batches can hold hundreds of
+    thousands of them in memory and many share the same names and domains.
     """
+    __slots__ = ('first_name', 'last_name', 'middle_name', 'domains', 'linkedin_url',
+                 'angellist_url', 'usernames', 'email_addresses', 'twitter_url')
+
     def __init__(self, first_name, last_name, middle_name=None, domains=None, linkedin_url=None,
                  angellist_url=None, twitter_url=None):
-        self.first_name = first_name.capitalize()
-        self.last_name = last_name.capitalize()
-        self.middle_name = middle_name.capitalize() if middle_name else ""
-        self.domains = domains if domains else []
+        self.first_name = sys.intern(first_name.capitalize())
+        self.last_name = sys.intern(last_name.capitalize())
+        self.middle_name = sys.intern(middle_name.capitalize()) if middle_name else ""
+        self.domains = [sys.intern(domain) for domain in domains] if domains else []
         self.linkedin_url = linkedin_url if linkedin_url else ""
         self.angellist_url = angellist_url if angellist_url else ""
         self.usernames = {}
+        self.email_addresses = []
 
         if twitter_url:
             self.twitter_url = twitter_url
-            self.usernames['twitter'] = [wd for wd in twitter_url.split('/') if wd != ''][-1]
+            self.usernames['twitter'] = [[wd for wd in twitter_url.split('/') if wd != ''][-1]]
         else:
             self.twitter_url = ""
 
@@ -27,3 +37,33 @@ class Person(object):
         Determine if a `Person` has a middle name
         """
         return len(self.middle_name) > 0
+
+    def key(self):
+        """
+        :return: A string identifying who the person is, i.e. their names, domains, and profile
+                 URLs, regardless of case or the order of their domains
+        """
+        return '|'.join([
+            self.first_name, self.middle_name, self.last_name,
+            ','.join(sorted(domain.lower() for domain in self.domains)),
+            self.linkedin_url, self.angellist_url, self.twitter_url
+        ]).lower()
+
+    def name_key(self):
+        """
+        :return: A string identifying the person by their names alone, regardless of case, so it
+                 stays the same when their record gains domains or profile URLs
+        """
+        return '|'.join([self.first_name, self.middle_name, self.last_name]).lower()
+
+    def to_dict(self):
+        """
+        :return: A dict of everything known about the person
+        """
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
+
+    def to_json(self):
+        """
+        :return: Everything known about the person as a JSON object
+        """
+        return json.dumps(self.to_dict())
@@ -1,20 +1,118 @@
-import unicodedata
-
+import itertools
+import threading
+from operator import itemgetter
+from types import MappingProxyType
+
+from beacon.objects.email_miner import EmailMiner
+from beacon.objects.social_miner import (
+    BY_EMAIL_ADDRESS,
+    BY_USERNAME,
+    PERSON_PROFILE_URLS,
+    SocialMiner,
+    empty_information
+)
 from beacon.util.names import (
-    retrieve_nicknames_for_name,
-    get_fl_name_variations,
-    get_fml_name_variations
+    retrieve_scored_nicknames_for_name,
+    expand_username_templates,
+    index_full_names,
+    normalize_full_name,
+    strip_accents
+)
+from beacon.util.budget import (
+    BudgetTracker,
+    DNS_QUERIES,
+    SMTP_PROBES,
+    SOCIAL_CALLS
 )
+from beacon.util.scheduler import DEADLINE_EXCEEDED, TaskScheduler
 
 
 class PersonLocator(object):
     """
     An object used to locate the online presence of an individual.
+
+    Locators working through a batch of people can share an ``email_miner`` (and its MX results)
+    and a ``candidate_cache`` of the full names and usernames generated for each name.  Cached
+    candidates are shared rather than copied, so ``scored_full_names`` and ``scored_usernames``
+    must not be modified.
+
+    Every candidate full name, username, and email address is scored with the likelihood that it
+    belongs to the person, based on the likelihood of the nickname it uses and on how much of the
+    name is abbreviated.  Candidates are tried most likely first, and those less likely than
+    ``min_likelihood`` or beyond the ``max_candidates`` most likely are never tried.
+
+    Locating is driven by a :class:`beacon.util.scheduler.TaskScheduler`.  Mining the social
+    services, validating email domains, and verifying batches of candidate email addresses are
+    tasks, and everything they discover is scheduled as new tasks, so independent lookups run
+    concurrently.
+
+    :param person: The person to locate
+    :param email_miner: The :class:`EmailMiner` used to validate email domains
+    :param candidate_cache: A :class:`beacon.util.cache.LRUCache` shared between locators
+    :param max_email_addresses: Stop verifying candidate email addresses once the person has
+                                this many. None to verify every candidate
+    :param email_batch_size: The number of candidate email addresses verified at once
+    :param min_likelihood: The least likely a candidate can be and still be tried
+    :param max_candidates: The most full names, usernames, or email addresses tried. None for
+                           no limit
+    :param concurrency: The most tasks run at once while locating
+    :param deadline: Seconds :meth:`locate` may take before it stops starting new tasks. None
+                     for no deadline
+    :param budget: A :class:`beacon.util.budget.LocateBudget` limiting the DNS queries, SMTP
+                   probes, and social service calls made, and the time taken, while locating.
+                   None for no limits
+    :param checkpoint: A :class:`beacon.objects.checkpoint.LocatorCheckpoint` of what locating
+                       the person tried before.  Candidates it already verified are skipped, the
+                       email addresses it found are kept, and whatever is verified now is
+                       recorded in it.  None to try everything
+    :param social_miner: The :class:`beacon.objects.social_miner.SocialMiner` whose backends the
+                         person is looked up on.  Defaults to one without any services
     """
-    def __init__(self, person):
+    __slots__ = ('person', 'email_miner', 'candidate_cache', 'max_email_addresses',
+                 'email_batch_size', 'min_likelihood', 'max_candidates', 'concurrency',
+                 'deadline', 'budget', 'spending', 'scored_full_names',
+                 'full_name_representations', 'full_name_index', 'known_usernames',
+                 'scored_usernames', 'probable_usernames', 'email_domains', 'scheduler',
+                 'stop_reason', 'checkpoint', 'social_miner', '_lock',
+                 '_email_domains_validated', '_cancelled')
+
+    # The likelihood that someone abbreviates any one part of their name to its initial
+    initial_likelihood = 0.8
+
+    # Information from the person or the social services is tried before any guesses
+    informed_priority = 2.0
+
+    # Why locating stopped early when the person has ``max_email_addresses``
+    found_enough = 'found enough email addresses'
+
+    def __init__(self, person, email_miner=None, candidate_cache=None, max_email_addresses=None,
+                 email_batch_size=500, min_likelihood=0.0, max_candidates=None, concurrency=8,
+                 deadline=None, budget=None, checkpoint=None, social_miner=None):
         self.person = person
+        self.email_miner = email_miner if email_miner else EmailMiner()
+        self.candidate_cache = candidate_cache
+        self.max_email_addresses = max_email_addresses
+        self.email_batch_size = email_batch_size
+        self.min_likelihood = min_likelihood
+        self.max_candidates = max_candidates
+        self.concurrency = concurrency
+        self.deadline = deadline
+        self.budget = budget
+        self.spending = BudgetTracker()
+        self.scored_full_names = {}
         self.full_name_representations = set()
+        self.full_name_index = {}
         self.known_usernames = set()
+        self.email_domains = []
+        self.scheduler = None
+        self.stop_reason = None
+        self.checkpoint = checkpoint
+        self.social_miner = social_miner if social_miner else SocialMiner()
+        self._lock = threading.Lock()
+        self._email_domains_validated = threading.Event()
+        self._email_domains_validated.set()
+        # Set once tasks still running past the deadline were abandoned
+        self._cancelled = False
 
         self._enumerate_full_name_representations()
 
@@ -37,12 +135,51 @@ class PersonLocator(object):
         * Bond, James Herbert
         * Bond, Jim Herbert
 
+        Each full name is scored in ``scored_full_names`` by the likelihood of the first name or
+        nickname it uses, discounted when the middle name is abbreviated.  The full names are
+        also indexed by their normalized form in ``full_name_index`` for
+        :meth:`matches_full_name`.
+
         .. todo::
             * Migrate to use the `get_[f]ml_name_variations()` functions.
-            * Remove some of the noise via nickname probability mappings
 
         :return: None
         """
+        self.scored_full_names = self._shared_candidates(
+            'full_names', self._generate_full_name_representations
+        )
+        self.full_name_representations = self.scored_full_names.keys()
+        self.full_name_index = self._shared_candidates(
+            'full_name_index', lambda: index_full_names(self.scored_full_names)
+        )
+
+    def matches_full_name(self, name):
+        """
+        Compare a full name, e.g. one returned by a service, to the person's full names.
+        Comparisons ignore case, accents, punctuation, and whitespace, but not the order of the
+        names.
+
+        :param name: A full name
+        :return: The likelihood that ``name`` is the person's. 0.0 if it doesn't match
+        """
+        return self.full_name_index.get(normalize_full_name(name), 0.0)
+
+    def is_someone_else(self, found):
+        """
+        :param found: A dict like :func:`beacon.objects.social_miner.empty_information` of what a
+                      service found
+        :return: True if the profiles in ``found`` go by names and none of them is our person's
+        """
+        full_names = found.get('full_names')
+        return bool(full_names) and not any(self.matches_full_name(name) for name in full_names)
+
+    def _generate_full_name_representations(self):
+        """
+        Generate the full name representations described in
+        :meth:`_enumerate_full_name_representations`
+
+        :return: A dict of full name to likelihood
+        """
         fml_patterns = [
             '{f} {m} {l}',   '{m} {l} {f}',   '{l} {f} {m}',
             '{f}, {m}, {l}', '{m}, {l}, {f}', '{l}, {f}, {m}',
@@ -53,25 +190,33 @@ class PersonLocator(object):
         if self.person.has_middle_name():
             middle_name = self.person.middle_name
 
-        # TODO: Remove some of the noise via nickname probability mappings
-        # Build a list of potential first names. E.g. Robert > Bob or Johnathan > John > Jon
-        nick_names = retrieve_nicknames_for_name(first_name)
-        first_names = [first_name]
-        first_names.extend(nick_names)
-
         # Generate our list of potential full name variants
-        generated_names = set()
-        for first in first_names:
+        generated_names = {}
+        for first, likelihood in self._scored_first_names():
             # Add full first/last name variants
             for pattern in fl_patterns:
-                generated_names.add(pattern.format(f=first, l=last_name))
+                _add_candidate(generated_names, pattern.format(f=first, l=last_name), likelihood)
 
             # Add full first/middle/last name variants, including middle initial variants
             for pattern in fml_patterns if middle_name else []:
-                generated_names.add(pattern.format(f=first, m=middle_name, l=last_name))
-                generated_names.add(pattern.format(f=first, m=middle_name[0], l=last_name))
+                _add_candidate(generated_names,
+                               pattern.format(f=first, m=middle_name, l=last_name), likelihood)
+                _add_candidate(generated_names,
+                               pattern.format(f=first, m=middle_name[0], l=last_name),
+                               likelihood * self.initial_likelihood)
+
+        return generated_names
 
-        self.full_name_representations = generated_names
+    def _scored_first_names(self):
+        """
+        Build a list of potential first names. E.g. Robert > Bob or Johnathan > John > Jon
+
+        :return: A list of (first name, likelihood) tuples, starting with the person's own
+                 first name
+        """
+        first_names = [(self.person.first_name, 1.0)]
+        first_names.extend(retrieve_scored_nicknames_for_name(self.person.first_name))
+        return first_names
 
     def _enumerate_probable_usernames(self):
         """
@@ -84,56 +229,125 @@ class PersonLocator(object):
 
         Email: :rfc:`3696`
 
+        Usernames are generated for the person's first name and each of its nicknames, and scored
+        in ``scored_usernames`` by the likelihood of the nickname, discounted for every part of
+        the name that's abbreviated.
+
         .. todo::
             * Expand our variations to include numbers once we obtain age, birthday, etc
             * Translate non-latin characters to their latin equivalent
 
         :return: None
         """
+        self.scored_usernames = self._shared_candidates(
+            'usernames', self._generate_probable_usernames
+        )
+        self.probable_usernames = self.scored_usernames.keys()
 
-        fml_pattern = '{f}{s1}{m}{s2}{l}'
-        common_special_characters = ['.', '_', '']  # '' To represent *no special character*
-        name_variations = []
-        generated_usernames = set()
+    def _generate_probable_usernames(self):
+        """
+        Generate the usernames described in :meth:`_enumerate_probable_usernames`
 
+        :return: A dict of username to likelihood
+        """
         # Normalize characters in each name to their decomposed equivalents
-        first_name = ''.join([
-            c for c in unicodedata.normalize('NFKD', self.person.first_name)
-            if not unicodedata.combining(c)
-         ])
-        middle_name = ''.join([
-            c for c in unicodedata.normalize('NFKD', self.person.middle_name)
-            if not unicodedata.combining(c)
-        ]) if self.person.has_middle_name() else None
-        last_name = ''.join([
-            c for c in unicodedata.normalize('NFKD', self.person.last_name)
-            if not unicodedata.combining(c)
-        ])
-
-        # Build a list of name variations. E.g. (James, Bond), (J, Bond), or (J, H, Bond)
-        if middle_name:
-            name_variations.extend(get_fml_name_variations(first_name, middle_name, last_name, True))
-            name_variations.extend(get_fml_name_variations(last_name, first_name, middle_name, True))
-            name_variations.extend(get_fml_name_variations(middle_name, last_name, first_name, True))
-
-        name_variations.extend(get_fl_name_variations(first_name, last_name, True))
-        name_variations.extend(get_fl_name_variations(last_name, first_name, True))
-
-        # Generate names by concatenating them together with combinations of the special symbols
-        for name in name_variations:
-            # Each part of the name can be separated by a special character
-            for symbol in common_special_characters:
-                if len(name) == 2:      # First and Last
-                    generated_usernames.add(symbol.join(name))
-                elif len(name) == 3:    # First, Middle, and Last
-                    first, middle, last = name
-                    # We can have combinations of two symbols separating the names
-                    for symbol2 in common_special_characters:
-                        generated_usernames.add(
-                            fml_pattern.format(f=first, m=middle, l=last, s1=symbol, s2=symbol2)
-                        )
-
-        self.probable_usernames = generated_usernames
+        middle_name = strip_accents(self.person.middle_name) \
+            if self.person.has_middle_name() else None
+        last_name = strip_accents(self.person.last_name)
+        initial_likelihoods = [self.initial_likelihood ** initials for initials in range(4)]
+
+        scored_variations = []
+        for first, likelihood in self._scored_first_names():
+            # Every order, abbreviation, and separator of the name. E.g. James.Bond or JH_Bond
+            variations = expand_username_templates(strip_accents(first), middle_name, last_name)
+            # Each abbreviated part of the name makes it less likely
+            scored_variations.extend([
+                (likelihood * initial_likelihoods[initials], usernames)
+                for initials, usernames in variations
+            ])
+
+        # Add the least likely first so each username keeps the highest likelihood it's
+        # generated with
+        scored_variations.sort(key=itemgetter(0))
+        return dict(itertools.chain.from_iterable(
+            zip(usernames, itertools.repeat(likelihood))
+            for likelihood, usernames in scored_variations
+        ))
+
+    def iter_ranked_full_names(self):
+        """
+        :return: A generator of (full name, likelihood) tuples, most likely first, within our
+                 ``min_likelihood`` and ``max_candidates``
+        """
+        return self._within_budget(_most_likely_first(self.scored_full_names))
+
+    def iter_ranked_usernames(self):
+        """
+        :return: A generator of (username, likelihood) tuples, most likely first, within our
+                 ``min_likelihood`` and ``max_candidates``
+        """
+        return self._within_budget(_most_likely_first(self.scored_usernames))
+
+    def iter_ranked_email_addresses(self, scored_usernames):
+        """
+        Lazily enumerate candidate email addresses for ``scored_usernames`` at the person's email
+        domains, then the popular email services.  Candidates our ``checkpoint`` already tried
+        are skipped.
+
+        :param scored_usernames: An iterable of (username, likelihood) tuples
+        :return: A generator of (email address, likelihood) tuples, most likely first, within our
+                 ``min_likelihood`` and ``max_candidates``
+        """
+        candidates = self.email_miner.iter_scored_email_addresses(
+            scored_usernames, self.email_domains + self.email_miner.email_services
+        )
+        if self.checkpoint is not None:
+            tried = self.checkpoint.tried
+            candidates = (candidate for candidate in candidates if candidate[0] not in tried)
+        return self._within_budget(candidates)
+
+    def _within_budget(self, ranked_candidates):
+        """
+        :param ranked_candidates: An iterable of (candidate, likelihood) tuples, most likely first
+        :return: The candidates at least ``min_likelihood`` likely, up to ``max_candidates``
+        """
+        candidates = itertools.takewhile(
+            lambda candidate: candidate[1] >= self.min_likelihood, ranked_candidates
+        )
+        return itertools.islice(candidates, self.max_candidates)
+
+    def _shared_candidates(self, kind, generate):
+        """
+        Retrieve candidates of ``kind`` for our person's name from the shared candidate cache,
+        generating them with ``generate`` if nobody with the same name has been seen.
+
+        :param kind: The type of candidate, e.g. ``'usernames'``
+        :param generate: A function returning a dict of candidate to likelihood for our person
+        :return: A dict of candidate to likelihood.  Must not be modified.
+        """
+        if self.candidate_cache is None:
+            return generate()
+
+        key = (kind, self.person.first_name, self.person.middle_name, self.person.last_name)
+        candidates = self.candidate_cache.get(key)
+        if candidates is None:
+            candidates = MappingProxyType(generate())
+            self.candidate_cache.put(key, candidates)
+        return candidates
+
+    def _enumerate_email_domains(self):
+        """
+        Determine which of the person's domains accept email.  Lookups go through our
+        ``email_miner`` so people sharing domains share the MX results.
+
+        :return: None
+        """
+        try:
+            domains = self._affordable_domains(self.person.domains)
+            validity = self.email_miner.validate_email_domains(domains)
+            self.email_domains = [domain for domain in self.person.domains if validity.get(domain)]
+        finally:
+            self._email_domains_validated.set()
 
     def _determine_usernames_from_urls(self):
         """
@@ -161,24 +375,298 @@ class PersonLocator(object):
     def _mine_personal_information_from_social_services(self, email_addresses=None):
         """
         Mine the all social services for personal information.  Use the person's existing
-        username dictionary if ``email_address`` is None
+        username dictionary if ``email_address`` is None.  What's new is recorded on the person
+        (see :meth:`_record_social_information`).
 
         :param email_addresses: Email addresses to search for on each service
-        :return: A dict() of information type to information objects:
-                 {'email_address': ['example@gmail.com']}
+        :return: A dict() of information type to new information objects, see
+                 :func:`beacon.objects.social_miner.empty_information`:
+                 {'usernames': ['a_username'], 'email_address': ['example@gmail.com']}
+        """
+        usernames, email_addresses = self._social_search_terms(email_addresses)
+        return self._record_social_information(
+            self.social_miner.mine(usernames, email_addresses)
+        )
+
+    def _social_search_terms(self, email_addresses=None):
         """
-        # TODO: Ensure that the first run of SocialMiner, it returns all usernames even though
-        # TODO: they were put in the person.usernames dict() before the first call.
-        return {}
+        :return: A (usernames, email addresses) tuple to look up on the social services: the
+                 person's known usernames if ``email_addresses`` is None
+        """
+        if email_addresses is not None:
+            return [], list(email_addresses)
+        with self._lock:
+            usernames = list(itertools.chain.from_iterable(self.person.usernames.values()))
+        return list(dict.fromkeys(usernames)), []
+
+    def _record_social_information(self, found):
+        """
+        Give our person the accounts, profile URLs, and email addresses in ``found`` they don't
+        have yet
+
+        :param found: A dict like :func:`beacon.objects.social_miner.empty_information`
+        :return: A dict like ``found`` of only what was new
+        """
+        new_information = empty_information()
+        with self._lock:
+            if self._cancelled:
+                return new_information
+            for service, usernames in found['accounts'].items():
+                accounts = self.person.usernames.setdefault(service, [])
+                for username in usernames:
+                    if username not in accounts:
+                        accounts.append(username)
+                        new_information['accounts'].setdefault(service, []).append(username)
+                        if username not in new_information['usernames']:
+                            new_information['usernames'].append(username)
+
+            for field, url in found['profile_urls'].items():
+                if field in PERSON_PROFILE_URLS and not getattr(self.person, field):
+                    setattr(self.person, field, url)
+                    new_information['profile_urls'][field] = url
+
+            for address in found['email_address']:
+                if address not in self.person.email_addresses:
+                    self.person.email_addresses.append(address)
+                    new_information['email_address'].append(address)
+        return new_information
 
     def _discover_email_addresses_with_usernames(self, usernames):
         """
-        Discover valid email addresses using only the usernames in ``usernames``.
+        Discover valid email addresses using only the usernames in ``usernames``, and follow up
+        on any that are found (see :meth:`_discover_email_addresses_task`).
 
-        :param usernames: The usernames to use when discovering new email addresses
+        :param usernames: The usernames to use when discovering new email addresses. Either a
+                          dict of username to likelihood or an iterable of usernames that are
+                          equally likely
         :return: A list of new email addresses
         """
-        return []
+        known_email_addresses = len(self.person.email_addresses)
+        self._get_scheduler().schedule(
+            self.informed_priority, self._discover_email_addresses_task, usernames
+        )
+        self._run_scheduler()
+        return self.person.email_addresses[known_email_addresses:]
+
+    def _affordable_domains(self, domains):
+        """
+        Spend our DNS query budget on the domains in ``domains`` that haven't been looked up
+
+        :param domains: An iterable of domains
+        :return: The set of domains that are cached or could be afforded
+        """
+        domains = set(domains)
+        cache = self.email_miner.mx_resolver.cache
+        uncached = sorted(domain for domain in domains if domain not in cache)
+        affordable = self.spending.spend(DNS_QUERIES, len(uncached))
+        return domains.difference(uncached[affordable:])
+
+    def take_email_address_batch(self, candidates, verified=()):
+        """
+        Take the next ``email_batch_size`` candidates and pick those our budget affords to
+        verify.  Candidates beyond our SMTP probe budget, or at domains our DNS budget can't look
+        up, are recorded as skipped.  Only the domains of candidates within the SMTP probe budget
+        are looked up, and nothing is spent on SMTP probes until the candidates are verified.
+
+        :param candidates: An iterator of (email address, likelihood) tuples, most likely first
+        :param verified: Email addresses that were already verified, which are free
+        :return: A (batch, affordable) tuple of the candidates taken, empty once there are none
+                 left, and those among them we can afford to verify
+        """
+        batch = list(itertools.islice(candidates, self.email_batch_size))
+        unverified = [candidate for candidate in batch if candidate[0] not in verified]
+        remaining = self.spending.remaining(SMTP_PROBES)
+        if remaining is not None and remaining < len(unverified):
+            self.spending.skip(SMTP_PROBES, len(unverified) - remaining)
+            unverified = unverified[:remaining]
+
+        domains = self._affordable_domains(
+            address.rsplit('@', 1)[-1] for address, _ in unverified
+        )
+        affordable = [
+            candidate for candidate in unverified if candidate[0].rsplit('@', 1)[-1] in domains
+        ]
+        self.spending.skip(SMTP_PROBES, len(unverified) - len(affordable))
+        return batch, affordable
+
+    def is_out_of_time(self):
+        """
+        :return: True once the deadline of the current :meth:`locate` has passed
+        """
+        return bool(self.scheduler) and self.scheduler.remaining() == 0
+
+    def budget_report(self):
+        """
+        Report how much of our budget the last :meth:`locate` spent and what it skipped, either
+        because the budget ran out or the scheduler stopped before getting to it.
+
+        :return: A dict like :meth:`beacon.util.budget.BudgetTracker.report`, plus the
+                 ``stop_reason`` and a count of each kind of ``skipped_tasks``
+        """
+        report = self.spending.report()
+        report['stop_reason'] = self.stop_reason
+        skipped_tasks = {}
+        for task, args in self.scheduler.skipped if self.scheduler else []:
+            name = task.__name__.strip('_')
+            skipped_tasks[name] = skipped_tasks.get(name, 0) + 1
+        report['skipped_tasks'] = skipped_tasks
+        return report
+
+    def has_enough_email_addresses(self):
+        """
+        :return: True if the person has ``max_email_addresses`` and no more need verifying
+        """
+        return bool(self.max_email_addresses and
+                    len(self.person.email_addresses) >= self.max_email_addresses)
+
+    def _get_scheduler(self):
+        """
+        :return: The scheduler of the current :meth:`locate`, starting one if there isn't one
+        """
+        if self.scheduler is None:
+            self.scheduler = self._start_scheduler()
+        return self.scheduler
+
+    def _start_scheduler(self):
+        """
+        :return: A new scheduler, ending at the earlier of our ``deadline`` and our budget's
+        """
+        deadlines = [self.deadline, self.budget.deadline if self.budget else None]
+        deadlines = [deadline for deadline in deadlines if deadline is not None]
+        return TaskScheduler(self.concurrency, min(deadlines) if deadlines else None)
+
+    def _run_scheduler(self):
+        """
+        Run every scheduled task until there are none left or we stop early.  Tasks still
+        running when the deadline passes are abandoned, and whatever they find afterwards is
+        ignored, so the person doesn't change once :meth:`locate` returns.
+
+        :return: None
+        """
+        stop_reason = self._get_scheduler().run(
+            stop_when=lambda: self.found_enough if self.has_enough_email_addresses() else None
+        )
+        if stop_reason == DEADLINE_EXCEEDED:
+            with self._lock:
+                self._cancelled = True
+        self.stop_reason = stop_reason
+
+    def _mine_social_services_task(self, email_addresses=None, searched=()):
+        """
+        Mine each social service that can search for what we know (see
+        :meth:`_mine_personal_information_from_social_services`) in a task of its own, so a slow
+        service only holds up what follows from it
+
+        :param email_addresses: Email addresses to search for on each service
+        :param searched: Backends already searched for ``email_addresses``, which are skipped
+        :return: None
+        """
+        usernames, email_addresses = self._social_search_terms(email_addresses)
+        for backend in self.social_miner.backends_for(usernames, email_addresses):
+            if backend not in searched:
+                self.scheduler.schedule(self.informed_priority, self._mine_social_service_task,
+                                        backend, usernames, email_addresses)
+
+    def _mine_social_service_task(self, backend, usernames, email_addresses):
+        """
+        Search one social service for as many of ``usernames`` and ``email_addresses`` as our
+        budget affords, then schedule discovering email addresses with any new usernames found
+        and mining the services for any new email addresses.  What's found by email address is
+        ignored if it belongs to someone else (see :meth:`is_someone_else`), since the addresses
+        may have been guessed
+
+        :param backend: The :class:`beacon.objects.social_miner.SocialBackend` to search
+        :param usernames: A list of usernames to search for
+        :param email_addresses: A list of email addresses to search for
+        :return: None
+        """
+        usernames, email_addresses = self.take_social_requests(backend, usernames,
+                                                               email_addresses)
+        if not usernames and not email_addresses:
+            return
+        found = backend.find(usernames, email_addresses)
+        if not (email_addresses and self.is_someone_else(found)):
+            self._follow_social_information_task(found)
+
+    def _follow_social_information_task(self, found):
+        """
+        Give our person what a social service found, then schedule discovering email addresses
+        with any new usernames and mining the services for any new email addresses
+
+        :param found: A dict like :func:`beacon.objects.social_miner.empty_information`
+        :return: None
+        """
+        new_information = self._record_social_information(found)
+        if len(new_information.get('usernames', [])) > 0:
+            self.scheduler.schedule(self.informed_priority, self._discover_email_addresses_task,
+                                    new_information['usernames'])
+        if new_information['email_address']:
+            self.scheduler.schedule(self.informed_priority, self._mine_social_services_task,
+                                    new_information['email_address'])
+
+    def _discover_email_addresses_task(self, usernames):
+        """
+        Discover valid email addresses using only the usernames in ``usernames``.  Candidates are
+        generated lazily, most likely first (see :meth:`iter_ranked_email_addresses`), once the
+        person's email domains are validated, and verified a batch at a time.  Gives up if the
+        deadline passes first.
+
+        :param usernames: Either a dict of username to likelihood or an iterable of usernames
+                          that are equally likely
+        :return: None
+        """
+        if isinstance(usernames, dict):
+            scored_usernames = usernames.items()
+        else:
+            scored_usernames = [(username, 1.0) for username in usernames]
+
+        # Don't outlive the deadline waiting for the domains; the task is abandoned by then
+        if not self._email_domains_validated.wait(self.scheduler.remaining()):
+            return
+        with self._lock:
+            if self._cancelled:
+                return
+        self._verify_email_address_batch(self.iter_ranked_email_addresses(scored_usernames))
+
+    def _verify_email_address_batch(self, candidates):
+        """
+        Verify the next ``email_batch_size`` candidates with their mail servers and add the ones
+        that exist to the person.  The batch after it is scheduled once this one is verified, so
+        no more are tried once the person has ``max_email_addresses``, and the social services
+        are mined for the new email addresses.
+
+        :param candidates: An iterator of (email address, likelihood) tuples, most likely first
+        :return: None
+        """
+        batch, affordable = self.take_email_address_batch(candidates)
+        if not batch:
+            return
+
+        affordable = affordable[:self.spending.spend(SMTP_PROBES, len(affordable))]
+        out_of_probes = self.spending.remaining(SMTP_PROBES) == 0
+        if out_of_probes:
+            # Nothing after this batch can be verified either
+            self.spending.skip_rest(SMTP_PROBES)
+
+        new_email_addresses = []
+        verified = self.email_miner.verify_email_addresses(a for a, _ in affordable)
+        found = [address for address, exists in verified.items() if exists]
+        with self._lock:
+            if self._cancelled:
+                return
+            for address in found:
+                if address not in self.person.email_addresses:
+                    new_email_addresses.append(address)
+                    self.person.email_addresses.append(address)
+            if self.checkpoint is not None:
+                # Only conclusive answers, so addresses we couldn't verify are tried again
+                self.checkpoint.record(verified, found)
+
+        if new_email_addresses:
+            self.scheduler.schedule(self.informed_priority, self._mine_social_services_task,
+                                    new_email_addresses)
+        if not out_of_probes:
+            self.scheduler.schedule(batch[-1][1], self._verify_email_address_batch, candidates)
 
     def _locate_brute_force(self):
         """
@@ -198,45 +686,110 @@ class PersonLocator(object):
 
         :return: None
         """
+        # Discover valid email addresses that match our person's name, most likely first
+        scored_usernames = self.untried_usernames()
+        self._get_scheduler().schedule(
+            max(scored_usernames.values(), default=0.0), self._discover_email_addresses_task,
+            scored_usernames
+        )
+        self._run_scheduler()
+
+    def untried_usernames(self):
+        """
+        Generate the usernames our person could have, minus any usernames already searched for
+
+        :return: A dict of username to likelihood within our ``min_likelihood`` and
+                 ``max_candidates``
+        """
         # Generate a list of possible usernames the user could have
         self._enumerate_probable_usernames()
 
-        # Remove already attempted usernames from our generated list
-        for service, usernames in self.person.usernames:
-            for user in usernames:
-                self.probable_usernames.remove(user)
+        # Remove already attempted usernames from our generated list, copying it only if needed
+        attempted_usernames = set(itertools.chain.from_iterable(self.person.usernames.values()))
+        if not attempted_usernames.isdisjoint(self.probable_usernames):
+            self.scored_usernames = {
+                username: likelihood for username, likelihood in self.scored_usernames.items()
+                if username not in attempted_usernames
+            }
+            self.probable_usernames = self.scored_usernames.keys()
 
-        # Discover valid email addresses that match our person's name
-        new_email_addresses = self._discover_email_addresses_with_usernames(
-            self.probable_usernames
-        )
+        return dict(self.iter_ranked_usernames())
 
-        while len(new_email_addresses) > 0:
-            # Use the new email addresses to find missing usernames/profile URLs
-            new_information = self._mine_personal_information_from_social_services(
-                email_addresses=new_email_addresses
-            )
+    def restore_checkpoint(self):
+        """
+        Give our person the email addresses our ``checkpoint`` found at their domains or the
+        popular email services, which won't be verified again
 
-            # Use any new usernames found from the social services to find new email addresses
-            if len(new_information.get('usernames')) > 0:
-                new_email_addresses = self._discover_email_addresses_with_usernames(
-                    new_information.get('usernames')
-                )
-            else:
-                new_email_addresses = []
+        :return: None
+        """
+        if self.checkpoint is None:
+            return
+        domains = self.person.domains + self.email_miner.email_services
+        with self._lock:
+            for address in self.checkpoint.found_at(domains):
+                if address not in self.person.email_addresses:
+                    self.person.email_addresses.append(address)
+
+    def follow_new_email_addresses(self, new_email_addresses, found=None):
+        """
+        Use email addresses just discovered to find missing usernames/profile URLs on the social
+        services, and those usernames to find more email addresses, until nothing new is found
+
+        :param new_email_addresses: Email addresses just discovered for our person
+        :param found: A dict of :class:`beacon.objects.social_miner.SocialBackend` to what it
+                      already found for ``new_email_addresses``, e.g. when they were looked up
+                      along with other people's.  Those backends aren't searched again
+        :return: None
+        """
+        if new_email_addresses:
+            scheduler = self._get_scheduler()
+            found = found if found else {}
+            for information in found.values():
+                scheduler.schedule(self.informed_priority, self._follow_social_information_task,
+                                   information)
+            scheduler.schedule(self.informed_priority, self._mine_social_services_task,
+                               new_email_addresses, frozenset(found))
+            self._run_scheduler()
+
+    def take_social_requests(self, backend, usernames, email_addresses):
+        """
+        Spend our social calls budget on as many of ``backend``'s requests for ``usernames`` and
+        ``email_addresses`` as it affords, recording the rest as skipped
+
+        :param backend: The :class:`beacon.objects.social_miner.SocialBackend` to search
+        :param usernames: A list of usernames to search for
+        :param email_addresses: A list of email addresses to search for
+        :return: A (usernames, email addresses) tuple of what we can afford to search for
+        """
+        requests = backend.plan(usernames, email_addresses)
+        remaining = self.spending.remaining(SOCIAL_CALLS)
+        affordable = len(requests) if remaining is None else min(len(requests),
+                                                                 remaining // backend.cost)
+        affordable = self.spending.spend(SOCIAL_CALLS, affordable * backend.cost) // backend.cost
+        self.spending.skip(SOCIAL_CALLS, (len(requests) - affordable) * backend.cost)
+
+        terms = {BY_USERNAME: [], BY_EMAIL_ADDRESS: []}
+        for kind, values in requests[:affordable]:
+            terms[kind].extend(values)
+        return terms[BY_USERNAME], terms[BY_EMAIL_ADDRESS]
 
     def locate(self, brute_force=False):
         """
         Intelligently search for our person on the world wide web.  Only brute force if necessary
 
-        #. Use the usernames we parsed from the profile URLs to contact all Social Services
-        #. While we can obtain new usernames and email addresses
-            #. Use the same usernames, along with email addresses obtained from the Social Services
-               to discover new email addresses
-            #. If we were unable to find a user on one of the social services, use the new email
-               addresses to attempt to find a user on that service
+        #. Use the usernames we parsed from the profile URLs to contact all Social Services,
+           while validating the person's email domains
+        #. Whenever we obtain new usernames or email addresses
+            #. Use the new usernames to discover new email addresses
+            #. Use the new email addresses to attempt to find a user on the social services
         #. If we still don't have any email addresses or social service URLs brute force locate
 
+        Each step is a task on our scheduler, and the tasks it schedules run concurrently.  We
+        stop once there is nothing new to try, the person has ``max_email_addresses``, or the
+        ``deadline`` passes, and the reason is kept in ``stop_reason``.  Requests beyond our
+        ``budget`` are skipped, leaving the person partially located; see
+        :meth:`budget_report` for what was skipped.
+
         Updates ``self.person`` with the most accurate information we can locate
 
         .. warning::
@@ -244,29 +797,41 @@ class PersonLocator(object):
             etc. Use with caution when searching for lots of people simultaneously.
 
         :param brute_force: Attempt to brute force usernames, email addresses, and social profiles
-        :return: None
+        :return: Why we stopped, see :meth:`beacon.util.scheduler.TaskScheduler.run`
         """
-        # Determine any known usernames from a person's urls
+        self.scheduler = self._start_scheduler()
+        self.spending = self.budget.start() if self.budget else BudgetTracker()
+        self._cancelled = False
+        self._email_domains_validated.clear()
+        self.restore_checkpoint()
+
+        # Determine any known usernames from a person's urls and where they could receive email
         self._determine_usernames_from_urls()
+        self.scheduler.schedule(self.informed_priority, self._enumerate_email_domains)
 
         # Using the usernames we know are correct, gather information from the social services
-        new_information = self._mine_personal_information_from_social_services()
-
-        # Continuously loop until we can't find any new email addresses, usernames, or social URLs
-        while len(new_information) > 0:
-            # Use any new usernames found mined from the social services to find new email addresses
-            new_email_addresses = self._discover_email_addresses_with_usernames(
-                new_information['usernames']
-            )
-
-            if len(new_email_addresses) > 0:
-                # Use the new email addresses to find missing usernames/profile URLs
-                new_information = self._mine_personal_information_from_social_services(
-                    email_addresses=new_email_addresses
-                )
-            else:
-                new_information = {}
+        self.scheduler.schedule(self.informed_priority, self._mine_social_services_task)
+        self._run_scheduler()
 
         # If we *still* don't have all of our social URLs or email addresses... Engage BEAST MODE.
-        if brute_force:
+        if brute_force and not self.scheduler.stopped:
             self._locate_brute_force()
+
+        return self.stop_reason
+
+
+def _add_candidate(candidates, candidate, likelihood):
+    """
+    Add ``candidate`` to the dict of ``candidates``, keeping the highest likelihood it's been
+    generated with
+    """
+    if likelihood > candidates.get(candidate, -1.0):
+        candidates[candidate] = likelihood
+
+
+def _most_likely_first(scored_candidates):
+    """
+    :param scored_candidates: A dict of candidate to likelihood
+    :return: A list of (candidate, likelihood) tuples, most likely first
+    """
+    return sorted(scored_candidates.items(), key=lambda scored: (-scored[1], scored[0]))
@@ -0,0 +1,187 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from beacon.db.lookups import LookupStore
+from beacon.objects.person import Person
+from beacon.util.scheduler import DEADLINE_EXCEEDED
+
+# What was found about a person, as opposed to what we were told about them
+FOUND_ATTRIBUTES = ('linkedin_url', 'angellist_url', 'twitter_url', 'usernames', 'email_addresses')
+
+
+class ResultCache(object):
+    """
+    A cache of located people, keyed by :meth:`beacon.objects.person.Person.key`, so someone
+    located recently is looked up instead of being located again.  People whose locating was cut
+    short by a deadline aren't kept, since their result is missing whatever wasn't tried in time.
+
+    Results are fresh for ``max_age`` seconds.  With ``refresh_stale``, results older than that
+    are still returned straight away, for up to ``max_stale`` more seconds, while the person is
+    located again in the background.  Each person is refreshed by one thread at a time.
+
+    :param store: The :class:`beacon.db.lookups.LookupStore` results are kept in. Defaults to one
+                  on the configured database
+    :param max_age: Seconds a result is fresh for. None for results to never go stale
+    :param refresh_stale: Return stale results and refresh them in the background, rather than
+                          locating the person again before returning
+    :param max_stale: Seconds past ``max_age`` a stale result may still be returned. None for no
+                      limit
+    :param refresh_workers: The most people refreshed in the background at once
+    :param clock: A function returning the current time in seconds since the epoch
+    """
+    def __init__(self, store=None, max_age=86400, refresh_stale=False, max_stale=None,
+                 refresh_workers=2, clock=time.time):
+        self.store = store if store else LookupStore(clock=clock)
+        self.max_age = max_age
+        self.refresh_stale = refresh_stale
+        self.max_stale = max_stale
+        self.refresh_workers = refresh_workers
+        self.clock = clock
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._refreshing = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get(self, person):
+        """
+        Fill in what was found about ``person`` from a fresh result
+
+        :param person: The :class:`beacon.objects.person.Person` to look up
+        :return: True if a fresh result was found, otherwise ``person`` is left as it was
+        """
+        age, profile = self._lookup(person)
+        if age is None or not self._is_fresh(age):
+            with self._lock:
+                self.misses += 1
+            return False
+
+        _restore(person, profile)
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, person, stop_reason=None):
+        """
+        Keep what was found about a located person, unless locating them was cut short
+
+        :param person: A located :class:`beacon.objects.person.Person`
+        :param stop_reason: Why locating the person stopped, e.g.
+                            :attr:`beacon.objects.person_locator.PersonLocator.stop_reason`
+        :return: True if the result was kept
+        """
+        if stop_reason == DEADLINE_EXCEEDED:
+            return False
+        self.store.put_profile(person.key(), person.to_dict())
+        return True
+
+    def locate(self, person, locate):
+        """
+        Fill in what was found about ``person`` from the cache, locating them with ``locate`` if
+        there's no fresh result.  Stale results are returned as is and refreshed in the
+        background when ``refresh_stale`` is set.
+
+        :param person: The :class:`beacon.objects.person.Person` to locate
+        :param locate: A function that locates the person it's given in place, returning why it
+                       stopped, see :meth:`put`
+        :return: ``person``
+        """
+        age, profile = self._lookup(person)
+        if age is not None and self._is_fresh(age):
+            _restore(person, profile)
+            with self._lock:
+                self.hits += 1
+            return person
+
+        if age is not None and self.refresh_stale and (
+                self.max_stale is None or age <= self.max_age + self.max_stale):
+            self._refresh(_copy_inputs(person), locate)
+            _restore(person, profile)
+            with self._lock:
+                self.stale_hits += 1
+            return person
+
+        with self._lock:
+            self.misses += 1
+        self.put(person, locate(person))
+        return person
+
+    def wait(self):
+        """
+        Wait for every background refresh to finish
+
+        :return: None
+        """
+        with self._lock:
+            refreshing = list(self._refreshing.values())
+        for future in refreshing:
+            future.result()
+
+    def close(self):
+        """
+        Wait for background refreshes and stop their threads
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+    def info(self):
+        """
+        :return: A dict of fresh ``hits``, ``stale_hits``, ``misses``, and background
+                 ``refreshes`` started
+        """
+        with self._lock:
+            return {'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses,
+                    'refreshes': self.refreshes}
+
+    def _lookup(self, person):
+        """
+        :return: An (age in seconds, profile) tuple, or (None, None) if nothing is stored
+        """
+        stored = self.store.get_profile(person.key())
+        if stored is None:
+            return None, None
+        located, profile = stored
+        return self.clock() - located, profile
+
+    def _is_fresh(self, age):
+        return self.max_age is None or age <= self.max_age
+
+    def _refresh(self, person, locate):
+        key = person.key()
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers)
+            self.refreshes += 1
+            self._refreshing[key] = self._executor.submit(self._refresh_task, key, person, locate)
+
+    def _refresh_task(self, key, person, locate):
+        try:
+            self.put(person, locate(person))
+        finally:
+            with self._lock:
+                del self._refreshing[key]
+
+
+def _restore(person, profile):
+    """
+    Fill in what was found about ``person`` from a profile saved with
+    :meth:`beacon.objects.person.Person.to_dict`
+    """
+    for attribute in FOUND_ATTRIBUTES:
+        setattr(person, attribute, profile[attribute])
+
+
+def _copy_inputs(person):
+    """
+    :return: A new :class:`beacon.objects.person.Person` with only what we were told about
+             ``person``
+    """
+    return Person(person.first_name, person.last_name, person.middle_name, person.domains,
+                  person.linkedin_url, person.angellist_url, person.twitter_url)
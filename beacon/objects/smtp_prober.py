@@ -0,0 +1,300 @@
+import smtplib
+import socket
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from beacon.util.domains import MXResolver
+from beacon.util.rate_limit import RateLimiterRegistry
+
+
+class SMTPConnectionPool(object):
+    """
+    Keeps open SMTP connections to mail servers so they can be reused between batches.
+
+    :param port: The port mail servers listen on
+    :param helo_name: The host name we introduce ourselves as. Defaults to our FQDN
+    :param timeout: Seconds to wait on the network before giving up
+    :param connections_per_host: The most connections open to any one mail server at once
+    """
+    def __init__(self, port=25, helo_name=None, timeout=10.0, connections_per_host=2):
+        self.port = port
+        self.helo_name = helo_name
+        self.timeout = timeout
+        self.connections_per_host = connections_per_host
+        self._idle = defaultdict(list)
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, host):
+        """
+        Borrow a connection to ``host``, opening one if none are idle.  Connections that raise
+        are closed instead of being returned to the pool.
+
+        :param host: The mail server to connect to
+        """
+        with self._lock:
+            slots = self._slots.setdefault(
+                host, threading.BoundedSemaphore(self.connections_per_host)
+            )
+
+        with slots:
+            with self._lock:
+                smtp = self._idle[host].pop() if self._idle[host] else None
+            if smtp is None:
+                smtp = self._connect(host)
+
+            try:
+                yield smtp
+            except:
+                self._close(smtp)
+                raise
+
+            with self._lock:
+                self._idle[host].append(smtp)
+
+    def close(self):
+        """
+        Close every idle connection
+        """
+        with self._lock:
+            connections = [smtp for idle in self._idle.values() for smtp in idle]
+            self._idle.clear()
+
+        for smtp in connections:
+            self._close(smtp, quit=True)
+
+    def _connect(self, host):
+        smtp = smtplib.SMTP(host, self.port, local_hostname=self.helo_name, timeout=self.timeout)
+        smtp.ehlo_or_helo_if_needed()
+        return smtp
+
+    @staticmethod
+    def _close(smtp, quit=False):
+        try:
+            if quit:
+                smtp.quit()
+            else:
+                smtp.close()
+        except (smtplib.SMTPException, socket.error):
+            pass
+
+
+class SMTPProber(object):
+    """
+    Checks whether email addresses exist by asking their mail servers to accept mail for them
+    with ``RCPT TO``, without ever sending a message.
+
+    Addresses are grouped by mail server and checked in batches of ``batch_size`` over pooled
+    connections.  When a server supports ``PIPELINING`` (:rfc:`2920`) each batch's ``MAIL FROM``
+    and ``RCPT TO`` commands are sent in a single write.  ``RSET`` ends every batch so the
+    connection can be reused.  Mail servers are probed concurrently, each limited to
+    ``rate_per_host`` checks per second.
+
+    Servers that accept mail for any address (catch-alls) can't tell us anything, so a random
+    address is checked alongside each server's first batch and the results for catch-alls are
+    reported as unknown.  Until a server has conclusively rejected the random address, e.g. while
+    it's refusing our sender or greylisting, the addresses it accepts are reported as unknown too,
+    and its next batch checks again.  Batches sent while the check is in flight wait for it.
+
+    Every batch is paced by a token bucket for its mail server, from ``limits``, and mail servers
+    that keep failing have their circuit opened for a while, so their addresses are reported as
+    unknown without connecting.
+
+    Conclusive results can be kept in a ``store`` so addresses aren't probed again until their
+    results are ``probe_ttl`` seconds old.
+
+    :param mx_resolver: The :class:`beacon.util.domains.MXResolver` used to find mail servers
+    :param sender: The envelope sender used in ``MAIL FROM``
+    :param batch_size: The number of ``RCPT TO`` commands per batch
+    :param concurrency: The number of batches in flight at once, across all mail servers
+    :param rate_per_host: The most ``RCPT TO`` commands sent to one mail server per second, when
+                          ``limits`` isn't given
+    :param pool: The :class:`SMTPConnectionPool` to borrow connections from
+    :param store: A :class:`beacon.db.lookups.LookupStore` to keep results in. None to always
+                  probe
+    :param probe_ttl: Seconds a stored result is reused for
+    :param limits: The :class:`beacon.util.rate_limit.RateLimiterRegistry` limiting calls to each
+                   mail server, e.g. one shared with other miners. Defaults to one allowing
+                   ``rate_per_host``
+    """
+    accepted_codes = (250, 251)
+    # The mailbox doesn't exist. Other failures (e.g. policy blocks) don't tell us anything
+    rejected_codes = (550, 551, 553)
+
+    def __init__(self, mx_resolver=None, sender='', batch_size=50, concurrency=16,
+                 rate_per_host=20, pool=None, store=None, probe_ttl=7 * 86400, limits=None):
+        self.mx_resolver = mx_resolver if mx_resolver else MXResolver()
+        self.sender = sender
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.pool = pool if pool else SMTPConnectionPool()
+        self.store = store
+        self.probe_ttl = probe_ttl
+        self.limits = limits if limits else RateLimiterRegistry(
+            limits={'smtp': (rate_per_host, rate_per_host)}
+        )
+        self._catch_all_hosts = {}
+        self._catch_all_checks = {}
+        self._lock = threading.Lock()
+
+    def probe(self, email_addresses):
+        """
+        Check whether each of ``email_addresses`` exists
+
+        :param email_addresses: An iterable of email addresses
+        :return: A dict of email address to True if its mail server accepts it, False if the
+                 server rejects it, or None if we couldn't tell
+        """
+        email_addresses = list(email_addresses)
+        stored = self.store.get_probes(email_addresses) if self.store else {}
+        results = {}
+        addresses_by_domain = defaultdict(list)
+        for address in email_addresses:
+            if address in stored:
+                continue
+            addresses_by_domain[address.rsplit('@', 1)[-1].lower()].append(address)
+
+        # Everything sent to a domain goes to its most preferred mail server
+        addresses_by_host = defaultdict(list)
+        mail_servers = self.mx_resolver.resolve_many(addresses_by_domain.keys())
+        for domain, addresses in addresses_by_domain.items():
+            if mail_servers[domain]:
+                addresses_by_host[mail_servers[domain][0]].extend(addresses)
+            else:
+                results.update((address, False if mail_servers[domain] == [] else None)
+                               for address in addresses)
+
+        batches = [
+            (host, addresses[start:start + self.batch_size])
+            for host, addresses in addresses_by_host.items()
+            for start in range(0, len(addresses), self.batch_size)
+        ]
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                for batch_results in executor.map(lambda batch: self._probe_batch(*batch),
+                                                  batches):
+                    results.update(batch_results)
+
+        # Catch-alls accept everything, so their answers don't mean anything, and servers that
+        # might be one can only be trusted to reject addresses
+        for host, addresses in addresses_by_host.items():
+            catch_all = self._catch_all_hosts.get(host)
+            for address in addresses:
+                if catch_all or (catch_all is None and results[address]):
+                    results[address] = None
+
+        if self.store:
+            # Only what mail servers told us, MX answers expire sooner
+            self.store.put_probes(dict(
+                (address, results[address])
+                for addresses in addresses_by_host.values() for address in addresses
+            ), self.probe_ttl)
+            results.update(stored)
+        return results
+
+    def close(self):
+        """
+        Close every pooled connection
+        """
+        self.pool.close()
+
+    def _probe_batch(self, host, addresses):
+        """
+        Check a batch of addresses handled by ``host``, retrying once on a fresh connection if
+        a pooled connection was dropped by the server.
+
+        :return: A dict of email address to True, False, or None
+        """
+        catch_all_check = None
+        while True:
+            with self._lock:
+                checking = self._catch_all_checks.get(host)
+                if checking is None:
+                    if host not in self._catch_all_hosts:
+                        self._catch_all_checks[host] = threading.Event()
+                        catch_all_check = '{r}@{d}'.format(
+                            r=uuid.uuid4().hex, d=addresses[0].rsplit('@', 1)[-1]
+                        )
+                    break
+            # Another batch is checking whether the server is a catch-all
+            checking.wait()
+
+        try:
+            return self._check_batch(host, addresses, catch_all_check)
+        finally:
+            if catch_all_check:
+                with self._lock:
+                    self._catch_all_checks.pop(host).set()
+
+    def _check_batch(self, host, addresses, catch_all_check):
+        """
+        Send a batch of addresses to ``host``, with the random ``catch_all_check`` address
+        after them if the server hasn't been checked yet
+
+        :return: A dict of email address to True, False, or None
+        """
+        rcpts = addresses + [catch_all_check] if catch_all_check else addresses
+
+        destination = 'smtp:' + host
+        codes = None
+        if self.limits.acquire(destination, len(rcpts)):
+            for attempt in range(2):
+                try:
+                    with self.pool.connection(host) as smtp:
+                        codes = self._rcpt_batch(smtp, rcpts)
+                    break
+                except smtplib.SMTPServerDisconnected:
+                    continue
+                except (smtplib.SMTPException, socket.error):
+                    break
+            # Servers throttling or refusing us don't give conclusive answers
+            self.limits.record(destination, codes is not None and any(
+                code in self.accepted_codes + self.rejected_codes for code in codes
+            ))
+
+        if catch_all_check and codes is not None:
+            code = codes.pop()
+            # Otherwise, e.g. if we were greylisted, the next batch checks again
+            if code in self.accepted_codes + self.rejected_codes:
+                with self._lock:
+                    self._catch_all_hosts[host] = code in self.accepted_codes
+
+        if codes is None:
+            return dict((address, None) for address in addresses)
+
+        return dict(
+            (address, True if code in self.accepted_codes else
+                      False if code in self.rejected_codes else None)
+            for address, code in zip(addresses, codes)
+        )
+
+    def _rcpt_batch(self, smtp, addresses):
+        """
+        Send ``MAIL FROM``, a ``RCPT TO`` for each address, and ``RSET`` over ``smtp``
+
+        :return: A list of the ``RCPT TO`` reply codes, in the same order as ``addresses``
+        """
+        commands = ['MAIL FROM:<{s}>'.format(s=self.sender)]
+        commands.extend('RCPT TO:<{a}>'.format(a=address) for address in addresses)
+
+        if smtp.has_extn('pipelining'):
+            smtp.send(''.join(command + '\r\n' for command in commands))
+            codes = [smtp.getreply()[0] for _ in commands]
+        else:
+            codes = []
+            for command in commands:
+                smtp.putcmd(command)
+                codes.append(smtp.getreply()[0])
+                if codes[0] != 250:
+                    break
+
+        smtp.rset()
+        if codes[0] != 250:
+            # The server won't take mail from us, so it can't tell us about any address
+            return [None] * len(addresses)
+        return codes[1:]
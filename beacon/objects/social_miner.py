@@ -1,8 +1,247 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from beacon.objects.angellist_miner import AngelListMiner
+from beacon.objects.twitter_miner import TwitterMiner
+
+# What a backend can look people up by
+BY_USERNAME = 'usernames'
+BY_EMAIL_ADDRESS = 'email_addresses'
+# Backends that can also look email addresses up by their MD5 hash, see SocialBackend.find_hashes
+BY_EMAIL_HASH = 'email_hashes'
+
+# The profile URLs a person has attributes for
+PERSON_PROFILE_URLS = ('linkedin_url', 'angellist_url', 'twitter_url')
+
+EMAIL_ADDRESS_PATTERN = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}')
+
+
+def empty_information():
+    """
+    :return: A dict of information found on the social services, with nothing in it:
+
+             .. code-block:: python
+
+                {
+                    'usernames': ['jamesbond'],
+                    'email_address': ['example@gmail.com'],
+                    'accounts': {'twitter': ['JamesBond']},
+                    'profile_urls': {'twitter_url': 'https://twitter.com/JamesBond'},
+                    'full_names': ['James Bond']
+                }
+
+             ``usernames`` lists every username found, on any service, and ``accounts`` which
+             service each was found on.  ``full_names`` lists the names the profiles found go by,
+             if the service reports them
+    """
+    return {'usernames': [], 'email_address': [], 'accounts': {}, 'profile_urls': {},
+            'full_names': []}
+
+
+def merge_information(information):
+    """
+    :param information: An iterable of dicts like :func:`empty_information`, most trusted first
+    :return: One dict of everything in ``information``, without duplicates.  The first URL found
+             for each profile is kept
+    """
+    merged = empty_information()
+    for found in information:
+        for key in ('usernames', 'email_address', 'full_names'):
+            merged[key].extend(value for value in found.get(key, []) if value not in merged[key])
+        for service, usernames in found['accounts'].items():
+            accounts = merged['accounts'].setdefault(service, [])
+            accounts.extend(username for username in usernames if username not in accounts)
+        for field, url in found['profile_urls'].items():
+            merged['profile_urls'].setdefault(field, url)
+    return merged
+
+
+class SocialBackend(object):
+    """
+    A social service people can be looked up on.  Subclasses set what the service can look
+    people up by in ``capabilities`` and implement :meth:`find`, so new services plug into
+    :class:`SocialMiner` and :class:`beacon.objects.person_locator.PersonLocator` without
+    changing either.
+
+    ``batch_size`` is the most usernames or email addresses one request looks up, ``cost`` is
+    the social calls each request spends from a :class:`beacon.util.budget.LocateBudget`, and
+    ``rate_limit`` is the most requests the service allows per second, or None if it doesn't
+    limit us.
+    """
+    name = None
+    capabilities = frozenset()
+    batch_size = 1
+    cost = 1
+    rate_limit = None
+
+    def can_find(self, usernames, email_addresses):
+        """
+        :return: True if we can look up any of ``usernames`` or ``email_addresses``
+        """
+        return bool((usernames and BY_USERNAME in self.capabilities) or
+                    (email_addresses and BY_EMAIL_ADDRESS in self.capabilities))
+
+    def plan(self, usernames, email_addresses):
+        """
+        :param usernames: A list of usernames to look up
+        :param email_addresses: A list of email addresses to look up
+        :return: A list of (``BY_USERNAME`` or ``BY_EMAIL_ADDRESS``, list of values) tuples, one
+                 per request needed, in the order they should be made
+        """
+        requests = []
+        for kind, values in ((BY_USERNAME, usernames), (BY_EMAIL_ADDRESS, email_addresses)):
+            if kind in self.capabilities:
+                requests.extend(
+                    (kind, values[start:start + self.batch_size])
+                    for start in range(0, len(values), self.batch_size)
+                )
+        return requests
+
+    def find(self, usernames=(), email_addresses=()):
+        """
+        Look up whoever has any of ``usernames`` or ``email_addresses``
+
+        :param usernames: A list of usernames
+        :param email_addresses: A list of email addresses
+        :return: A dict like :func:`empty_information` of what was found
+        """
+        raise NotImplementedError
+
+    def find_hashes(self, md5s):
+        """
+        Look up whoever has an email address hashed to any of ``md5s``.  Only backends with the
+        ``BY_EMAIL_HASH`` capability implement this, so callers that have already hashed many
+        people's email addresses, e.g. in a :class:`beacon.util.hashing.EmailHashIndex`, can look
+        them all up at once.  Each hash is one email address of :meth:`plan`.
+
+        :param md5s: A list of MD5 hex hashes of normalized email addresses
+        :return: A dict of each hash someone was found for to a dict like
+                 :func:`empty_information` of what was found
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Release any connections
+        """
+        pass
+
+
+class TwitterBackend(SocialBackend):
+    """
+    Finds Twitter accounts by screen name with a :class:`beacon.objects.twitter_miner.TwitterMiner`,
+    and email addresses in their descriptions.
+
+    :param miner: The :class:`beacon.objects.twitter_miner.TwitterMiner` to look users up with.
+                  Defaults to one built from ``miner_options``
+    :param miner_options: Keyword arguments for the default miner, e.g. ``bearer_token``
+    """
+    name = 'twitter'
+    capabilities = frozenset([BY_USERNAME])
+
+    def __init__(self, miner=None, **miner_options):
+        self.miner = miner if miner else TwitterMiner(**miner_options)
+        self.batch_size = self.miner.batch_size
+        self.rate_limit = self.miner.limiter.rate
+
+    def find(self, usernames=(), email_addresses=()):
+        found = empty_information()
+        users = self.miner.users_by_screen_names(usernames)
+        for username in usernames:
+            user = users.get(username)
+            if not user:
+                continue
+            _add_username(found, self.name, user['screen_name'])
+            _add_full_name(found, user.get('name'))
+            found['profile_urls'].setdefault('twitter_url', self.miner.profile_url(user))
+            for address in EMAIL_ADDRESS_PATTERN.findall(user.get('description') or ''):
+                if address not in found['email_address']:
+                    found['email_address'].append(address)
+        return found
+
+    def close(self):
+        self.miner.close()
+
+
+class AngelListBackend(SocialBackend):
+    """
+    Finds AngelList users by the hash of their email address, or by profile slug, with a
+    :class:`beacon.objects.angellist_miner.AngelListMiner`, along with the other profiles they
+    link to.
+
+    :param miner: The :class:`beacon.objects.angellist_miner.AngelListMiner` to look users up
+                  with.  Defaults to one built from ``miner_options``
+    :param miner_options: Keyword arguments for the default miner, e.g. ``access_token``
+    """
+    name = 'angellist'
+    capabilities = frozenset([BY_USERNAME, BY_EMAIL_ADDRESS, BY_EMAIL_HASH])
+
+    def __init__(self, miner=None, **miner_options):
+        self.miner = miner if miner else AngelListMiner(**miner_options)
+        self.rate_limit = self.miner.limiter.rate
+
+    def find(self, usernames=(), email_addresses=()):
+        by_slug = self.miner.users_by_slugs(usernames)
+        users = [by_slug.get(username) for username in usernames]
+        by_email = self.miner.users_by_emails(email_addresses)
+        users.extend(by_email.get(address) for address in email_addresses)
+        return self._information(users)
+
+    def find_hashes(self, md5s):
+        users = self.miner.users_by_hashes(md5s)
+        return dict((md5, self._information([user])) for md5, user in users.items() if user)
+
+    def _information(self, users):
+        """
+        :param users: A list of AngelList user dicts, or None for users that weren't found
+        :return: A dict like :func:`empty_information` of the profiles ``users`` link to
+        """
+        found = empty_information()
+        for user in users:
+            if not user:
+                continue
+            _add_full_name(found, user.get('name'))
+            urls = self.miner.profile_urls(user)
+            for field in PERSON_PROFILE_URLS:
+                if field in urls:
+                    found['profile_urls'].setdefault(field, urls[field])
+            if 'angellist_url' in urls:
+                _add_username(found, self.name, _last_path_segment(urls['angellist_url']))
+            if 'twitter_url' in urls:
+                _add_username(found, 'twitter', _last_path_segment(urls['twitter_url']))
+        return found
+
+    def close(self):
+        self.miner.close()
+
+
+def build_social_miner(backends, limits=None):
+    """
+    Build a :class:`SocialMiner` from backend settings.  Unlike backends, settings can be
+    pickled, e.g. to send to worker processes that each build their own.
+
+    :param backends: A list of (:class:`SocialBackend` subclass, dict of keyword arguments)
+                     tuples, most trusted first, e.g.
+                     ``[(TwitterBackend, {'bearer_token': token})]``
+    :param limits: The :class:`beacon.util.rate_limit.RateLimiterRegistry` every backend's
+                   requests are paced by. None for each backend to pace itself
+    :return: A :class:`SocialMiner`
+    """
+    return SocialMiner([
+        backend(**dict(options, limits=limits) if limits else options)
+        for backend, options in backends
+    ])
+
+
 class SocialMiner(object):
     """
     An object to search LinkedIn, AngelList, and Twitter for accounts matching certain usernames
     and email addresses and gathering account information about that individual.
 
+    Each service is a :class:`SocialBackend`.  :meth:`mine` asks every backend that can look up
+    what it's given at once, so a slow service doesn't hold up the rest, and merges what they
+    find (see :func:`merge_information`).
+
     .. note::
 
         Twitter does not support *obtaining* or *searching for* email addresses from **`any API
@@ -26,10 +265,10 @@ class SocialMiner(object):
         searching for users. Period.  They only expose the controls necessary to write third
         party apps which act on behalf of users, only if authorized by that user.  The only thing we
         could do is simulate interacting with the LinkedIn search while masquerading as a
-        real person with an account and scrape the results.
+        real person with an account and scrape the results.  There is no LinkedIn backend.
 
     .. note::
-    
+
         Both Twitter and LinkedIn offer a *find my contacts* feature to find people by email
         address.  We might be able to find a way to programmatically do this.
 
@@ -42,6 +281,58 @@ class SocialMiner(object):
         #. Scrape profiles
 
     .. _any API endpoint: https://dev.twitter.com/faq#26
+
+    :param backends: A list of :class:`SocialBackend`, most trusted first. None for no services
     """
-    def __init__(self):
-        pass
+    def __init__(self, backends=None):
+        self.backends = list(backends) if backends else []
+
+    def backends_for(self, usernames, email_addresses):
+        """
+        :return: The backends that can look up any of ``usernames`` or ``email_addresses``
+        """
+        return [
+            backend for backend in self.backends if backend.can_find(usernames, email_addresses)
+        ]
+
+    def mine(self, usernames=(), email_addresses=()):
+        """
+        Look up ``usernames`` and ``email_addresses`` on every backend at once
+
+        :param usernames: An iterable of usernames
+        :param email_addresses: An iterable of email addresses
+        :return: A dict like :func:`empty_information` of everything found
+        """
+        usernames, email_addresses = list(usernames), list(email_addresses)
+        backends = self.backends_for(usernames, email_addresses)
+        if not backends:
+            return empty_information()
+
+        with ThreadPoolExecutor(max_workers=len(backends)) as executor:
+            return merge_information(executor.map(
+                lambda backend: backend.find(usernames, email_addresses), backends
+            ))
+
+    def close(self):
+        """
+        Release every backend's connections
+        """
+        for backend in self.backends:
+            backend.close()
+
+
+def _add_username(found, service, username):
+    accounts = found['accounts'].setdefault(service, [])
+    if username not in accounts:
+        accounts.append(username)
+    if username not in found['usernames']:
+        found['usernames'].append(username)
+
+
+def _add_full_name(found, name):
+    if name and name not in found['full_names']:
+        found['full_names'].append(name)
+
+
+def _last_path_segment(url):
+    return [segment for segment in url.split('/') if segment][-1]
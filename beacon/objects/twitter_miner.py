@@ -0,0 +1,196 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from beacon.util.cache import ExpiringCache
+from beacon.util.http import destination, is_failure, pooled_session
+from beacon.util.rate_limit import RateLimiterRegistry
+
+
+class TwitterMiner(object):
+    """
+    Retrieves information about Twitter users by screen name.
+
+    Twitter does not support *obtaining* or *searching for* email addresses, but we can tell
+    which candidate usernames are taken, and gather each user's name, description, location,
+    website, and profile picture.  We may be able to parse the description for email addresses.
+
+    Screen names are looked up ``batch_size`` at a time with ``GET users/lookup``, which answers
+    up to 100 names per request and leaves out names nobody has.  Requests go over one pooled
+    :class:`requests.Session` and up to ``concurrency`` are in flight at once, limited by a token
+    bucket from ``limits`` to ``requests_per_window`` every ``window`` seconds, which matches
+    Twitter's 15 minute rate limit windows.  Users are cached for ``ttl`` seconds, and "no such
+    user" answers for ``negative_ttl`` seconds, in memory and in ``cache_path`` when it's given.
+    Failed requests aren't cached.
+
+    API Endpoints:
+    * GET users/lookup
+        * *screen_name* - A comma separated list of up to 100 screen names
+
+    :param bearer_token: An application-only OAuth 2 bearer token
+    :param api_url: The root of the Twitter API
+    :param session: The :class:`requests.Session` to send requests with. Defaults to one pooling
+                    ``concurrency`` connections
+    :param requests_per_window: The most requests sent per rate limit window
+    :param window: The length of a rate limit window in seconds
+    :param batch_size: The most screen names looked up per request, at most 100
+    :param cache: The :class:`beacon.util.cache.ExpiringCache` answers are kept in. Defaults to
+                  one persisted to ``cache_path``
+    :param cache_path: A SQLite file to persist answers to. Answers only live in memory if None
+    :param ttl: Seconds a user found is cached for
+    :param negative_ttl: Seconds a "no such user" answer is cached for
+    :param concurrency: The number of requests in flight at once
+    :param timeout: Seconds to wait on the network before giving up
+    :param limits: The :class:`beacon.util.rate_limit.RateLimiterRegistry` pacing requests to the
+                   API, e.g. one shared with other miners.  ``requests_per_window`` applies
+                   unless it has limits for the API's host.  Requests aren't made while the
+                   host's circuit is open
+    """
+    # Screen names are 1 to 15 letters, numbers, or underscores
+    screen_name_pattern = re.compile(r'^[A-Za-z0-9_]{1,15}$')
+
+    def __init__(self, bearer_token=None, api_url='https://api.twitter.com/1.1/', session=None,
+                 requests_per_window=300, window=900, batch_size=100, cache=None,
+                 cache_path=None, ttl=7 * 86400, negative_ttl=86400, concurrency=4,
+                 timeout=10.0, limits=None):
+        self.bearer_token = bearer_token
+        self.api_url = api_url.rstrip('/') + '/'
+        self.session = session if session else pooled_session(concurrency)
+        self.destination = destination(self.api_url)
+        self.limits = limits if limits else RateLimiterRegistry()
+        self.limits.set_default(self.destination, float(requests_per_window) / window,
+                                requests_per_window)
+        self.batch_size = min(batch_size, 100)
+        self.cache = cache if cache else ExpiringCache(cache_path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def user_by_screen_name(self, screen_name):
+        """
+        :param screen_name: A screen name, i.e. https://twitter.com/{screen_name}
+        :return: The Twitter user dict for ``screen_name``, or None if there's no such user or
+                 they couldn't be looked up
+        """
+        return self.users_by_screen_names([screen_name]).get(screen_name)
+
+    def users_by_screen_names(self, screen_names):
+        """
+        Look up every screen name in ``screen_names``.  Cached answers are read in one go, and
+        the rest are requested in batches, concurrently.
+
+        :param screen_names: An iterable of candidate screen names, e.g. usernames
+        :return: A dict of each screen name to its Twitter user dict, or None if there's no such
+                 user, including names nobody could have.  Names that couldn't be looked up are
+                 left out
+        """
+        screen_names = list(screen_names)
+        names = set(name.lower() for name in screen_names if self.is_screen_name(name))
+        keys = dict(('screen_name:' + name, name) for name in names)
+        users = dict((keys[key], user) for key, user in self.cache.get_many(keys).items())
+
+        missing = sorted(name for name in names if name not in users)
+        batches = [
+            missing[start:start + self.batch_size]
+            for start in range(0, len(missing), self.batch_size)
+        ]
+        if len(batches) == 1:
+            users.update(self._lookup_batch(batches[0]))
+        elif batches:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                for batch_users in executor.map(self._lookup_batch, batches):
+                    users.update(batch_users)
+
+        results = {}
+        for name in screen_names:
+            if not self.is_screen_name(name):
+                results[name] = None
+            elif name.lower() in users:
+                results[name] = users[name.lower()]
+        return results
+
+    def is_screen_name(self, name):
+        """
+        :param name: A candidate screen name
+        :return: True if somebody could have ``name`` as their screen name
+        """
+        return bool(self.screen_name_pattern.match(name))
+
+    @staticmethod
+    def profile_url(user):
+        """
+        :param user: A Twitter user dict
+        :return: The URL of the user's Twitter profile
+        """
+        return 'https://twitter.com/{s}'.format(s=user['screen_name'])
+
+    @property
+    def limiter(self):
+        """
+        :return: The :class:`beacon.util.rate_limit.TokenBucket` pacing requests to our API
+        """
+        return self.limits.limiter(self.destination)
+
+    def close(self):
+        """
+        Close every pooled connection
+        """
+        self.session.close()
+
+    def _lookup_batch(self, screen_names):
+        """
+        Look up a batch of lowercase screen names and cache the answers
+
+        :return: A dict of each screen name to its user dict or None, empty if the request failed
+        """
+        found = self._fetch(screen_names)
+        if found is None:
+            return {}
+
+        users = dict((name, found.get(name)) for name in screen_names)
+        self.cache.put_many(dict(
+            ('screen_name:' + name, user) for name, user in users.items() if user is not None
+        ), self.ttl)
+        self.cache.put_many(dict(
+            ('screen_name:' + name, None) for name, user in users.items() if user is None
+        ), self.negative_ttl)
+        return users
+
+    def _fetch(self, screen_names):
+        """
+        :return: A dict of lowercase screen name to user dict for every user found, or None if
+                 the request failed
+        """
+        headers = {}
+        if self.bearer_token:
+            headers['Authorization'] = 'Bearer ' + self.bearer_token
+
+        if not self.limits.acquire(self.destination):
+            return None
+        with self._lock:
+            self.requests += 1
+        try:
+            response = self.session.get(
+                self.api_url + 'users/lookup.json', params={'screen_name': ','.join(screen_names)},
+                headers=headers, timeout=self.timeout
+            )
+        except requests.RequestException:
+            self.limits.record(self.destination, False)
+            return None
+
+        self.limits.record(self.destination, not is_failure(response))
+
+        # Twitter answers 404 when none of the names exist
+        if response.status_code == 404:
+            return {}
+        if response.status_code != 200:
+            return None
+        try:
+            return dict((user['screen_name'].lower(), user) for user in response.json())
+        except (ValueError, KeyError, TypeError):
+            return None
@@ -0,0 +1,370 @@
+"""
+Local stand-ins for the network services beacon talks to, so tests run without a network.
+"""
+import json
+import re
+import socketserver
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import dns.name
+import dns.resolver
+
+from beacon.objects.angellist_miner import email_hash
+from beacon.objects.email_miner import EmailMiner
+from beacon.objects.smtp_prober import SMTPConnectionPool, SMTPProber
+from beacon.objects.social_miner import (
+    BY_EMAIL_ADDRESS,
+    BY_USERNAME,
+    SocialBackend,
+    merge_information
+)
+from beacon.util.domains import MXResolver
+
+
+MXRecord = namedtuple('MXRecord', ['preference', 'exchange'])
+RRset = namedtuple('RRset', ['ttl'])
+
+
+class StubAnswer(list):
+    """
+    A list of MX records with the TTL of the answer, like :class:`dns.resolver.Answer`
+    """
+    def __init__(self, records, ttl):
+        super(StubAnswer, self).__init__(records)
+        self.rrset = RRset(ttl)
+
+
+class StubResolver(object):
+    """
+    A stand-in for :class:`dns.resolver.Resolver` that answers MX queries from a dict.
+
+    :param records: A dict of domain to a list of (preference, mail server) tuples
+    :param failures: A dict of domain to a list of exceptions to raise, one per query, before
+                     answering normally
+    :param delay: Seconds each query takes
+    :param ttl: The TTL of every answer
+    """
+    def __init__(self, records=None, failures=None, delay=0, ttl=3600):
+        self.ttl = ttl
+        self.records = records if records else {}
+        self.failures = failures if failures else {}
+        self.delay = delay
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def query(self, domain, rdtype='A'):
+        with self._lock:
+            self.queries.append(domain)
+            failures = self.failures.get(domain)
+            failure = failures.pop(0) if failures else None
+
+        time.sleep(self.delay)
+        if failure:
+            raise failure
+        if domain not in self.records:
+            raise dns.resolver.NXDOMAIN()
+        return StubAnswer([
+            MXRecord(preference, dns.name.from_text(host))
+            for preference, host in self.records[domain]
+        ], self.ttl)
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    A local SMTP server that answers ``RCPT TO`` for a fixed set of mailboxes and never accepts
+    a message.  Serves from a background thread on 127.0.0.1 once :meth:`start` is called.
+
+    :param mailboxes: The email addresses that exist
+    :param catch_all: Accept every address
+    :param pipelining: Advertise ``PIPELINING``
+    :param refuse_sender: Refuse ``MAIL FROM``
+    :param unknown_reply: The reply to ``RCPT TO`` for addresses that don't exist, e.g. a 4xx
+                          reply to greylist them
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailboxes=None, catch_all=False, pipelining=True, refuse_sender=False,
+                 unknown_reply='550 5.1.1 No such user'):
+        socketserver.ThreadingTCPServer.__init__(self, ('127.0.0.1', 0), FakeSMTPHandler)
+        self.mailboxes = set(address.lower() for address in mailboxes or [])
+        self.catch_all = catch_all
+        self.pipelining = pipelining
+        self.refuse_sender = refuse_sender
+        self.unknown_reply = unknown_reply
+        self.connections = 0
+        self.commands = []
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def record(self, command):
+        with self._lock:
+            self.commands.append(command)
+
+    def count(self, verb):
+        """
+        :return: The number of commands received starting with ``verb``
+        """
+        return len([command for command in self.commands if command.upper().startswith(verb)])
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+    rcpt_pattern = re.compile(r'RCPT TO:\s*<([^>]*)>', re.IGNORECASE)
+
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode('ascii'))
+
+    def handle(self):
+        server = self.server
+        with server._lock:
+            server.connections += 1
+
+        self.reply('220 fake.smtp ESMTP')
+        for line in self.rfile:
+            command = line.decode('ascii').strip()
+            verb = command[:4].upper()
+            server.record(command)
+
+            if verb == 'EHLO':
+                self.reply('250-fake.smtp')
+                if server.pipelining:
+                    self.reply('250-PIPELINING')
+                self.reply('250 SIZE 1000000')
+            elif verb == 'MAIL' and server.refuse_sender:
+                self.reply('550 5.7.1 Sender rejected')
+            elif verb in ('HELO', 'MAIL', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                match = self.rcpt_pattern.match(command)
+                address = match.group(1).lower() if match else ''
+                if server.catch_all or address in server.mailboxes:
+                    self.reply('250 2.1.5 OK')
+                else:
+                    self.reply(server.unknown_reply)
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                break
+            else:
+                self.reply('502 Command not implemented')
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    """
+    A local JSON API served over keep-alive connections from a background thread on 127.0.0.1
+    once :meth:`start` is called.  Subclasses answer requests in :meth:`answer`.
+
+    :param failures: The number of requests answered with a 503 before answering normally
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, failures=0):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), FakeHTTPHandler)
+        self.failures = failures
+        self.connections = 0
+        self.requests = []
+        self._lock = threading.Lock()
+
+    @property
+    def root_url(self):
+        return 'http://127.0.0.1:{p}/'.format(p=self.server_address[1])
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def answer(self, path, query, headers):
+        """
+        :param path: The path requested
+        :param query: A dict of query parameter to value
+        :param headers: The request's headers
+        :return: A (status code, JSON serializable body) tuple
+        """
+        return 404, {'error': 'not_found'}
+
+
+class FakeHTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        query = dict((name, values[0]) for name, values in parse_qs(url.query).items())
+        with server._lock:
+            server.requests.append(query)
+            failing = server.failures > 0
+            server.failures -= 1 if failing else 0
+
+        if failing:
+            self.respond(503, {'error': 'over_capacity'})
+        else:
+            self.respond(*server.answer(url.path, query, self.headers))
+
+
+class FakeAngelListServer(FakeHTTPServer):
+    """
+    A local AngelList API that answers ``GET /1/users/search`` by ``md5`` or ``slug`` from a list
+    of users.
+
+    :param users: A list of (email address, user dict) tuples. Users are found by their
+                  ``angellist_url``'s slug too
+    :param failures: The number of requests answered with a 503 before answering normally
+    """
+    def __init__(self, users=None, failures=0):
+        FakeHTTPServer.__init__(self, failures)
+        self.users = {}
+        for email_address, user in users or []:
+            self.users['md5', email_hash(email_address)] = user
+            if user.get('angellist_url'):
+                self.users['slug', user['angellist_url'].rstrip('/').rsplit('/', 1)[-1]] = user
+
+    @property
+    def url(self):
+        return self.root_url + '1/'
+
+    def answer(self, path, query, headers):
+        if path != '/1/users/search':
+            return 404, {'error': 'not_found'}
+        field = 'md5' if 'md5' in query else 'slug'
+        user = self.users.get((field, query.get(field)))
+        if user:
+            return 200, user
+        return 404, {'error': 'not_found', 'error_description': 'No such user'}
+
+
+class FakeTwitterServer(FakeHTTPServer):
+    """
+    A local Twitter API that answers ``GET /1.1/users/lookup.json`` from a list of users, like
+    Twitter: users that exist are listed and the rest are left out, with a 404 if nobody exists.
+
+    :param users: A list of user dicts, each with a ``screen_name``
+    :param bearer_token: The bearer token requests must be authorized with. None to allow any
+    :param failures: The number of requests answered with a 503 before answering normally
+    """
+    max_screen_names = 100
+
+    def __init__(self, users=None, bearer_token=None, failures=0):
+        FakeHTTPServer.__init__(self, failures)
+        self.users = dict((user['screen_name'].lower(), user) for user in users or [])
+        self.bearer_token = bearer_token
+
+    @property
+    def url(self):
+        return self.root_url + '1.1/'
+
+    def answer(self, path, query, headers):
+        if path != '/1.1/users/lookup.json':
+            return 404, {'errors': [{'code': 34, 'message': 'Sorry, that page does not exist.'}]}
+        if self.bearer_token and headers.get('Authorization') != 'Bearer ' + self.bearer_token:
+            return 401, {'errors': [{'code': 89, 'message': 'Invalid or expired token.'}]}
+
+        screen_names = query.get('screen_name', '').split(',')
+        if len(screen_names) > self.max_screen_names:
+            return 403, {'errors': [{'code': 18, 'message': 'Too many terms specified.'}]}
+        users = [self.users[name.lower()] for name in screen_names if name.lower() in self.users]
+        if not users:
+            return 404, {'errors': [{'code': 17, 'message': 'No user matches for specified '
+                                                             'terms.'}]}
+        return 200, users
+
+
+class FakeSocialBackend(SocialBackend):
+    """
+    A social service that finds people from dicts, recording every lookup.
+
+    :param accounts: A dict of username to a dict like
+                     :func:`beacon.objects.social_miner.empty_information` of what's found for it
+    :param by_email: A dict of email address to a dict of what's found for it
+    :param name: The service's name
+    :param capabilities: What the service can look people up by. Defaults to usernames and email
+                         addresses
+    :param batch_size: The most usernames or email addresses looked up per request
+    :param cost: The social calls each request spends
+    :param delay: Seconds each lookup takes
+    :param limits: Ignored, like a real service's rate limits
+    """
+    def __init__(self, accounts=None, by_email=None, name='fake', capabilities=None,
+                 batch_size=1, cost=1, delay=0, limits=None):
+        self.accounts = accounts if accounts else {}
+        self.by_email = by_email if by_email else {}
+        self.name = name
+        self.capabilities = frozenset(capabilities if capabilities is not None
+                                      else [BY_USERNAME, BY_EMAIL_ADDRESS])
+        self.batch_size = batch_size
+        self.cost = cost
+        self.delay = delay
+        self.lookups = []
+        self.hash_lookups = []
+        self._lock = threading.Lock()
+
+    def find(self, usernames=(), email_addresses=()):
+        with self._lock:
+            self.lookups.append((list(usernames), list(email_addresses)))
+        time.sleep(self.delay)
+        return merge_information(
+            [self.accounts[username] for username in usernames if username in self.accounts] +
+            [self.by_email[address] for address in email_addresses if address in self.by_email]
+        )
+
+    def find_hashes(self, md5s):
+        with self._lock:
+            self.hash_lookups.append(list(md5s))
+        by_hash = dict(
+            (email_hash(address), found)
+            for address, found in self.by_email.items()
+        )
+        return dict((md5, by_hash[md5]) for md5 in md5s if md5 in by_hash)
+
+
+def offline_email_miner(resolver=None, smtp_server=None):
+    """
+    Build an :class:`EmailMiner` that only talks to local fakes
+
+    :param resolver: The :class:`StubResolver` to look up MX records with. Every domain is
+                     missing by default
+    :param smtp_server: The :class:`FakeSMTPServer` every mail server is reached at
+    :return: An :class:`EmailMiner`
+    """
+    mx_resolver = MXResolver(resolver if resolver else StubResolver())
+    pool = SMTPConnectionPool(
+        port=smtp_server.port if smtp_server else 9, helo_name='beacon.test', timeout=5
+    )
+    prober = SMTPProber(mx_resolver, sender='probe@beacon.test', rate_per_host=10000, pool=pool)
+    return EmailMiner(mx_resolver, prober)
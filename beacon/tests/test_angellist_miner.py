@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from beacon.objects.angellist_miner import AngelListMiner, email_hash
+from beacon.tests.fakes import FakeAngelListServer
+from beacon.util.rate_limit import RateLimiterRegistry
+
+
+JAMES = {
+    'id': 7, 'name': 'James Bond', 'angellist_url': 'https://angel.co/james-bond',
+    'twitter_url': 'https://twitter.com/jamesbond', 'blog_url': None
+}
+
+
+class TestAngelListMiner(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeAngelListServer([('james@mi6.gov.uk', JAMES)]).start()
+        self.directory = tempfile.mkdtemp()
+        self.miner = self.make_miner()
+
+    def tearDown(self):
+        self.miner.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def make_miner(self, **kwargs):
+        kwargs.setdefault('requests_per_hour', 10 ** 9)
+        return AngelListMiner(api_url=self.server.url, timeout=5, **kwargs)
+
+    def test_email_hash(self):
+        """
+        Are email addresses hashed the way AngelList expects?
+        """
+        self.assertEqual(email_hash(' James@MI6.gov.uk '), email_hash('james@mi6.gov.uk'))
+        self.assertEqual(email_hash('james@mi6.gov.uk'), '9eef0b5be813e785bb8939cc3b0b5b54')
+
+    def test_users_by_emails(self):
+        """
+        Are users found by email address, with missing users reported as None and duplicate
+        hashes only requested once?
+        """
+        users = self.miner.users_by_emails(
+            ['james@mi6.gov.uk', 'JAMES@mi6.gov.uk', 'q@mi6.gov.uk']
+        )
+        self.assertDictEqual(users, {
+            'james@mi6.gov.uk': JAMES, 'JAMES@mi6.gov.uk': JAMES, 'q@mi6.gov.uk': None
+        })
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.miner.profile_urls(users['james@mi6.gov.uk']), {
+            'angellist_url': 'https://angel.co/james-bond',
+            'twitter_url': 'https://twitter.com/jamesbond'
+        })
+
+    def test_user_by_slug(self):
+        """
+        Are users found by the slug of their profile URL?
+        """
+        self.assertEqual(self.miner.user_by_slug('James-Bond'), JAMES)
+        self.assertIsNone(self.miner.user_by_slug('m'))
+
+    def test_users_by_slugs(self):
+        """
+        Are many slugs looked up in one go, keyed by the slug as given?
+        """
+        miner = self.make_miner(concurrency=4)
+        try:
+            users = miner.users_by_slugs(['James-Bond', 'james-bond', 'm'])
+        finally:
+            miner.close()
+        self.assertDictEqual(users, {'James-Bond': JAMES, 'james-bond': JAMES, 'm': None})
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_connections_are_reused(self):
+        """
+        Do many lookups share a few kept alive connections?
+        """
+        miner = self.make_miner(concurrency=4)
+        try:
+            miner.users_by_emails(['user{i}@mi6.gov.uk'.format(i=i) for i in range(100)])
+        finally:
+            miner.close()
+        self.assertEqual(len(self.server.requests), 100)
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_answers_are_cached_on_disk(self):
+        """
+        Are users and "no such user" answers reused by a new miner with the same cache file, while
+        failed lookups are retried?
+        """
+        path = os.path.join(self.directory, 'angellist.sqlite')
+        self.server.failures = 1
+        miner = self.make_miner(cache_path=path, concurrency=1)
+        try:
+            self.assertDictEqual(miner.users_by_emails(['james@mi6.gov.uk']), {})
+            self.assertDictEqual(miner.users_by_emails(['james@mi6.gov.uk', 'q@mi6.gov.uk']),
+                                 {'james@mi6.gov.uk': JAMES, 'q@mi6.gov.uk': None})
+        finally:
+            miner.close()
+        self.assertEqual(len(self.server.requests), 3)
+
+        miner = self.make_miner(cache_path=path)
+        try:
+            self.assertEqual(miner.user_by_email('q@mi6.gov.uk'), None)
+            self.assertEqual(miner.user_by_email('james@mi6.gov.uk'), JAMES)
+        finally:
+            miner.close()
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(miner.requests, 0)
+
+    def test_requests_are_rate_limited(self):
+        """
+        Do requests beyond the token bucket's burst wait for tokens to refill?
+        """
+        now = [0.0]
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        miner = self.make_miner(requests_per_hour=3600, concurrency=2,
+                                limits=RateLimiterRegistry(clock=lambda: now[0], sleep=sleep))
+        try:
+            miner.users_by_emails(['{c}@mi6.gov.uk'.format(c=c) for c in 'abc'])
+        finally:
+            miner.close()
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(waits), 1)
+        self.assertAlmostEqual(sum(waits), 1.0)
@@ -0,0 +1,304 @@
+import json
+import unittest
+
+from beacon import find_online_presence_batch
+from beacon.db import destroy_db
+from beacon.db.lookups import LookupStore
+from beacon.objects.batch_locator import BatchLocator, BatchStats
+from beacon.objects.person import Person
+from beacon.objects.result_cache import ResultCache
+from beacon.objects.social_miner import BY_EMAIL_ADDRESS, BY_EMAIL_HASH, SocialMiner
+from beacon.tests.fakes import (
+    FakeSMTPServer,
+    FakeSocialBackend,
+    StubResolver,
+    offline_email_miner
+)
+from beacon.util.hashing import md5_hexdigests
+from beacon.util.budget import LocateBudget
+from beacon.util.names import FullNameIndex, nickname_cache
+
+
+class TestBatchLocator(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeSMTPServer(['j.h.bond@mi6.gov.uk']).start()
+        self.resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')]})
+        self.email_miner = offline_email_miner(self.resolver, self.server)
+        self.locator = BatchLocator(email_miner=self.email_miner)
+
+    def tearDown(self):
+        self.email_miner.prober.close()
+        self.server.stop()
+
+    def test_locate_all_streams_people_in_order(self):
+        """
+        Are people yielded one at a time, in the order they were given?
+        """
+        people = iter([Person('James', 'Bond'), Person('Eve', 'Moneypenny')])
+        located = self.locator.locate_all(people)
+        self.assertEqual(next(located).last_name, 'Bond')
+        self.assertEqual(self.locator.stats.people, 1)
+        self.assertEqual(next(located).last_name, 'Moneypenny')
+        self.assertRaises(StopIteration, next, located)
+
+    def test_nickname_cache_left_alone(self):
+        """
+        Is the process-wide nickname cache only materialized when asked to?
+        """
+        list(self.locator.locate_all([Person('James', 'Bond')], brute_force=False))
+        self.assertFalse(nickname_cache.materialized)
+        self.assertFalse(self.locator.stats.nickname_cache['materialized'])
+
+    def test_locate_all_shares_candidates_between_people(self):
+        """
+        Are full names and usernames generated once per distinct name?
+        """
+        people = [Person('James', 'Bond', 'Herbert') for _ in range(10)]
+        people.append(Person('Eve', 'Moneypenny'))
+        list(self.locator.locate_all(people))
+
+        candidate_cache = self.locator.stats.candidate_cache
+        self.assertEqual(candidate_cache['misses'], 6)
+        self.assertEqual(candidate_cache['hits'], 27)
+        self.assertEqual(self.locator.stats.people, 11)
+
+    def test_locate_all_shares_domain_lookups_between_people(self):
+        """
+        Is each domain's MX lookup done once for the whole batch?
+        """
+        people = [
+            Person('James', 'Bond', domains=['mi6.gov.uk', 'spectre.org']),
+            Person('Eve', 'Moneypenny', domains=['mi6.gov.uk']),
+        ]
+        list(self.locator.locate_all(people))
+        domains = set(['mi6.gov.uk', 'spectre.org'] + self.email_miner.email_services)
+        self.assertEqual(len(self.resolver.queries), len(domains))
+        self.assertSetEqual(set(self.resolver.queries), domains)
+
+    def test_locate_all_discovers_email_addresses(self):
+        """
+        Are email addresses at the person's domains verified with their mail server?
+        """
+        people = [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk'])]
+        located = list(self.locator.locate_all(people))
+        self.assertListEqual(located[0].email_addresses, ['J.H.Bond@mi6.gov.uk'])
+
+    def test_locate_all_verifies_shared_candidates_once(self):
+        """
+        Is an email address generated by several people verified once and given to each of them?
+        """
+        people = [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk']) for _ in range(3)]
+        located = list(self.locator.locate_all(people))
+        for person in located:
+            self.assertListEqual(person.email_addresses, ['J.H.Bond@mi6.gov.uk'])
+
+        self.assertEqual(self.server.commands.count('RCPT TO:<J.H.Bond@mi6.gov.uk>'), 1)
+        candidate_index = self.locator.stats.candidate_index
+        self.assertEqual(candidate_index['postings'], 3 * candidate_index['candidates'])
+
+    def test_locate_all_yields_people_once_done(self):
+        """
+        Is someone yielded as soon as they're done, while others in the same chunk still have
+        candidates to verify?
+        """
+        domains = ['mi6.gov.uk', 'universal-exports.com', 'transworld.com']
+        for domain in domains[1:]:
+            self.resolver.records[domain] = [(10, '127.0.0.1')]
+        locator = BatchLocator(email_miner=self.email_miner, max_email_addresses=1,
+                               email_batch_size=10)
+        located = locator.locate_all([
+            Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk']),
+            Person('Eve', 'Moneypenny', 'Jane', domains=domains)
+        ])
+        self.assertListEqual(next(located).email_addresses, ['J.H.Bond@mi6.gov.uk'])
+        rcpts = self.server.count('RCPT')
+        self.assertListEqual(next(located).email_addresses, [])
+        self.assertGreater(self.server.count('RCPT'), rcpts)
+
+    def test_locate_all_within_budget(self):
+        """
+        Is everyone's budget respected when their candidates are verified together?
+        """
+        locator = BatchLocator(email_miner=self.email_miner,
+                               budget=LocateBudget(max_smtp_probes=5))
+        people = [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk']),
+                  Person('Eve', 'Moneypenny', domains=['mi6.gov.uk'])]
+        list(locator.locate_all(people))
+        self.assertEqual(locator.stats.candidate_index['candidates'], 10)
+        self.assertListEqual(people[0].email_addresses, [])
+
+    def test_locate_all_reports_budget(self):
+        """
+        Are only the candidates that were verified paid for, and is each person's report
+        yielded with them?
+        """
+        locator = BatchLocator(email_miner=self.email_miner, max_email_addresses=1,
+                               email_batch_size=10, budget=LocateBudget(max_smtp_probes=1000))
+        (person, report), = locator.locate_all(
+            [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk'])], reports=True
+        )
+        self.assertListEqual(person.email_addresses, ['J.H.Bond@mi6.gov.uk'])
+        self.assertEqual(report['used']['smtp_probes'],
+                         locator.stats.candidate_index['candidates'])
+        self.assertDictEqual(report['skipped'], {})
+        self.assertEqual(report['stop_reason'], 'found enough email addresses')
+
+        results = [json.loads(result) for result in find_online_presence_batch(
+            [{'first_name': 'eve', 'last_name': 'moneypenny'}], email_miner=self.email_miner,
+            budget=LocateBudget(max_smtp_probes=5), budget_report=True
+        )]
+        self.assertEqual(results[0]['budget']['used']['smtp_probes'], 5)
+        self.assertListEqual(results[0]['budget']['exhausted'], ['smtp_probes'])
+
+    def test_locate_all_within_dns_budget_and_deadline(self):
+        """
+        Are domains nobody can afford to look up skipped, and is nobody brute forced once their
+        deadline has passed?
+        """
+        people = [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk'])]
+        list(BatchLocator(email_miner=self.email_miner,
+                          budget=LocateBudget(max_dns_queries=0)).locate_all(people))
+        self.assertListEqual(self.resolver.queries, [])
+
+        list(BatchLocator(email_miner=self.email_miner,
+                          budget=LocateBudget(deadline=0)).locate_all(people))
+        self.assertEqual(self.server.count('RCPT'), 0)
+
+    def test_locate_all_looks_up_shared_email_hashes_once(self):
+        """
+        Is an email address found for several people looked up by its hash once, with what's
+        found given to each of them?
+        """
+        backend = FakeSocialBackend(by_email={'j.h.bond@mi6.gov.uk': {
+            'usernames': ['james-bond'], 'email_address': [],
+            'accounts': {'angellist': ['james-bond']},
+            'profile_urls': {'angellist_url': 'https://angel.co/james-bond'}
+        }}, name='angellist', capabilities=[BY_EMAIL_ADDRESS, BY_EMAIL_HASH])
+        locator = BatchLocator(email_miner=self.email_miner, social_miner=SocialMiner([backend]))
+        people = [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk']),
+                  Person('JAMES', 'BOND', 'HERBERT', domains=['mi6.gov.uk'])]
+        located = list(locator.locate_all(people, reports=True))
+
+        self.assertListEqual(backend.hash_lookups, [md5_hexdigests(['j.h.bond@mi6.gov.uk'])])
+        self.assertListEqual(backend.lookups, [])
+        for person, report in located:
+            self.assertEqual(person.angellist_url, 'https://angel.co/james-bond')
+            self.assertEqual(report['used']['social_calls'], 1)
+
+    def test_locate_all_gives_email_hash_profiles_to_who_they_name(self):
+        """
+        Is a profile found by the hash of an email address several people have only given to the
+        people its name matches?
+        """
+        backend = FakeSocialBackend(by_email={'j.h.bond@mi6.gov.uk': {
+            'usernames': [], 'email_address': [], 'accounts': {},
+            'profile_urls': {'angellist_url': 'https://angel.co/james-bond'},
+            'full_names': ['James Bond']
+        }}, name='angellist', capabilities=[BY_EMAIL_ADDRESS, BY_EMAIL_HASH])
+        locator = BatchLocator(email_miner=self.email_miner, social_miner=SocialMiner([backend]))
+        james, jane = list(locator.locate_all([
+            Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk']),
+            Person('Jane', 'Bond', 'Hope', domains=['mi6.gov.uk'])
+        ]))
+
+        self.assertListEqual(jane.email_addresses, james.email_addresses)
+        self.assertEqual(james.angellist_url, 'https://angel.co/james-bond')
+        self.assertFalse(jane.angellist_url)
+
+    def test_locate_all_reuses_cached_results(self):
+        """
+        Are people located by an earlier run restored from the cache instead of located again?
+        """
+        self.addCleanup(destroy_db)
+        result_cache = ResultCache(LookupStore())
+        list(BatchLocator(email_miner=self.email_miner, result_cache=result_cache).locate_all(
+            [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk'])]
+        ))
+        rcpts = self.server.count('RCPT')
+
+        locator = BatchLocator(email_miner=self.email_miner, result_cache=result_cache)
+        located = list(locator.locate_all([
+            Person('james', 'bond', 'herbert', domains=['MI6.gov.uk']),
+            Person('Eve', 'Moneypenny', domains=['mi6.gov.uk'])
+        ]))
+        self.assertListEqual(located[0].email_addresses, ['J.H.Bond@mi6.gov.uk'])
+        self.assertEqual(locator.stats.reused, 1)
+        self.assertEqual(locator.stats.people, 2)
+        self.assertNotIn('RCPT TO:<J.H.Bond@mi6.gov.uk>', self.server.commands[rcpts:])
+
+    def test_locate_all_doesnt_cache_people_out_of_time(self):
+        """
+        Are people whose deadline passed located again rather than restored from the cache?
+        """
+        self.addCleanup(destroy_db)
+        result_cache = ResultCache(LookupStore())
+        list(BatchLocator(email_miner=self.email_miner, result_cache=result_cache,
+                          budget=LocateBudget(deadline=0)).locate_all(
+            [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk'])]
+        ))
+        self.assertFalse(result_cache.get(Person('James', 'Bond', 'Herbert',
+                                                 domains=['mi6.gov.uk'])))
+
+    def test_locate_all_incrementally(self):
+        """
+        Are candidates probed for someone in an earlier batch skipped once they gain a domain?
+        """
+        self.addCleanup(destroy_db)
+        store = LookupStore()
+        list(BatchLocator(email_miner=self.email_miner, checkpoint_store=store).locate_all(
+            [Person('James', 'Bond', 'Herbert', domains=['mi6.gov.uk'])]
+        ))
+        probed = len(self.server.commands)
+
+        self.resolver.records['universal-exports.com'] = [(10, '127.0.0.1')]
+        located = list(BatchLocator(email_miner=self.email_miner, checkpoint_store=store)
+                       .locate_all([Person('James', 'Bond', 'Herbert',
+                                           domains=['mi6.gov.uk', 'universal-exports.com'])]))
+        self.assertListEqual(located[0].email_addresses, ['J.H.Bond@mi6.gov.uk'])
+        rcpts = [command for command in self.server.commands[probed:]
+                 if command.startswith('RCPT')]
+        self.assertTrue(rcpts)
+        self.assertFalse([command for command in rcpts if 'mi6.gov.uk' in command])
+
+    def test_match_full_name_against_everyone_located(self):
+        """
+        Is a name matched against every person located with a single lookup?
+        """
+        locator = BatchLocator(email_miner=self.email_miner, full_name_index=FullNameIndex())
+        james, jimmy, eve = Person('James', 'Bond'), Person('Jimmy', 'Bond'), \
+            Person('Eve', 'Moneypenny')
+        list(locator.locate_all([james, jimmy, eve], brute_force=False))
+
+        matches = locator.match_full_name('bond, JIMMY')
+        self.assertListEqual([person for person, _ in matches], [jimmy, james])
+        self.assertListEqual(locator.match_full_name('Moneypenny Eve'), [(eve, 1.0)])
+        self.assertListEqual(locator.match_full_name('Ernst Blofeld'), [])
+
+    def test_match_full_name_requires_index(self):
+        self.assertRaises(ValueError, self.locator.match_full_name, 'James Bond')
+
+    def test_find_online_presence_batch(self):
+        """
+        Is a JSON result produced for every person record and are the batch stats reported?
+        """
+        stats = BatchStats()
+        people = [
+            {'first_name': 'james', 'last_name': 'bond', 'twitter_url': 'https://twitter.com/jb'},
+            {'first_name': 'eve', 'last_name': 'moneypenny'},
+        ]
+        results = [
+            json.loads(result)
+            for result in find_online_presence_batch(people, stats, self.email_miner)
+        ]
+        self.assertListEqual([result['first_name'] for result in results], ['James', 'Eve'])
+        self.assertDictEqual(results[0]['usernames'], {'twitter': ['jb']})
+        self.assertEqual(stats.people, 2)
+        self.assertGreater(stats.people_per_second(), 0)
+
+    def test_find_online_presence_batch_rejects_miners_with_workers(self):
+        """
+        Are miners that workers can't share refused rather than silently dropped?
+        """
+        people = [{'first_name': 'james', 'last_name': 'bond'}]
+        results = find_online_presence_batch(people, email_miner=self.email_miner, workers=2)
+        self.assertRaises(ValueError, list, results)
@@ -0,0 +1,33 @@
+import unittest
+
+from beacon.util.budget import DNS_QUERIES, SMTP_PROBES, SOCIAL_CALLS, LocateBudget
+
+
+class TestLocateBudget(unittest.TestCase):
+    def setUp(self):
+        self.budget = LocateBudget(max_dns_queries=2, max_smtp_probes=10)
+
+    def test_spend_within_limits(self):
+        """
+        Is spending granted up to the limit, with the rest recorded as skipped?
+        """
+        spending = self.budget.start()
+        self.assertEqual(spending.spend(SMTP_PROBES, 6), 6)
+        self.assertEqual(spending.spend(SMTP_PROBES, 6), 4)
+        self.assertEqual(spending.spend(SMTP_PROBES), 0)
+        self.assertEqual(spending.spend(SOCIAL_CALLS, 100), 100)
+        spending.skip(DNS_QUERIES, 3)
+        self.assertDictEqual(spending.report(), {
+            'used': {SMTP_PROBES: 10, SOCIAL_CALLS: 100},
+            'skipped': {SMTP_PROBES: 3, DNS_QUERIES: 3},
+            'limits': {DNS_QUERIES: 2, SMTP_PROBES: 10},
+            'exhausted': [SMTP_PROBES],
+            'not_enumerated': []
+        })
+
+    def test_each_person_has_their_own_spending(self):
+        first, second = self.budget.start(), self.budget.start()
+        first.spend(DNS_QUERIES, 2)
+        self.assertEqual(first.remaining(DNS_QUERIES), 0)
+        self.assertEqual(second.remaining(DNS_QUERIES), 2)
+        self.assertIsNone(second.remaining(SOCIAL_CALLS))
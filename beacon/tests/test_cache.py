@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from beacon.util.cache import ExpiringCache, LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(maxsize=2)
+
+    def test_get_counts_hits_and_misses(self):
+        """
+        Are hits and misses counted?
+        """
+        self.cache.put('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('b', 2), 2)
+        self.assertDictEqual(self.cache.info(), {'hits': 1, 'misses': 2, 'size': 1, 'maxsize': 2})
+
+    def test_put_evicts_least_recently_used(self):
+        """
+        Is the least recently used entry evicted once the cache is full?
+        """
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertIn('c', self.cache)
+
+    def test_unbounded(self):
+        """
+        Does a cache without a ``maxsize`` keep everything?
+        """
+        cache = LRUCache(maxsize=None)
+        for i in range(1000):
+            cache.put(i, i)
+        self.assertEqual(len(cache), 1000)
+
+
+class TestExpiringCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_cache(self, path=None):
+        return ExpiringCache(path, clock=lambda: self.now)
+
+    def test_values_expire(self):
+        """
+        Are values, including None, returned until their TTL passes?
+        """
+        cache = self.make_cache()
+        cache.put('found', {'name': 'James Bond'}, 60)
+        cache.put('missing', None, 10)
+        self.assertDictEqual(cache.get_many(['found', 'missing', 'other']),
+                             {'found': {'name': 'James Bond'}, 'missing': None})
+
+        self.now += 30
+        self.assertEqual(cache.get('missing', 'expired'), 'expired')
+        self.assertEqual(cache.get('found'), {'name': 'James Bond'})
+
+    def test_values_are_persisted(self):
+        """
+        Do values outlive the cache when it has a path, until they expire?
+        """
+        self.make_cache(self.path).put_many({'a': 1, 'b': None}, 60)
+
+        cache = self.make_cache(self.path)
+        self.assertDictEqual(cache.get_many(['a', 'b']), {'a': 1, 'b': None})
+        self.now += 61
+        self.assertDictEqual(self.make_cache(self.path).get_many(['a', 'b']), {})
+
+        cache.put('a', 2, 60)
+        cache.clear()
+        self.assertDictEqual(self.make_cache(self.path).get_many(['a']), {})
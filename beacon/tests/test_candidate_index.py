@@ -0,0 +1,34 @@
+import unittest
+
+from beacon.util.candidate_index import CandidateIndex
+
+
+class TestCandidateIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CandidateIndex()
+        self.index.add(0, [('jsmith', 0.5), ('john.smith', 1.0)])
+        self.index.add(1, [('jsmith', 0.9), ('jane.smith', 0.8)])
+
+    def test_candidates_stored_once_with_every_owner(self):
+        """
+        Is each distinct candidate stored once, with everyone who generated it?
+        """
+        self.assertEqual(len(self.index), 3)
+        self.assertListEqual(list(self.index.owners('jsmith')), [0, 1])
+        self.assertListEqual(list(self.index.owners('jane.smith')), [1])
+        self.assertListEqual(list(self.index.owners('jdoe')), [])
+        self.assertIn('john.smith', self.index)
+        self.assertDictEqual(self.index.info(), {'candidates': 3, 'postings': 4})
+
+    def test_ranked_by_highest_likelihood(self):
+        """
+        Are candidates ranked by the highest likelihood anyone generated them with?
+        """
+        self.assertListEqual(self.index.ranked(), ['john.smith', 'jsmith', 'jane.smith'])
+
+    def test_candidates_in_order_added(self):
+        """
+        Are distinct candidates listed in the order they were first added?
+        """
+        self.assertListEqual(self.index.candidates(), ['jsmith', 'john.smith', 'jane.smith'])
+        self.assertListEqual(self.index.candidates(2), ['jane.smith'])
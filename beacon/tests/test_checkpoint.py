@@ -0,0 +1,35 @@
+import json
+import unittest
+
+from beacon.objects.checkpoint import LocatorCheckpoint
+
+
+class TestLocatorCheckpoint(unittest.TestCase):
+    def test_record(self):
+        """
+        Are verified email addresses remembered, and found ones kept once in order?
+        """
+        checkpoint = LocatorCheckpoint()
+        checkpoint.record(['jb@mi6.gov.uk', 'james@mi6.gov.uk'], ['james@mi6.gov.uk'])
+        checkpoint.record(['james@mi6.gov.uk', 'jb@gmail.com'], ['james@mi6.gov.uk',
+                                                                  'jb@gmail.com'])
+        self.assertTrue(checkpoint.is_tried('jb@mi6.gov.uk'))
+        self.assertFalse(checkpoint.is_tried('jb@universal-exports.com'))
+        self.assertListEqual(checkpoint.found, ['james@mi6.gov.uk', 'jb@gmail.com'])
+        self.assertListEqual(checkpoint.found_at(['MI6.gov.uk']), ['james@mi6.gov.uk'])
+
+    def test_to_dict_round_trip(self):
+        """
+        Is a checkpoint serialized compactly and read back as it was?
+        """
+        checkpoint = LocatorCheckpoint(['jb@mi6.gov.uk', 'james@mi6.gov.uk', 'jb@gmail.com'],
+                                       ['jb@gmail.com'])
+        serialized = json.loads(json.dumps(checkpoint.to_dict()))
+        self.assertDictEqual(serialized, {
+            'tried': {'mi6.gov.uk': ['james', 'jb'], 'gmail.com': ['jb']},
+            'found': ['jb@gmail.com']
+        })
+
+        restored = LocatorCheckpoint.from_dict(serialized)
+        self.assertSetEqual(restored.tried, checkpoint.tried)
+        self.assertListEqual(restored.found, checkpoint.found)
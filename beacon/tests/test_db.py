@@ -0,0 +1,183 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import beacon.db
+from beacon.db import (
+    configure,
+    is_persistent,
+    db_connect,
+    destroy_db,
+    ensure_db,
+    create_db,
+    load_nicknames,
+    load_snapshot,
+    open_snapshot,
+    build_snapshot
+)
+from beacon.db.models import Name
+
+
+def dump_names():
+    """
+    :return: A dict of every name in the database to a sorted list of its nicknames
+    """
+    with db_connect() as session:
+        return {
+            name.real_name: sorted(nick.real_name for nick in name.nick_names)
+            for name in session.query(Name)
+        }
+
+
+class TestDB(unittest.TestCase):
+    def tearDown(self):
+        # Leave the database usable for the other test cases
+        destroy_db()
+        ensure_db()
+
+    def test_ensure_db_populates_lazily(self):
+        """
+        Is the database populated the first time it's used after being destroyed?
+        """
+        destroy_db()
+        names = dump_names()
+        self.assertListEqual(names['James'], ['Jamie', 'Jim', 'Jimmie', 'Jimmy'])
+
+    def test_import_beacon_doesnt_load_database(self):
+        """
+        Does importing beacon leave SQLAlchemy and the network libraries until they're needed?
+        """
+        script = (
+            'import sys\n'
+            'import beacon\n'
+            'print(" ".join(m for m in ("sqlalchemy", "requests", "dns") if m in sys.modules))\n'
+        )
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         cwd=os.path.join(os.path.dirname(__file__), '..', '..'))
+        self.assertEqual(output.decode().strip(), '')
+
+    def test_snapshot_matches_nicknames_csv(self):
+        """
+        Does the packaged snapshot hold the same names as assets/nicknames.csv?
+        """
+        destroy_db()
+        create_db()
+        from_csv = dump_names()
+
+        destroy_db()
+        self.assertTrue(load_snapshot())
+        self.assertDictEqual(dump_names(), from_csv)
+
+    def test_build_snapshot(self):
+        """
+        Can a snapshot be written and loaded back?
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'nicknames.sqlite')
+        build_snapshot(path)
+        expected = dump_names()
+
+        destroy_db()
+        self.assertTrue(load_snapshot(path))
+        self.assertDictEqual(dump_names(), expected)
+        os.remove(path)
+
+    def test_load_missing_snapshot(self):
+        """
+        Is a missing snapshot reported instead of raising?
+        """
+        self.assertFalse(load_snapshot(os.path.join(tempfile.mkdtemp(), 'missing.sqlite')))
+
+    def test_open_missing_snapshot(self):
+        """
+        Is a missing snapshot reported, leaving the database as it was?
+        """
+        self.assertFalse(open_snapshot(os.path.join(tempfile.mkdtemp(), 'missing.sqlite')))
+        self.assertListEqual(dump_names()['James'], ['Jamie', 'Jim', 'Jimmie', 'Jimmy'])
+
+    def test_open_snapshot_read_only(self):
+        """
+        Are names served straight from the snapshot, which can't be modified?
+        """
+        nicknames_path = os.path.join(tempfile.mkdtemp(), 'nicknames.csv')
+        with open(nicknames_path, 'w') as nicknames_csv:
+            nicknames_csv.write('ZED,ZEDEKIAH,0.50\n')
+
+        # Opening the snapshot replaces this process' database, so do it in another one
+        script = (
+            'import sqlite3, sys\n'
+            'from sqlalchemy.exc import OperationalError\n'
+            'from beacon.db import open_snapshot, load_nicknames\n'
+            'from beacon.util.names import nickname_cache\n'
+            'assert open_snapshot()\n'
+            'assert "Jim" in nickname_cache.get("James")\n'
+            'try:\n'
+            '    load_nicknames(sys.argv[1])\n'
+            'except OperationalError as error:\n'
+            '    assert isinstance(error.orig, sqlite3.OperationalError)\n'
+            '    print(error.orig)\n'
+        )
+        output = subprocess.check_output([sys.executable, '-c', script, nicknames_path],
+                                         cwd=os.path.join(os.path.dirname(__file__), '..', '..'))
+        self.assertIn('readonly database', output.decode())
+
+    def test_configure_persistent_database(self):
+        """
+        Is a file database populated the first time it's used, in WAL mode, and reused after?
+        """
+        directory = tempfile.mkdtemp()
+        url = 'sqlite:///' + os.path.join(directory, 'beacon.sqlite')
+        expected = dump_names()
+        try:
+            configure(url)
+            self.assertTrue(is_persistent())
+            self.assertDictEqual(dump_names(), expected)
+            with beacon.db.engine.connect() as connection:
+                self.assertEqual(connection.execute('PRAGMA journal_mode').scalar(), 'wal')
+
+            load_nicknames_path = os.path.join(directory, 'nicknames.csv')
+            with open(load_nicknames_path, 'w') as nicknames_csv:
+                nicknames_csv.write('ZED,ZEDEKIAH,0.50\n')
+            load_nicknames(load_nicknames_path)
+
+            # Like a later run: the names loaded before are still there
+            configure(url)
+            self.assertListEqual(dump_names()['Zedekiah'], ['Zed'])
+        finally:
+            configure()
+            self.assertFalse(is_persistent())
+            shutil.rmtree(directory)
+
+    def test_load_nicknames_from_external_dataset(self):
+        """
+        Are an external dataset's names added alongside the existing names without duplicates?
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'nicknames.csv')
+        with open(path, 'w') as nicknames_csv:
+            nicknames_csv.write('JIMBO,JAMES,0.10\nJIM,JAMES,0.80\nZED,ZEDEKIAH,0.50\n\n')
+        load_nicknames(path, batch_size=1)
+
+        names = dump_names()
+        self.assertListEqual(names['James'], ['Jamie', 'Jim', 'Jimbo', 'Jimmie', 'Jimmy'])
+        self.assertListEqual(names['Zedekiah'], ['Zed'])
+        os.remove(path)
+
+    def test_create_db_with_external_dataset(self):
+        """
+        Does ``create_db`` populate the Names table from a different CSV when asked?
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'nicknames.csv')
+        with open(path, 'w') as nicknames_csv:
+            nicknames_csv.writelines(
+                'NICK{i},NAME{n},0.50\n'.format(i=i, n=i % 100) for i in range(5000)
+            )
+        destroy_db()
+        create_db(path)
+
+        names = dump_names()
+        self.assertEqual(len(names), 5100)
+        self.assertEqual(len(names['Name7']), 50)
+        self.assertNotIn('James', names)
+        os.remove(path)
@@ -0,0 +1,168 @@
+import os
+import tempfile
+import time
+import unittest
+
+import dns.exception
+import dns.resolver
+
+from beacon.db import destroy_db
+from beacon.db.lookups import LookupStore
+from beacon.tests.fakes import StubResolver
+from beacon.util.domains import DNSCache, MXResolver
+from beacon.util.rate_limit import RateLimiterRegistry
+
+
+class TestMXResolver(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubResolver({
+            'mi6.gov.uk': [(20, 'backup.mi6.gov.uk'), (10, 'mx.mi6.gov.uk')],
+            'spectre.org': [(10, 'mx.spectre.org')],
+        })
+        self.resolver = MXResolver(self.stub, retry_backoff=0)
+
+    def test_resolve_orders_mail_servers_by_preference(self):
+        """
+        Are mail servers returned most preferred first?
+        """
+        self.assertListEqual(self.resolver.resolve('mi6.gov.uk'),
+                             ['mx.mi6.gov.uk', 'backup.mi6.gov.uk'])
+
+    def test_resolve_missing_domain(self):
+        """
+        Is a domain without MX records resolved to an empty list without retrying?
+        """
+        self.stub.failures['quantum.org'] = [dns.resolver.NoAnswer()]
+        self.assertListEqual(self.resolver.resolve('quantum.org'), [])
+        self.assertListEqual(self.resolver.resolve('fake12312312.com'), [])
+        self.assertListEqual(self.stub.queries, ['quantum.org', 'fake12312312.com'])
+
+    def test_resolve_retries_failed_queries(self):
+        """
+        Are timeouts retried until the retry budget is spent?
+        """
+        self.stub.failures['spectre.org'] = [dns.exception.Timeout(), dns.exception.Timeout()]
+        self.assertListEqual(self.resolver.resolve('spectre.org'), ['mx.spectre.org'])
+        self.assertEqual(len(self.stub.queries), 3)
+
+        self.resolver.cache.clear()
+        self.stub.failures['spectre.org'] = [dns.exception.Timeout()] * 3
+        self.assertIsNone(self.resolver.resolve('spectre.org'))
+
+    def test_resolve_uses_cached_answers(self):
+        """
+        Are answers, including domains without MX records, served from the cache?
+        """
+        for _ in range(3):
+            self.resolver.resolve('mi6.gov.uk')
+            self.resolver.resolve_many(['spectre.org', 'fake12312312.com'])
+        self.assertEqual(len(self.stub.queries), 3)
+
+    def test_resolve_doesnt_cache_failures(self):
+        """
+        Are failed lookups tried again next time?
+        """
+        self.stub.failures['spectre.org'] = [dns.exception.Timeout()] * 3
+        self.assertIsNone(self.resolver.resolve('spectre.org'))
+        self.assertListEqual(self.resolver.resolve('spectre.org'), ['mx.spectre.org'])
+
+    def test_failing_domains_dont_stop_other_lookups(self):
+        """
+        Do healthy domains still resolve after other domains' lookups keep failing?
+        """
+        limits = RateLimiterRegistry(rate=10000, failure_threshold=2)
+        resolver = MXResolver(self.stub, retry_backoff=0, limits=limits)
+        self.stub.failures['broken.com'] = [dns.exception.Timeout()] * 3
+        self.stub.failures['servfail.com'] = [dns.resolver.NoNameservers()] * 3
+        self.assertDictEqual(resolver.resolve_many(['broken.com', 'servfail.com']),
+                             {'broken.com': None, 'servfail.com': None})
+
+        self.assertDictEqual(resolver.resolve_many(['spectre.org']),
+                             {'spectre.org': ['mx.spectre.org']})
+
+    def test_resolve_many_concurrently(self):
+        """
+        Are many domains resolved at once instead of one after another?
+        """
+        domains = ['domain{i}.com'.format(i=i) for i in range(20)]
+        stub = StubResolver(dict((domain, [(10, 'mx.' + domain)]) for domain in domains),
+                            delay=0.05)
+        resolver = MXResolver(stub, concurrency=20)
+
+        started = time.time()
+        mail_servers = resolver.resolve_many(domains + domains)
+        self.assertLess(time.time() - started, 0.5)
+        self.assertEqual(len(stub.queries), 20)
+        self.assertListEqual(mail_servers['domain7.com'], ['mx.domain7.com'])
+
+
+class TestDNSCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.path = os.path.join(tempfile.mkdtemp(), 'dns.sqlite')
+
+    def clock(self):
+        return self.now
+
+    def tearDown(self):
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_answers_expire_with_their_ttl(self):
+        """
+        Are answers cached for their TTL, clamped to the cache's limits?
+        """
+        cache = DNSCache(min_ttl=60, max_ttl=600, clock=self.clock)
+        cache.put('mi6.gov.uk', ['mx.mi6.gov.uk'], ttl=120)
+        cache.put('spectre.org', ['mx.spectre.org'], ttl=1)
+        cache.put('quantum.org', ['mx.quantum.org'], ttl=86400)
+
+        self.now += 59
+        self.assertListEqual(cache.get('spectre.org'), ['mx.spectre.org'])
+        self.now += 2
+        self.assertIsNone(cache.get('spectre.org'))
+        self.assertListEqual(cache.get('mi6.gov.uk'), ['mx.mi6.gov.uk'])
+        self.now += 60
+        self.assertIsNone(cache.get('mi6.gov.uk'))
+        self.assertListEqual(cache.get('quantum.org'), ['mx.quantum.org'])
+        self.now += 600
+        self.assertIsNone(cache.get('quantum.org'))
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.misses, 3)
+
+    def test_negative_answers_use_negative_ttl(self):
+        """
+        Are domains without MX records cached for the shorter negative TTL?
+        """
+        cache = DNSCache(negative_ttl=30, clock=self.clock)
+        cache.put('fake12312312.com', [], ttl=3600)
+        self.assertListEqual(cache.get('fake12312312.com'), [])
+        self.now += 31
+        self.assertIsNone(cache.get('fake12312312.com'))
+
+    def test_answers_persist_to_disk(self):
+        """
+        Can another cache using the same file, e.g. in a sibling process, read our answers?
+        """
+        mail_servers = ['mx1.mi6.gov.uk', 'mx2.mi6.gov.uk']
+        DNSCache(self.path, clock=self.clock).put('mi6.gov.uk', mail_servers)
+
+        cache = DNSCache(self.path, clock=self.clock)
+        self.assertListEqual(cache.get('mi6.gov.uk'), mail_servers)
+        self.now += 61
+        self.assertIsNone(DNSCache(self.path, clock=self.clock).get('mi6.gov.uk'))
+
+    def test_answers_persist_to_store(self):
+        """
+        Can a cache using the same database, e.g. in a later run, read our answers?
+        """
+        store = LookupStore(clock=self.clock)
+        self.addCleanup(destroy_db)
+        DNSCache(clock=self.clock, store=store).put('mi6.gov.uk', ['mx.mi6.gov.uk'])
+
+        cache = DNSCache(clock=self.clock, store=store)
+        self.assertIn('mi6.gov.uk', cache)
+        self.assertListEqual(cache.get('mi6.gov.uk'), ['mx.mi6.gov.uk'])
+        self.now += 61
+        self.assertIsNone(DNSCache(clock=self.clock, store=store).get('mi6.gov.uk'))
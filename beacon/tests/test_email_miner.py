@@ -1,6 +1,8 @@
 import unittest
 
 from beacon.objects.email_miner import EmailMiner
+from beacon.tests.fakes import StubResolver
+from beacon.util.domains import MXResolver
 
 
 class TestEmailMiner(unittest.TestCase):
@@ -29,6 +31,55 @@ class TestEmailMiner(unittest.TestCase):
         ])
         self.assertTrue(len(email_addresses) == 0)
 
+    def test_iter_email_addresses_with_usernames_in_priority_order(self):
+        """
+        Are addresses generated lazily, username by username, most popular service first?
+        """
+        email_addresses = self.miner.iter_email_addresses_with_usernames(['jbond', 'james.bond'])
+        self.assertEqual(next(email_addresses), 'jbond@gmail.com')
+        self.assertEqual(next(email_addresses), 'jbond@yahoo.com')
+
+        email_addresses = list(self.miner.iter_email_addresses_with_usernames(
+            ['jbond', 'james.bond'], ['mi6.gov.uk', 'gmail.com']
+        ))
+        self.assertListEqual(email_addresses, [
+            'jbond@mi6.gov.uk', 'jbond@gmail.com', 'james.bond@mi6.gov.uk', 'james.bond@gmail.com'
+        ])
+
+    def test_iter_scored_email_addresses(self):
+        """
+        Are addresses across usernames enumerated most likely first?
+        """
+        email_addresses = list(self.miner.iter_scored_email_addresses(
+            [('jbond', 0.5), ('james.bond', 1.0)], ['mi6.gov.uk', 'gmail.com', 'yahoo.com']
+        ))
+        self.assertListEqual([address for address, likelihood in email_addresses], [
+            'james.bond@mi6.gov.uk', 'james.bond@gmail.com', 'james.bond@yahoo.com',
+            'jbond@mi6.gov.uk', 'jbond@gmail.com', 'jbond@yahoo.com'
+        ])
+        self.assertAlmostEqual(email_addresses[4][1], 0.45)
+
+    def test_iter_email_address_batches(self):
+        """
+        Are addresses generated in batches of at most ``batch_size``?
+        """
+        batches = list(self.miner.iter_email_address_batches(
+            ('user{i}'.format(i=i) for i in range(10)), batch_size=100
+        ))
+        self.assertListEqual([len(batch) for batch in batches], [100, 100, 60])
+        self.assertEqual(batches[1][0], 'user3@runbox.com')
+
     def test_is_valid_email_domain(self):
         self.assertTrue(self.miner.is_valid_email_domain('gmail.com'))
         self.assertFalse(self.miner.is_valid_email_domain('areallyfakedomainname12312312.com'))
+
+    def test_validate_email_domains(self):
+        """
+        Are domains validated together and cached?
+        """
+        stub = StubResolver({'mi6.gov.uk': [(10, 'mx.mi6.gov.uk')]})
+        miner = EmailMiner(mx_resolver=MXResolver(stub))
+        self.assertDictEqual(miner.validate_email_domains(['mi6.gov.uk', 'spectre.org']),
+                             {'mi6.gov.uk': True, 'spectre.org': False})
+        self.assertTrue(miner.is_valid_email_domain('mi6.gov.uk'))
+        self.assertEqual(len(stub.queries), 2)
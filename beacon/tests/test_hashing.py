@@ -0,0 +1,69 @@
+import hashlib
+import unittest
+
+from beacon.util.hashing import EmailHasher, EmailHashIndex, normalize_email
+
+
+def md5(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+class TestEmailHasher(unittest.TestCase):
+    def test_hash_many(self):
+        """
+        Is each distinct normalized address hashed once?
+        """
+        hashes = EmailHasher().hash_many(['James@MI6.gov.uk ', 'james@mi6.gov.uk', 'q@mi6.gov.uk'])
+        self.assertDictEqual(hashes, {
+            'james@mi6.gov.uk': md5('james@mi6.gov.uk'), 'q@mi6.gov.uk': md5('q@mi6.gov.uk')
+        })
+        self.assertEqual(normalize_email(' Q@MI6.gov.uk'), 'q@mi6.gov.uk')
+
+    def test_hash_many_across_workers(self):
+        """
+        Do worker processes hash chunks the same way as this process?
+        """
+        addresses = ['user{i}@mi6.gov.uk'.format(i=i) for i in range(50)]
+        hasher = EmailHasher(workers=2, chunk_size=10)
+        try:
+            hashes = hasher.hash_many(addresses)
+            self.assertIsNotNone(hasher._pool)
+        finally:
+            hasher.close()
+        self.assertDictEqual(hashes, {address: md5(address) for address in addresses})
+
+
+class TestEmailHashIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = EmailHashIndex()
+        self.index.add(0, [('jsmith@gmail.com', 0.5), ('john.smith@gmail.com', 1.0)])
+        self.index.add(1, [('JSmith@gmail.com', 0.9), ('jane.smith@gmail.com', 0.8)])
+
+    def test_hashes_map_back_to_candidates_and_owners(self):
+        """
+        Is each distinct candidate hashed once and mapped back to everyone who generated it?
+        """
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.hash_pending(), 3)
+        self.assertEqual(self.index.hash_pending(), 0)
+
+        jsmith = md5('jsmith@gmail.com')
+        self.assertIn(jsmith, self.index)
+        self.assertEqual(self.index.email_address(jsmith), 'jsmith@gmail.com')
+        self.assertListEqual(list(self.index.owners(jsmith)), [0, 1])
+        self.assertListEqual(list(self.index.owners(md5('jdoe@gmail.com'))), [])
+        self.assertIsNone(self.index.email_address(md5('jdoe@gmail.com')))
+        self.assertEqual(self.index.md5(' JSmith@gmail.com'), jsmith)
+        self.assertIsNone(self.index.md5('jdoe@gmail.com'))
+
+    def test_ranked(self):
+        """
+        Are candidates added later hashed, and every hash ranked by its highest likelihood?
+        """
+        self.index.hash_pending()
+        self.index.add(2, [('jdoe@gmail.com', 2.0), ('jane.smith@gmail.com', 0.1)])
+        self.assertListEqual(self.index.ranked(), [
+            md5('jdoe@gmail.com'), md5('john.smith@gmail.com'), md5('jsmith@gmail.com'),
+            md5('jane.smith@gmail.com')
+        ])
+        self.assertEqual(len(self.index), 4)
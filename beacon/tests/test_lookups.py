@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from beacon.db import configure, destroy_db, ensure_db
+from beacon.db.lookups import LookupStore
+
+
+class TestLookupStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        configure('sqlite:///' + os.path.join(self.directory, 'beacon.sqlite'))
+        self.now = 1000.0
+        self.store = LookupStore(clock=lambda: self.now)
+
+    def tearDown(self):
+        # Go back to the in-memory database the other test cases use
+        configure()
+        ensure_db()
+        shutil.rmtree(self.directory)
+
+    def test_mx_answers_expire(self):
+        """
+        Are MX answers returned until they expire?
+        """
+        self.store.put_mx('mi6.gov.uk', 1060.0, ['mx1.mi6.gov.uk', 'mx2.mi6.gov.uk'])
+        self.store.put_mx('mi6.gov.uk', 1060.0, ['mx.mi6.gov.uk'])
+        self.store.put_mx('fake12312312.com', 1030.0, [])
+        self.assertTupleEqual(self.store.get_mx('mi6.gov.uk'), (1060.0, ['mx.mi6.gov.uk']))
+        self.assertTupleEqual(self.store.get_mx('fake12312312.com'), (1030.0, []))
+
+        self.now += 31
+        self.assertIsNone(self.store.get_mx('fake12312312.com'))
+        self.store.clear_mx()
+        self.assertIsNone(self.store.get_mx('mi6.gov.uk'))
+
+    def test_probes_skip_inconclusive_results(self):
+        """
+        Are conclusive probe results kept until they expire, and unknown results not kept?
+        """
+        self.store.put_probes({'james@mi6.gov.uk': True, 'q@mi6.gov.uk': False,
+                               'anyone@catchall.org': None}, ttl=60)
+        addresses = ['james@mi6.gov.uk', 'q@mi6.gov.uk', 'anyone@catchall.org', 'm@mi6.gov.uk']
+        self.assertDictEqual(self.store.get_probes(addresses),
+                             {'james@mi6.gov.uk': True, 'q@mi6.gov.uk': False})
+
+        self.now += 61
+        self.store.purge_expired()
+        self.assertDictEqual(self.store.get_probes(addresses), {})
+
+    def test_profiles(self):
+        """
+        Are located profiles kept, and replaced when the person is located again?
+        """
+        self.store.put_profile('james||bond', {'email_addresses': ['jb@mi6.gov.uk']})
+        self.now += 10
+        self.store.put_profile('james||bond', {'email_addresses': ['007@mi6.gov.uk']})
+        self.assertTupleEqual(self.store.get_profile('james||bond'),
+                              (1010.0, {'email_addresses': ['007@mi6.gov.uk']}))
+        self.assertIsNone(self.store.get_profile('eve||moneypenny'))
+
+    def test_lookups_outlive_the_engine(self):
+        """
+        Does a store on a reconfigured engine, e.g. in a later run, see earlier lookups?
+        """
+        path = os.path.join(self.directory, 'beacon.sqlite')
+        self.store.put_mx('mi6.gov.uk', 1060.0, ['mx.mi6.gov.uk'])
+        configure('sqlite:///' + path)
+        self.assertTupleEqual(self.store.get_mx('mi6.gov.uk'), (1060.0, ['mx.mi6.gov.uk']))
+        destroy_db()
@@ -1,10 +1,19 @@
+import os
+import tempfile
 import unittest
 
 # from beacon.db import create_db, destroy_db
+from beacon.db import load_nicknames, destroy_db, ensure_db
 from beacon.util.names import (
+    NicknameCache,
     retrieve_nicknames_for_name,
     get_fml_name_variations,
     get_fl_name_variations,
+    expand_username_templates,
+    normalize_full_name,
+    FullNameIndex,
+    strip_accents,
+    USERNAME_SEPARATORS,
 )
 
 
@@ -39,6 +48,59 @@ class TestNameUtils(unittest.TestCase):
         generated_names = retrieve_nicknames_for_name('abcdefg')
         self.assertListEqual(generated_names, [])
 
+    def test_nickname_cache_hits_database_once_per_name(self):
+        """
+        Are repeated lookups of the same name served from the cache?
+        """
+        cache = NicknameCache()
+        for _ in range(3):
+            self.assertListEqual(sorted(cache.get('James')), ['Jamie', 'Jim', 'Jimmie', 'Jimmy'])
+            self.assertTupleEqual(cache.get('abcdefg'), ())
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 4)
+
+    def test_nickname_cache_evicts_least_recently_used(self):
+        """
+        Does a bounded cache only keep the most recently used names?
+        """
+        cache = NicknameCache(maxsize=2)
+        for name in ['James', 'Robert', 'William', 'James']:
+            cache.get(name)
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(cache.info()['size'], 2)
+
+    def test_materialized_nickname_cache(self):
+        """
+        Does a materialized cache answer every lookup without going back to the database?
+        """
+        cache = NicknameCache()
+        cache.materialize()
+        self.assertListEqual(sorted(cache.get('James')), ['Jamie', 'Jim', 'Jimmie', 'Jimmy'])
+        self.assertTupleEqual(cache.get('abcdefg'), ())
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 2)
+
+    def test_nickname_cache_invalidated_when_names_change(self):
+        """
+        Are new nicknames visible through the cache after the Names table changes?
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'nicknames.csv')
+        with open(path, 'w') as nicknames_csv:
+            nicknames_csv.write('JIMBO,JAMES,0.10\n')
+
+        cache, materialized_cache = NicknameCache(), NicknameCache()
+        materialized_cache.materialize()
+        self.assertNotIn('Jimbo', cache.get('James'))
+        self.assertNotIn('Jimbo', materialized_cache.get('James'))
+        try:
+            load_nicknames(path)
+            self.assertIn('Jimbo', cache.get('James'))
+            self.assertIn('Jimbo', materialized_cache.get('James'))
+        finally:
+            destroy_db()
+            ensure_db()
+            os.remove(path)
+
     def test_get_fml_username_variations(self):
         """
         Are all of the first, middle, and last name variations generated, including initials?
@@ -69,3 +131,52 @@ class TestNameUtils(unittest.TestCase):
         ]
         expected_usernames.sort()
         self.assertListEqual(generated_usernames, expected_usernames)
+
+    def test_expand_username_templates_matches_name_variations(self):
+        """
+        Do the templates generate every variation joined with every combination of separators,
+        counting the initials in each?
+        """
+        for first, middle, last in [('James', 'Herbert', 'Bond'), ('James', None, 'Bond'),
+                                    ('J', 'Herbert', 'Bond')]:
+            expected = {}
+            variations = get_fl_name_variations(first, last, True) + \
+                get_fl_name_variations(last, first, True)
+            if middle:
+                variations += get_fml_name_variations(first, middle, last, True) + \
+                    get_fml_name_variations(last, first, middle, True) + \
+                    get_fml_name_variations(middle, last, first, True)
+            for variation in variations:
+                initials = len([part for part in variation if len(part) == 1])
+                for s1 in USERNAME_SEPARATORS:
+                    for s2 in USERNAME_SEPARATORS:
+                        username = s1.join(variation) if len(variation) == 2 else \
+                            variation[0] + s1 + variation[1] + s2 + variation[2]
+                        expected[username] = min(initials, expected.get(username, initials))
+
+            generated = {}
+            for initials, usernames in expand_username_templates(first, middle, last):
+                for username in usernames:
+                    generated[username] = min(initials, generated.get(username, initials))
+            self.assertDictEqual(generated, expected)
+
+    def test_strip_accents(self):
+        self.assertEqual(strip_accents('Jos\u00e9 Nu\u00f1ez'), 'Jose Nunez')
+
+    def test_normalize_full_name(self):
+        self.assertEqual(normalize_full_name('  Bond,\tJAMES  H. '), 'bond james h')
+        self.assertEqual(normalize_full_name("Se\u00e1n O'Conn_or"), 'sean o conn or')
+        self.assertNotEqual(normalize_full_name('James Bond'), normalize_full_name('Bond James'))
+
+    def test_full_name_index_matches_many_owners(self):
+        """
+        Is a name matched to everyone it might belong to, most likely first?
+        """
+        index = FullNameIndex()
+        index.add('james', {'James Bond': 1.0, 'Jim Bond': 0.4})
+        index.add('jim', {'Jim Bond': 1.0, 'Bond, Jim': 1.0})
+        self.assertListEqual(index.match('jim  bond'), [('jim', 1.0), ('james', 0.4)])
+        self.assertDictEqual(index.match_many(['James Bond', 'Bond Jim', 'Eve']), {
+            'James Bond': [('james', 1.0)], 'Bond Jim': [('jim', 1.0)], 'Eve': []
+        })
+        self.assertEqual(len(index), 3)
@@ -0,0 +1,62 @@
+import unittest
+
+from beacon.objects.batch_locator import BatchLocator
+from beacon.objects.parallel_batch_locator import ParallelBatchLocator
+from beacon.objects.person import Person
+from beacon.tests.fakes import FakeSocialBackend
+from beacon.util.budget import LocateBudget
+
+NAMES = [('James', 'Bond', 'Herbert'), ('Eve', 'Moneypenny', ''), ('Miles', 'Messervy', ''),
+         ('Felix', 'Leiter', ''), ('Bill', 'Tanner', ''), ('Mary', 'Goodnight', '')]
+
+
+def people():
+    # No domains, so nothing is looked up over the network
+    return [Person(first, last, middle) for first, last, middle in NAMES]
+
+
+class TestParallelBatchLocator(unittest.TestCase):
+    def test_locate_all_keeps_input_order(self):
+        """
+        Are people located by several workers yielded in the order they were given?
+        """
+        locator = ParallelBatchLocator(workers=2, chunk_size=1)
+        located = list(locator.locate_all(iter(people())))
+
+        self.assertListEqual([person.last_name for person in located],
+                             [last for _, last, _ in NAMES])
+        self.assertEqual(locator.stats.people, len(NAMES))
+
+    def test_locate_all_matches_batch_locator(self):
+        """
+        Do workers locate people the same way as locating them in this process?
+        """
+        budget = LocateBudget(max_smtp_probes=0)
+        expected = list(BatchLocator(budget=budget).locate_all(people()))
+        located = list(ParallelBatchLocator(workers=2, chunk_size=4,
+                                            budget=budget).locate_all(people()))
+
+        self.assertListEqual([person.to_dict() for person in located],
+                             [person.to_dict() for person in expected])
+
+    def test_locate_all_searches_social_backends(self):
+        """
+        Do workers build their own social backends from the settings they're given?
+        """
+        twitter = (FakeSocialBackend, {'accounts': {'007': {
+            'usernames': ['007'], 'email_address': [], 'accounts': {'angellist': ['james-bond']},
+            'profile_urls': {'angellist_url': 'https://angel.co/james-bond'}
+        }}, 'name': 'twitter', 'capabilities': ['usernames']})
+        person = Person('James', 'Bond', twitter_url='https://twitter.com/007')
+        locator = ParallelBatchLocator(workers=1, social_backends=[twitter],
+                                       budget=LocateBudget(max_smtp_probes=0))
+        located, = locator.locate_all([person])
+
+        self.assertEqual(located.angellist_url, 'https://angel.co/james-bond')
+        self.assertListEqual(located.usernames['angellist'], ['james-bond'])
+
+    def test_locate_all_without_people(self):
+        """
+        Is an empty batch located without starting any work?
+        """
+        self.assertListEqual(list(ParallelBatchLocator(workers=2).locate_all([])), [])
@@ -1,3 +1,4 @@
+import json
 import unittest
 
 from beacon.objects.person import Person
@@ -15,3 +16,36 @@ class TestPersonMethods(unittest.TestCase):
         self.person = Person('James', 'Bond', 'Herbert')
         self.assertTrue(self.person.has_middle_name())
 
+
+    def test_to_dict(self):
+        """
+        Is everything known about a `Person` serialized?
+        """
+        self.person.email_addresses.append('james.bond@mi6.gov.uk')
+        self.assertDictEqual(self.person.to_dict(), {
+            'first_name': 'James', 'last_name': 'Bond', 'middle_name': '', 'domains': [],
+            'linkedin_url': '', 'angellist_url': '', 'usernames': {'twitter': ['jamesbond']},
+            'email_addresses': ['james.bond@mi6.gov.uk'],
+            'twitter_url': 'https://twitter.com/jamesbond'
+        })
+        self.assertDictEqual(json.loads(self.person.to_json()), self.person.to_dict())
+
+    def test_names_and_domains_are_shared(self):
+        """
+        Do people with the same names and domains share a single copy of each?
+        """
+        other = Person(''.join(['ja', 'mes']), 'bond', domains=[''.join(['mi6', '.gov.uk'])])
+        self.person = Person('James', 'Bond', domains=['mi6.gov.uk'])
+        self.assertIs(other.first_name, self.person.first_name)
+        self.assertIs(other.last_name, self.person.last_name)
+        self.assertIs(other.domains[0], self.person.domains[0])
+        self.assertFalse(hasattr(self.person, '__dict__'))
+
+    def test_key(self):
+        """
+        Do people with the same names, domains, and URLs share a key regardless of case?
+        """
+        james = Person('James', 'Bond', domains=['mi6.gov.uk', 'Universal-Exports.com'])
+        same = Person('JAMES', 'bond', domains=['universal-exports.com', 'MI6.gov.uk'])
+        self.assertEqual(james.key(), same.key())
+        self.assertNotEqual(james.key(), Person('James', 'Bond', 'Herbert').key())
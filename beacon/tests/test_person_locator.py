@@ -1,7 +1,18 @@
+import time
 import unittest
 
+from beacon.objects.checkpoint import LocatorCheckpoint
 from beacon.objects.person import Person
 from beacon.objects.person_locator import PersonLocator
+from beacon.objects.social_miner import SocialMiner
+from beacon.tests.fakes import (
+    FakeSMTPServer,
+    FakeSocialBackend,
+    StubResolver,
+    offline_email_miner
+)
+from beacon.util.budget import LocateBudget
+from beacon.util.cache import LRUCache
 
 
 class TestPersonLocator(unittest.TestCase):
@@ -54,6 +65,17 @@ class TestPersonLocator(unittest.TestCase):
         for name in expected_names_subset:
             self.assertTrue(name in self.locator.full_name_representations)
 
+    def test_matches_full_name_ignores_case_accents_and_punctuation(self):
+        """
+        Are names from services matched regardless of case, accents, punctuation, and spacing?
+        """
+        self.assertEqual(self.locator.matches_full_name('JAMES  BOND'), 1.0)
+        self.assertEqual(self.locator.matches_full_name('Bond, James H.'), 0.8)
+        self.assertEqual(self.locator.matches_full_name('J\u00e1mes Herbert-Bond'), 1.0)
+        self.assertGreater(self.locator.matches_full_name('bond jimmy'), 0.0)
+        self.assertEqual(self.locator.matches_full_name('James Bond Herbert'), 0.0)
+        self.assertEqual(self.locator.matches_full_name('Ernst Blofeld'), 0.0)
+
     def test_determine_probable_usernames_for_full_name(self):
         """
         Are a subset of username combinations and a subset of name/symbol combinations generated?
@@ -77,3 +99,311 @@ class TestPersonLocator(unittest.TestCase):
             self.assertFalse(username.startswith('_'))
             self.assertFalse(username.endswith('.'))
             self.assertFalse(username.endswith('_'))
+
+    def test_discover_email_addresses_stops_early(self):
+        """
+        Does email discovery try the most likely candidates first and stop probing once the
+        person has enough email addresses?
+        """
+        server = FakeSMTPServer(['jbond@mi6.gov.uk', 'james.bond@mi6.gov.uk']).start()
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')], 'gmail.com': [(10, '::1')]})
+        email_miner = offline_email_miner(resolver, server)
+        try:
+            locator = PersonLocator(Person('James', 'Bond', domains=['mi6.gov.uk']), email_miner,
+                                    max_email_addresses=1, email_batch_size=1)
+            locator._enumerate_email_domains()
+            usernames = {'JBond': 0.5, 'J_Bond': 0.4, 'James.Bond': 1.0}
+            self.assertListEqual(locator._discover_email_addresses_with_usernames(usernames),
+                                 ['James.Bond@mi6.gov.uk'])
+            # The first candidate and the catch-all check. Nothing after the first batch
+            self.assertEqual(server.count('RCPT'), 2)
+        finally:
+            email_miner.prober.close()
+            server.stop()
+
+    def test_locate_stops_once_enough_email_addresses_are_found(self):
+        """
+        Does brute forcing stop, and say why, once the person has enough email addresses?
+        """
+        server = FakeSMTPServer(['james.bond@mi6.gov.uk']).start()
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')]})
+        email_miner = offline_email_miner(resolver, server)
+        try:
+            locator = PersonLocator(Person('James', 'Bond', domains=['mi6.gov.uk']), email_miner,
+                                    max_email_addresses=1, email_batch_size=2)
+            self.assertEqual(locator.locate(brute_force=True), locator.found_enough)
+            self.assertListEqual(locator.person.email_addresses, ['James.Bond@mi6.gov.uk'])
+            self.assertTrue(locator.scheduler.skipped)
+        finally:
+            email_miner.prober.close()
+            server.stop()
+
+    def test_locate_with_social_services(self):
+        """
+        Are the person's usernames looked up on the social services, the accounts and profiles
+        found recorded, and email addresses discovered with the new usernames looked up too?
+        """
+        server = FakeSMTPServer(['jbond@mi6.gov.uk']).start()
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')]})
+        email_miner = offline_email_miner(resolver, server)
+        twitter = FakeSocialBackend({'007': {
+            'usernames': ['jbond'], 'email_address': [], 'accounts': {'twitter': ['jbond']},
+            'profile_urls': {'twitter_url': 'https://twitter.com/jbond'}
+        }}, name='twitter', capabilities=['usernames'])
+        angellist = FakeSocialBackend(by_email={'jbond@mi6.gov.uk': {
+            'usernames': ['james-bond'], 'email_address': [],
+            'accounts': {'angellist': ['james-bond']},
+            'profile_urls': {'angellist_url': 'https://angel.co/james-bond',
+                             'github_url': 'https://github.com/007'}
+        }}, name='angellist', capabilities=['email_addresses'])
+        try:
+            person = Person('James', 'Bond', domains=['mi6.gov.uk'],
+                            twitter_url='https://twitter.com/007')
+            locator = PersonLocator(person, email_miner, budget=LocateBudget(max_social_calls=3),
+                                    social_miner=SocialMiner([twitter, angellist]))
+            locator.locate()
+        finally:
+            email_miner.prober.close()
+            server.stop()
+
+        self.assertListEqual(person.email_addresses, ['jbond@mi6.gov.uk'])
+        self.assertDictEqual(person.usernames, {
+            'twitter': ['007', 'jbond'], 'angellist': ['james-bond']
+        })
+        self.assertEqual(person.twitter_url, 'https://twitter.com/007')
+        self.assertEqual(person.angellist_url, 'https://angel.co/james-bond')
+        self.assertListEqual(twitter.lookups, [(['007'], [])])
+        self.assertListEqual(angellist.lookups, [([], ['jbond@mi6.gov.uk'])])
+        self.assertEqual(locator.budget_report()['used']['social_calls'], 2)
+
+    def test_follow_new_email_addresses_ignores_someone_else(self):
+        """
+        Are profiles found by an email address ignored when they go by someone else's name?
+        """
+        angellist = FakeSocialBackend(by_email={
+            'jbond@gmail.com': {
+                'usernames': [], 'email_address': [], 'accounts': {},
+                'profile_urls': {'angellist_url': 'https://angel.co/jennifer-bond'},
+                'full_names': ['Jennifer Bond']
+            },
+            'james.bond@gmail.com': {
+                'usernames': [], 'email_address': [], 'accounts': {},
+                'profile_urls': {'angellist_url': 'https://angel.co/james-bond'},
+                'full_names': ['Bond, Jimmy']
+            }
+        }, name='angellist', capabilities=['email_addresses'])
+        person = Person('James', 'Bond')
+        locator = PersonLocator(person, offline_email_miner(),
+                                social_miner=SocialMiner([angellist]))
+        locator.follow_new_email_addresses(['jbond@gmail.com'])
+        self.assertFalse(person.angellist_url)
+        locator.follow_new_email_addresses(['james.bond@gmail.com'])
+        self.assertEqual(person.angellist_url, 'https://angel.co/james-bond')
+
+    def test_locate_within_budget(self):
+        """
+        Are the most likely candidates verified until the budget runs out, and is the rest
+        reported as skipped?
+        """
+        server = FakeSMTPServer(['bondjames@mi6.gov.uk', 'james.bond@mi6.gov.uk']).start()
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')]})
+        email_miner = offline_email_miner(resolver, server)
+        try:
+            budget = LocateBudget(max_smtp_probes=3, max_social_calls=0)
+            backend = FakeSocialBackend()
+            person = Person('James', 'Bond', domains=['mi6.gov.uk'],
+                            twitter_url='https://twitter.com/007')
+            locator = PersonLocator(person, email_miner, email_batch_size=2, budget=budget,
+                                    social_miner=SocialMiner([backend]))
+            locator.locate(brute_force=True)
+            self.assertListEqual(locator.person.email_addresses, ['BondJames@mi6.gov.uk'])
+            self.assertListEqual(backend.lookups, [])
+
+            report = locator.budget_report()
+            self.assertEqual(report['used']['smtp_probes'], 3)
+            self.assertEqual(report['skipped']['smtp_probes'], 1)
+            self.assertListEqual(report['not_enumerated'], ['smtp_probes'])
+            self.assertEqual(report['skipped']['social_calls'], 2)
+            self.assertListEqual(report['exhausted'], ['smtp_probes', 'social_calls'])
+            self.assertEqual(report['stop_reason'], 'finished')
+        finally:
+            email_miner.prober.close()
+            server.stop()
+
+    def test_locate_incrementally(self):
+        """
+        Once a person gains a domain, are only candidates at the new domain probed, while the
+        email addresses found before are kept?
+        """
+        server = FakeSMTPServer(['james.bond@mi6.gov.uk', 'jbond@universal-exports.com']).start()
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')],
+                                 'universal-exports.com': [(10, '127.0.0.1')]})
+        email_miner = offline_email_miner(resolver, server)
+        try:
+            checkpoint = LocatorCheckpoint()
+            PersonLocator(Person('James', 'Bond', domains=['mi6.gov.uk']), email_miner,
+                          checkpoint=checkpoint).locate(brute_force=True)
+            probed = len(server.commands)
+            self.assertListEqual(checkpoint.found, ['James.Bond@mi6.gov.uk'])
+
+            person = Person('James', 'Bond', domains=['mi6.gov.uk', 'universal-exports.com'])
+            PersonLocator(person, email_miner, checkpoint=checkpoint).locate(brute_force=True)
+            self.assertListEqual(person.email_addresses,
+                                 ['James.Bond@mi6.gov.uk', 'JBond@universal-exports.com'])
+            rcpts = [command for command in server.commands[probed:] if command.startswith('RCPT')]
+            self.assertTrue(rcpts)
+            self.assertFalse([command for command in rcpts if 'mi6.gov.uk' in command])
+        finally:
+            email_miner.prober.close()
+            server.stop()
+
+    def test_locate_incrementally_retries_unverified_candidates(self):
+        """
+        Are candidates whose mail server couldn't be reached left out of the checkpoint, so
+        they're probed again next time?
+        """
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')]})
+        email_miner = offline_email_miner(resolver)
+        try:
+            checkpoint = LocatorCheckpoint()
+            PersonLocator(Person('James', 'Bond', domains=['mi6.gov.uk']), email_miner,
+                          checkpoint=checkpoint).locate(brute_force=True)
+            self.assertIn('James.Bond@gmail.com', checkpoint.tried)
+            self.assertFalse([address for address in checkpoint.tried
+                              if address.endswith('@mi6.gov.uk')])
+        finally:
+            email_miner.prober.close()
+
+    def test_locate_only_resolves_domains_within_smtp_budget(self):
+        """
+        Are only the domains of candidates the SMTP probe budget affords looked up?
+        """
+        server = FakeSMTPServer(['james.bond@mi6.gov.uk']).start()
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')]})
+        email_miner = offline_email_miner(resolver, server)
+        try:
+            locator = PersonLocator(Person('James', 'Bond', domains=['mi6.gov.uk']), email_miner,
+                                    email_batch_size=30, budget=LocateBudget(max_smtp_probes=1))
+            locator.locate(brute_force=True)
+            self.assertListEqual(resolver.queries, ['mi6.gov.uk'])
+
+            report = locator.budget_report()
+            self.assertEqual(report['used']['dns_queries'], 1)
+            self.assertEqual(report['used']['smtp_probes'], 1)
+            self.assertEqual(report['skipped']['smtp_probes'], 29)
+        finally:
+            email_miner.prober.close()
+            server.stop()
+
+    def test_locate_without_dns_budget(self):
+        """
+        Are domains left unresolved when there's no budget to look them up?
+        """
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')]})
+        email_miner = offline_email_miner(resolver)
+        locator = PersonLocator(Person('James', 'Bond', domains=['mi6.gov.uk']), email_miner,
+                                budget=LocateBudget(max_dns_queries=0))
+        locator.locate(brute_force=True)
+        self.assertListEqual(resolver.queries, [])
+        self.assertListEqual(locator.email_domains, [])
+        self.assertEqual(locator.budget_report()['used']['smtp_probes'], 0)
+
+    def test_locate_ignores_tasks_abandoned_at_deadline(self):
+        """
+        Is what a task still running at the deadline finds afterwards kept off the person?
+        """
+        twitter = FakeSocialBackend({'007': {
+            'usernames': ['jbond'], 'email_address': ['jbond@mi6.gov.uk'],
+            'accounts': {'twitter': ['jbond']},
+            'profile_urls': {'twitter_url': 'https://twitter.com/jbond'}
+        }}, name='twitter', capabilities=['usernames'], delay=0.2)
+        person = Person('James', 'Bond', twitter_url='https://twitter.com/007')
+        locator = PersonLocator(person, offline_email_miner(), deadline=0.05,
+                                social_miner=SocialMiner([twitter]))
+        self.assertEqual(locator.locate(), 'deadline exceeded')
+        time.sleep(0.3)
+        self.assertListEqual(twitter.lookups, [(['007'], [])])
+        self.assertDictEqual(person.usernames, {'twitter': ['007']})
+        self.assertListEqual(person.email_addresses, [])
+
+    def test_locate_stops_waiting_for_domains_at_deadline(self):
+        """
+        Are email addresses left unverified when the domains are still being looked up at the
+        deadline?
+        """
+        twitter = FakeSocialBackend({'007': {
+            'usernames': ['jbond'], 'email_address': [], 'accounts': {'twitter': ['jbond']},
+            'profile_urls': {}
+        }}, name='twitter', capabilities=['usernames'])
+        server = FakeSMTPServer(['jbond@mi6.gov.uk']).start()
+        resolver = StubResolver({'mi6.gov.uk': [(10, '127.0.0.1')]}, delay=0.1)
+        email_miner = offline_email_miner(resolver, server)
+        try:
+            person = Person('James', 'Bond', twitter_url='https://twitter.com/007',
+                            domains=['mi6.gov.uk'])
+            locator = PersonLocator(person, email_miner, deadline=0.05,
+                                    social_miner=SocialMiner([twitter]))
+            self.assertEqual(locator.locate(), 'deadline exceeded')
+            time.sleep(0.5)
+            self.assertEqual(server.count('RCPT'), 0)
+            self.assertListEqual(person.email_addresses, [])
+        finally:
+            email_miner.prober.close()
+            server.stop()
+
+    def test_scored_candidates(self):
+        """
+        Are nicknames and abbreviations scored as less likely than the person's own name?
+        """
+        self.locator._enumerate_probable_usernames()
+        self.assertEqual(self.locator.scored_full_names['James Bond'], 1.0)
+        self.assertEqual(self.locator.scored_full_names['Jamie Bond'], 0.6)
+        self.assertAlmostEqual(self.locator.scored_full_names['James H Bond'], 0.8)
+        self.assertEqual(self.locator.scored_usernames['James.Bond'], 1.0)
+        self.assertAlmostEqual(self.locator.scored_usernames['J.Bond'], 0.8)
+        self.assertAlmostEqual(self.locator.scored_usernames['Jim_Bond'], 0.2)
+
+    def test_shared_candidates_are_not_copied(self):
+        """
+        Do people with the same name share their candidates until one of them needs to change?
+        """
+        candidate_cache = LRUCache()
+        james = PersonLocator(Person('James', 'Bond'), candidate_cache=candidate_cache)
+        twin = PersonLocator(Person('James', 'Bond'), candidate_cache=candidate_cache)
+        james._enumerate_probable_usernames()
+        twin._enumerate_probable_usernames()
+        self.assertIs(james.scored_full_names, twin.scored_full_names)
+        self.assertIs(james.scored_usernames, twin.scored_usernames)
+
+        twin.person.usernames['twitter'] = ['James.Bond']
+        self.assertNotIn('James.Bond', twin.untried_usernames())
+        self.assertNotIn('James.Bond', twin.probable_usernames)
+        self.assertIn('James.Bond', james.probable_usernames)
+
+    def test_ranked_candidates_within_budget(self):
+        """
+        Are candidates ranked most likely first and limited by likelihood and count?
+        """
+        locator = PersonLocator(Person('James', 'Bond'), min_likelihood=0.5, max_candidates=4)
+        locator._enumerate_probable_usernames()
+        self.assertListEqual(list(locator.iter_ranked_full_names()), [
+            ('Bond James', 1.0), ('Bond, James', 1.0), ('James Bond', 1.0), ('Bond Jamie', 0.6)
+        ])
+
+        usernames = list(locator.iter_ranked_usernames())
+        self.assertListEqual([username for username, likelihood in usernames[:3]],
+                             ['Bond.James', 'BondJames', 'Bond_James'])
+        self.assertEqual(len(usernames), 4)
+
+        locator.max_candidates = None
+        usernames = list(locator.iter_ranked_usernames())
+        self.assertTrue(all(likelihood >= 0.5 for username, likelihood in usernames))
+        self.assertIn('JamieBond', dict(usernames))
+        self.assertNotIn('JimBond', dict(usernames))
+
+        # Domains are each 0.9 times as likely as the one before them
+        email_addresses = dict(locator.iter_ranked_email_addresses([('jbond', 1.0)]))
+        self.assertListEqual(sorted(email_addresses, key=email_addresses.get, reverse=True), [
+            'jbond@gmail.com', 'jbond@yahoo.com', 'jbond@outlook.com', 'jbond@hotmail.com',
+            'jbond@icloud.com', 'jbond@aol.com', 'jbond@me.com'
+        ])
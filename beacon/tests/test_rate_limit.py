@@ -0,0 +1,180 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from beacon.util.rate_limit import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RateLimiterRegistry, SharedTokenBucket, TokenBucket
+)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.bucket = TokenBucket(10, capacity=5, clock=self.clock, sleep=self.sleep)
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def test_try_acquire(self):
+        """
+        Can a full bucket be spent at once and does it refill at its rate?
+        """
+        self.assertEqual(self.bucket.try_acquire(5), 0)
+        self.assertAlmostEqual(self.bucket.try_acquire(1), 0.1)
+        self.now += 0.25
+        self.assertEqual(self.bucket.try_acquire(2), 0)
+        self.assertAlmostEqual(self.bucket.try_acquire(1), 0.05)
+
+    def test_acquire_waits_for_tokens(self):
+        """
+        Does acquiring more tokens than are available wait for them, a bucketful at a time?
+        """
+        self.assertEqual(self.bucket.acquire(5), 0)
+        self.assertAlmostEqual(self.bucket.acquire(12), 1.2)
+        self.assertAlmostEqual(self.now, 1.2)
+
+    def test_acquire_async(self):
+        """
+        Do async tasks share a bucket, each waiting for tokens without blocking the others?
+        """
+        bucket = TokenBucket(100, capacity=1)
+
+        async def acquire_all():
+            return await asyncio.gather(*[bucket.acquire_async() for task in range(4)])
+
+        waits = asyncio.run(acquire_all())
+        self.assertEqual(waits[0], 0)
+        self.assertGreater(sum(waits), 0.02)
+
+
+class TestSharedTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'limits.sqlite')
+        self.now = 100.0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_bucket(self, key='smtp:mx.example.com'):
+        return SharedTokenBucket(self.path, key, 10, capacity=5, clock=lambda: self.now)
+
+    def test_buckets_share_tokens(self):
+        """
+        Do buckets with the same file and key draw from the same tokens, and others not?
+        """
+        first, second = self.make_bucket(), self.make_bucket()
+        self.assertEqual(first.try_acquire(3), 0)
+        self.assertEqual(second.try_acquire(2), 0)
+        self.assertAlmostEqual(first.try_acquire(1), 0.1)
+        self.assertEqual(self.make_bucket('smtp:mx.other.com').try_acquire(5), 0)
+
+        self.now += 0.3
+        self.assertEqual(second.try_acquire(3), 0)
+        self.assertAlmostEqual(first.try_acquire(1), 0.1)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30,
+                                      clock=lambda: self.now)
+
+    def test_opens_after_failures_in_a_row(self):
+        """
+        Does the circuit only open after enough failures in a row?
+        """
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_trial_call(self):
+        """
+        Is a single trial call allowed once the circuit has been open a while, closing it if it
+        succeeds and opening it again if it fails?
+        """
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+
+class TestRateLimiterRegistry(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.registry = RateLimiterRegistry(
+            rate=1, limits={'https': (5, 10), 'smtp:mx.example.com': (2, 2)},
+            failure_threshold=2, clock=lambda: self.now, sleep=self.sleep
+        )
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def test_limits(self):
+        """
+        Do destinations get the limits for their full name, then their kind, then the default?
+        """
+        self.assertEqual(self.registry.limiter('smtp:mx.example.com').rate, 2)
+        self.assertEqual(self.registry.limiter('smtp:mx.other.com').rate, 20)
+        self.assertEqual(self.registry.limiter('https:api.twitter.com').rate, 5)
+        self.assertEqual(self.registry.limiter('dns').rate, 1)
+        self.assertIs(self.registry.limiter('dns'), self.registry.limiter('dns'))
+        self.assertIsNone(RateLimiterRegistry(limits={'smtp': None}).limiter('smtp:mx.a.com'))
+
+    def test_set_default(self):
+        """
+        Do defaults set by clients apply only to destinations without limits of their own?
+        """
+        self.registry.set_default('https:api.angel.co', 0.5, 1)
+        self.registry.set_default('smtp:mx.example.com', 100)
+        self.assertEqual(self.registry.limiter('https:api.angel.co').rate, 0.5)
+        self.assertEqual(self.registry.limiter('smtp:mx.example.com').rate, 2)
+
+    def test_acquire(self):
+        """
+        Are calls paced per destination and refused while a destination's circuit is open?
+        """
+        self.assertTrue(self.registry.acquire('smtp:mx.example.com', 2))
+        self.assertTrue(self.registry.acquire('smtp:mx.example.com'))
+        self.assertAlmostEqual(self.now, 0.5)
+
+        self.registry.record('smtp:mx.example.com', False)
+        self.registry.record('smtp:mx.example.com', False)
+        self.assertFalse(self.registry.acquire('smtp:mx.example.com'))
+        self.assertFalse(asyncio.run(self.registry.acquire_async('smtp:mx.example.com')))
+        self.assertTrue(self.registry.acquire('smtp:mx.other.com'))
+        self.assertEqual(self.registry.info(), {
+            'smtp:mx.example.com': OPEN, 'smtp:mx.other.com': CLOSED
+        })
+
+    def test_acquire_without_breakers(self):
+        """
+        Are circuits never opened without a failure threshold?
+        """
+        registry = RateLimiterRegistry(failure_threshold=None)
+        for attempt in range(10):
+            registry.record('dns', False)
+        self.assertTrue(registry.acquire('dns'))
+        self.assertEqual(registry.info(), {})
@@ -0,0 +1,100 @@
+import io
+import json
+import unittest
+
+from beacon import stream_online_presence
+from beacon.tests.fakes import offline_email_miner
+from beacon.util.records import guess_record_format, read_person_records
+
+
+class TestRecords(unittest.TestCase):
+    def test_read_jsonl_person_records(self):
+        """
+        Are JSONL records read lazily, skipping blank lines and unknown fields?
+        """
+        stream = io.StringIO(
+            '{"first_name": "James", "last_name": "Bond", "domains": ["mi6.gov.uk"]}\n'
+            '\n'
+            '{"first_name": "Eve", "last_name": "Moneypenny", "age": 30, "middle_name": ""}\n'
+        )
+        records = read_person_records(stream, 'jsonl')
+        self.assertDictEqual(next(records), {
+            'first_name': 'James', 'last_name': 'Bond', 'domains': ['mi6.gov.uk']
+        })
+        self.assertDictEqual(next(records), {'first_name': 'Eve', 'last_name': 'Moneypenny'})
+        self.assertRaises(StopIteration, next, records)
+
+    def test_read_csv_person_records(self):
+        """
+        Are CSV records read with their domains split into a list?
+        """
+        stream = io.StringIO(
+            'first_name,last_name,domains,twitter_url\n'
+            'James,Bond,mi6.gov.uk;007.com,https://twitter.com/jb\n'
+            'Eve,Moneypenny,,\n'
+        )
+        self.assertListEqual(list(read_person_records(stream, 'csv')), [
+            {'first_name': 'James', 'last_name': 'Bond', 'domains': ['mi6.gov.uk', '007.com'],
+             'twitter_url': 'https://twitter.com/jb'},
+            {'first_name': 'Eve', 'last_name': 'Moneypenny'}
+        ])
+
+    def test_read_invalid_person_records(self):
+        """
+        Are records that aren't JSON objects or are missing a name skipped and reported, while
+        the rest are still read?
+        """
+        stream = io.StringIO(
+            '{"first_name": "Solo"}\n'
+            'not json\n'
+            '["James", "Bond"]\n'
+            '{"first_name": "James", "last_name": 7}\n'
+            '{"first_name": "James", "last_name": "Bond"}\n'
+        )
+        invalid = []
+        records = list(read_person_records(stream, 'jsonl',
+                                           lambda number, error: invalid.append(number)))
+        self.assertListEqual(records, [{'first_name': 'James', 'last_name': 'Bond'}])
+        self.assertListEqual(invalid, [1, 2, 3, 4])
+
+    def test_read_unknown_format(self):
+        """
+        Is an unknown format rejected?
+        """
+        self.assertRaises(ValueError, list, read_person_records(io.StringIO(''), 'xml'))
+
+    def test_guess_record_format(self):
+        """
+        Are CSV files recognized by their extension?
+        """
+        self.assertEqual(guess_record_format('people.CSV'), 'csv')
+        self.assertEqual(guess_record_format('people.jsonl'), 'jsonl')
+        self.assertEqual(guess_record_format('-'), 'jsonl')
+
+    def test_stream_online_presence(self):
+        """
+        Is one line of JSON written per person?
+        """
+        output = io.StringIO()
+        stats = stream_online_presence(
+            io.StringIO('first_name,last_name\njames,bond\neve,moneypenny\n'), output, 'csv',
+            offline_email_miner()
+        )
+        lines = output.getvalue().splitlines()
+        self.assertListEqual([json.loads(line)['last_name'] for line in lines],
+                             ['Bond', 'Moneypenny'])
+        self.assertEqual(stats.people, 2)
+
+    def test_stream_online_presence_skips_invalid_records(self):
+        """
+        Does a record without a last name get skipped without stopping the stream?
+        """
+        output = io.StringIO()
+        stats = stream_online_presence(
+            io.StringIO('{"first_name": "james", "last_name": "bond"}\n{"first_name": "Solo"}\n'),
+            output, 'jsonl', offline_email_miner()
+        )
+        lines = output.getvalue().splitlines()
+        self.assertListEqual([json.loads(line)['last_name'] for line in lines], ['Bond'])
+        self.assertEqual(stats.people, 1)
+        self.assertEqual(stats.invalid, 1)
@@ -0,0 +1,107 @@
+import threading
+import unittest
+
+from beacon.db import destroy_db
+from beacon.db.lookups import LookupStore
+from beacon.objects.person import Person
+from beacon.objects.result_cache import ResultCache
+from beacon.util.scheduler import DEADLINE_EXCEEDED, FINISHED
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.located = []
+        self.cache = ResultCache(LookupStore(clock=self.clock), max_age=60, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.close()
+        destroy_db()
+
+    def clock(self):
+        return self.now
+
+    def locate(self, person):
+        self.located.append(person.key())
+        person.email_addresses = ['{n}@mi6.gov.uk'.format(n=len(self.located))]
+        return FINISHED
+
+    def test_locate_returns_fresh_results(self):
+        """
+        Is someone located once and then looked up until their result goes stale?
+        """
+        first = self.cache.locate(Person('James', 'Bond', domains=['mi6.gov.uk']), self.locate)
+        self.now += 60
+        again = self.cache.locate(Person('JAMES', 'bond', domains=['MI6.gov.uk']), self.locate)
+        self.assertListEqual(again.email_addresses, first.email_addresses)
+        self.assertEqual(len(self.located), 1)
+
+        self.now += 1
+        stale = self.cache.locate(Person('James', 'Bond', domains=['mi6.gov.uk']), self.locate)
+        self.assertListEqual(stale.email_addresses, ['2@mi6.gov.uk'])
+        self.assertDictEqual(self.cache.info(),
+                             {'hits': 1, 'stale_hits': 0, 'misses': 2, 'refreshes': 0})
+
+    def test_results_cut_short_are_not_kept(self):
+        """
+        Is someone whose locating ran out of time located again next time?
+        """
+        def hurried_locate(person):
+            self.locate(person)
+            return DEADLINE_EXCEEDED
+
+        first = self.cache.locate(Person('James', 'Bond'), hurried_locate)
+        self.assertListEqual(first.email_addresses, ['1@mi6.gov.uk'])
+        self.assertFalse(self.cache.put(first, DEADLINE_EXCEEDED))
+        self.assertFalse(self.cache.get(Person('James', 'Bond')))
+
+        again = self.cache.locate(Person('James', 'Bond'), self.locate)
+        self.assertListEqual(again.email_addresses, ['2@mi6.gov.uk'])
+        self.assertTrue(self.cache.get(Person('James', 'Bond')))
+
+    def test_get_only_fresh_results(self):
+        """
+        Are only fresh results filled in, leaving the person as they were otherwise?
+        """
+        james = Person('James', 'Bond')
+        self.assertFalse(self.cache.get(james))
+        james.email_addresses = ['jb@mi6.gov.uk']
+        self.cache.put(james)
+
+        again = Person('James', 'Bond')
+        self.assertTrue(self.cache.get(again))
+        self.assertListEqual(again.email_addresses, ['jb@mi6.gov.uk'])
+        self.now += 61
+        self.assertFalse(self.cache.get(Person('James', 'Bond')))
+
+    def test_stale_results_refresh_in_background(self):
+        """
+        Are stale results returned straight away while the person is located again once?
+        """
+        cache = ResultCache(LookupStore(clock=self.clock), max_age=60, refresh_stale=True,
+                            max_stale=600, clock=self.clock)
+        self.addCleanup(cache.close)
+        cache.locate(Person('James', 'Bond'), self.locate)
+        self.now += 120
+
+        release = threading.Event()
+
+        def slow_locate(person):
+            release.wait(5)
+            return self.locate(person)
+
+        stale = [cache.locate(Person('James', 'Bond'), slow_locate) for _ in range(3)]
+        self.assertListEqual([person.email_addresses for person in stale], [['1@mi6.gov.uk']] * 3)
+        release.set()
+        cache.wait()
+
+        self.assertEqual(len(self.located), 2)
+        self.assertListEqual(cache.locate(Person('James', 'Bond'), self.locate).email_addresses,
+                             ['2@mi6.gov.uk'])
+        self.assertDictEqual(cache.info(),
+                             {'hits': 1, 'stale_hits': 3, 'misses': 1, 'refreshes': 1})
+
+        # Too stale to return, so the person is located before returning
+        self.now += 661
+        self.assertListEqual(cache.locate(Person('James', 'Bond'), self.locate).email_addresses,
+                             ['3@mi6.gov.uk'])
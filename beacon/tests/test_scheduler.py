@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+
+from beacon.util.scheduler import DEADLINE_EXCEEDED, FINISHED, TaskScheduler
+
+
+class TestTaskScheduler(unittest.TestCase):
+    def test_runs_highest_priority_first(self):
+        """
+        Are tasks run most important first, in the order they were scheduled when tied?
+        """
+        scheduler = TaskScheduler(concurrency=1)
+        ran = []
+        for priority, name in [(0.1, 'guess'), (2.0, 'known'), (0.5, 'likely'), (0.5, 'tied')]:
+            scheduler.schedule(priority, ran.append, name)
+        self.assertEqual(scheduler.run(), FINISHED)
+        self.assertListEqual(ran, ['known', 'likely', 'tied', 'guess'])
+
+    def test_runs_tasks_scheduled_by_tasks(self):
+        """
+        Are tasks scheduled by running tasks run too?
+        """
+        scheduler = TaskScheduler()
+        ran = []
+
+        def discover(depth):
+            ran.append(depth)
+            if depth < 3:
+                scheduler.schedule(1.0, discover, depth + 1)
+
+        scheduler.schedule(1.0, discover, 0)
+        self.assertEqual(scheduler.run(), FINISHED)
+        self.assertListEqual(ran, [0, 1, 2, 3])
+
+    def test_independent_tasks_run_concurrently(self):
+        """
+        Does running independent tasks take as long as the slowest rather than their sum?
+        """
+        scheduler = TaskScheduler(concurrency=4)
+        for _ in range(4):
+            scheduler.schedule(1.0, time.sleep, 0.2)
+        started = time.monotonic()
+        scheduler.run()
+        self.assertLess(time.monotonic() - started, 0.6)
+
+    def test_stop_when(self):
+        """
+        Are tasks skipped once the stop condition is met?
+        """
+        scheduler = TaskScheduler(concurrency=1)
+        ran = []
+        for i in range(5):
+            scheduler.schedule(1.0, ran.append, i)
+        reason = scheduler.run(stop_when=lambda: 'enough' if len(ran) >= 2 else None)
+        self.assertEqual(reason, 'enough')
+        self.assertListEqual(ran, [0, 1])
+        self.assertEqual(len(scheduler.skipped), 3)
+
+        # Nothing more runs once stopped
+        scheduler.schedule(1.0, ran.append, 5)
+        self.assertEqual(scheduler.run(), 'enough')
+        self.assertListEqual(ran, [0, 1])
+
+    def test_deadline(self):
+        """
+        Does the scheduler stop waiting for tasks once the deadline passes?
+        """
+        scheduler = TaskScheduler(concurrency=1, deadline=0.05)
+        release = threading.Event()
+        scheduler.schedule(1.0, release.wait, 5)
+        scheduler.schedule(0.5, time.sleep, 0)
+        started = time.monotonic()
+        self.assertEqual(scheduler.run(), DEADLINE_EXCEEDED)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(len(scheduler.skipped), 1)
+        release.set()
+
+    def test_task_errors_are_raised(self):
+        scheduler = TaskScheduler()
+        scheduler.schedule(1.0, int, 'not a number')
+        self.assertRaises(ValueError, scheduler.run)
@@ -0,0 +1,168 @@
+import unittest
+
+from beacon.db import destroy_db
+from beacon.db.lookups import LookupStore
+from beacon.objects.smtp_prober import SMTPConnectionPool, SMTPProber
+from beacon.tests.fakes import FakeSMTPServer, StubResolver
+from beacon.util.domains import MXResolver
+from beacon.util.rate_limit import OPEN, RateLimiterRegistry
+
+
+class TestSMTPProber(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeSMTPServer(['james@mi6.gov.uk', 'eve@mi6.gov.uk']).start()
+        self.resolver = StubResolver({
+            'mi6.gov.uk': [(10, '127.0.0.1')],
+            'nomx.org': [],
+        })
+        self.prober = self.make_prober(self.server)
+
+    def tearDown(self):
+        self.prober.close()
+        self.server.stop()
+
+    def make_prober(self, server, **kwargs):
+        kwargs.setdefault('rate_per_host', 10000)
+        return SMTPProber(
+            MXResolver(self.resolver), sender='probe@beacon.test',
+            pool=SMTPConnectionPool(port=server.port, helo_name='beacon.test', timeout=5),
+            **kwargs
+        )
+
+    def test_probe(self):
+        """
+        Are existing addresses accepted, missing addresses rejected, and domains without mail
+        servers reported as missing?
+        """
+        results = self.prober.probe([
+            'james@mi6.gov.uk', 'EVE@mi6.gov.uk', 'q@mi6.gov.uk', 'james@nomx.org',
+            'james@fake12312312.com'
+        ])
+        self.assertDictEqual(results, {
+            'james@mi6.gov.uk': True, 'EVE@mi6.gov.uk': True, 'q@mi6.gov.uk': False,
+            'james@nomx.org': False, 'james@fake12312312.com': False
+        })
+
+    def test_probe_pipelines_batches_over_one_connection(self):
+        """
+        Are batches of RCPT TO sent over a single reused connection with RSET between them?
+        """
+        prober = self.make_prober(self.server, batch_size=10, concurrency=1)
+        addresses = ['user{i}@mi6.gov.uk'.format(i=i) for i in range(95)]
+        results = prober.probe(addresses + ['james@mi6.gov.uk'])
+        prober.probe(['eve@mi6.gov.uk'])
+        prober.close()
+
+        self.assertTrue(results['james@mi6.gov.uk'])
+        self.assertEqual(len([result for result in results.values() if result is False]), 95)
+        self.assertEqual(self.server.connections, 1)
+        # One extra RCPT TO checks whether the server is a catch-all
+        self.assertEqual(self.server.count('RCPT'), 98)
+        self.assertEqual(self.server.count('RSET'), 11)
+
+    def test_probe_reuses_stored_results(self):
+        """
+        Are conclusive results kept in the store and reused instead of probing again?
+        """
+        self.addCleanup(destroy_db)
+        prober = self.make_prober(self.server, store=LookupStore())
+        addresses = ['james@mi6.gov.uk', 'q@mi6.gov.uk', 'james@nomx.org']
+        results = prober.probe(addresses)
+        prober.close()
+        rcpts = self.server.count('RCPT')
+
+        prober = self.make_prober(self.server, store=LookupStore())
+        self.assertDictEqual(prober.probe(addresses), results)
+        prober.close()
+        self.assertEqual(self.server.count('RCPT'), rcpts)
+
+    def test_probe_without_pipelining(self):
+        """
+        Are servers that don't pipeline sent one command at a time?
+        """
+        server = FakeSMTPServer(['james@mi6.gov.uk'], pipelining=False).start()
+        prober = self.make_prober(server)
+        try:
+            self.assertDictEqual(prober.probe(['james@mi6.gov.uk', 'q@mi6.gov.uk']), {
+                'james@mi6.gov.uk': True, 'q@mi6.gov.uk': False
+            })
+        finally:
+            prober.close()
+            server.stop()
+
+    def test_probe_catch_all(self):
+        """
+        Are a catch-all's answers reported as unknown?
+        """
+        server = FakeSMTPServer(catch_all=True).start()
+        prober = self.make_prober(server, batch_size=2)
+        try:
+            results = prober.probe(['a@mi6.gov.uk', 'b@mi6.gov.uk', 'c@mi6.gov.uk'])
+            self.assertDictEqual(results, {
+                'a@mi6.gov.uk': None, 'b@mi6.gov.uk': None, 'c@mi6.gov.uk': None
+            })
+        finally:
+            prober.close()
+            server.stop()
+
+    def test_probe_catch_all_after_sender_refused(self):
+        """
+        Is a server that refused our sender checked for being a catch-all again, rather than
+        trusted from then on?
+        """
+        server = FakeSMTPServer(catch_all=True, refuse_sender=True).start()
+        prober = self.make_prober(server)
+        try:
+            self.assertDictEqual(prober.probe(['a@mi6.gov.uk']), {'a@mi6.gov.uk': None})
+            server.refuse_sender = False
+            self.assertDictEqual(prober.probe(['b@mi6.gov.uk']), {'b@mi6.gov.uk': None})
+            # Both batches were pipelined with a random address after them
+            self.assertEqual(server.count('RCPT'), 4)
+            self.assertTrue(prober._catch_all_hosts['127.0.0.1'])
+        finally:
+            prober.close()
+            server.stop()
+
+    def test_probe_catch_all_check_greylisted(self):
+        """
+        Are accepted addresses reported as unknown while the catch-all check is greylisted, and
+        is the check tried again with the next batch?
+        """
+        server = FakeSMTPServer(['a@mi6.gov.uk'],
+                                unknown_reply='450 4.2.0 Greylisted, try again later').start()
+        prober = self.make_prober(server)
+        try:
+            self.assertDictEqual(prober.probe(['a@mi6.gov.uk', 'b@mi6.gov.uk']),
+                                 {'a@mi6.gov.uk': None, 'b@mi6.gov.uk': None})
+            server.unknown_reply = '550 5.1.1 No such user'
+            self.assertDictEqual(prober.probe(['a@mi6.gov.uk', 'b@mi6.gov.uk']),
+                                 {'a@mi6.gov.uk': True, 'b@mi6.gov.uk': False})
+            self.assertEqual(server.count('RCPT'), 6)
+        finally:
+            prober.close()
+            server.stop()
+
+    def test_probe_unreachable_server(self):
+        """
+        Are addresses on servers we can't connect to reported as unknown?
+        """
+        server = FakeSMTPServer()
+        prober = self.make_prober(server)
+        server.server_close()
+        self.assertDictEqual(prober.probe(['james@mi6.gov.uk']), {'james@mi6.gov.uk': None})
+
+    def test_probe_opens_circuit_to_unreachable_server(self):
+        """
+        Once a mail server has failed too often, are its addresses reported as unknown without
+        connecting to it?
+        """
+        server = FakeSMTPServer()
+        limits = RateLimiterRegistry(limits={'smtp': (10000, 10000)}, failure_threshold=1)
+        prober = self.make_prober(server, limits=limits)
+        server.server_close()
+        prober.probe(['james@mi6.gov.uk'])
+        self.assertEqual(limits.info(), {'smtp:127.0.0.1': OPEN})
+
+        self.server.stop()
+        prober.pool = SMTPConnectionPool(port=self.server.port)
+        self.assertDictEqual(prober.probe(['eve@mi6.gov.uk']), {'eve@mi6.gov.uk': None})
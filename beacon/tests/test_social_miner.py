@@ -1,9 +1,124 @@
+import time
 import unittest
 
-from beacon.objects.social_miner import SocialMiner
+from beacon.objects.angellist_miner import AngelListMiner
+from beacon.objects.social_miner import (
+    BY_USERNAME,
+    AngelListBackend,
+    SocialMiner,
+    TwitterBackend,
+    merge_information
+)
+from beacon.objects.twitter_miner import TwitterMiner
+from beacon.tests.fakes import FakeAngelListServer, FakeSocialBackend, FakeTwitterServer
 
 
-class TestEmailMiner(unittest.TestCase):
-    def setUp(self):
-        self.miner = SocialMiner()
+def information(usernames=None, email_addresses=None, profile_urls=None, service='fake',
+                full_names=None):
+    return {
+        'usernames': list(usernames or []), 'email_address': list(email_addresses or []),
+        'accounts': {service: list(usernames)} if usernames else {},
+        'profile_urls': dict(profile_urls or {}), 'full_names': list(full_names or [])
+    }
 
+
+class TestSocialMiner(unittest.TestCase):
+    def test_merge_information(self):
+        """
+        Is everything found merged without duplicates, keeping the first URL for each profile?
+        """
+        merged = merge_information([
+            information(['jamesbond'], ['james@mi6.gov.uk'],
+                        {'twitter_url': 'https://twitter.com/jamesbond'}, 'twitter',
+                        ['James Bond']),
+            information(['jamesbond', 'james-bond'], ['james@mi6.gov.uk'],
+                        {'twitter_url': 'https://twitter.com/007',
+                         'angellist_url': 'https://angel.co/james-bond'}, 'angellist',
+                        ['Jimmy Bond', 'James Bond']),
+        ])
+        self.assertDictEqual(merged, {
+            'usernames': ['jamesbond', 'james-bond'],
+            'email_address': ['james@mi6.gov.uk'],
+            'accounts': {'twitter': ['jamesbond'], 'angellist': ['jamesbond', 'james-bond']},
+            'profile_urls': {'twitter_url': 'https://twitter.com/jamesbond',
+                             'angellist_url': 'https://angel.co/james-bond'},
+            'full_names': ['James Bond', 'Jimmy Bond']
+        })
+
+    def test_plan_batches_requests(self):
+        """
+        Are lookups split into one request per batch of what the backend can look up?
+        """
+        backend = FakeSocialBackend(capabilities=[BY_USERNAME], batch_size=2)
+        self.assertListEqual(backend.plan(['a', 'b', 'c'], ['a@b.com']), [
+            (BY_USERNAME, ['a', 'b']), (BY_USERNAME, ['c'])
+        ])
+        self.assertFalse(backend.can_find([], ['a@b.com']))
+
+    def test_mine_fans_out_concurrently(self):
+        """
+        Are backends that can look up what we're given asked at once, and their findings merged?
+        """
+        slow = FakeSocialBackend({'jamesbond': information(['jamesbond'])}, delay=0.3)
+        also_slow = FakeSocialBackend(
+            {'jamesbond': information(['JamesBond'], service='twitter')},
+            capabilities=[BY_USERNAME], delay=0.3
+        )
+        by_username = FakeSocialBackend(capabilities=[BY_USERNAME])
+        miner = SocialMiner([slow, also_slow, by_username])
+
+        started = time.monotonic()
+        found = miner.mine(['jamesbond'])
+        self.assertLess(time.monotonic() - started, 0.55)
+        self.assertListEqual(found['usernames'], ['jamesbond', 'JamesBond'])
+        self.assertEqual(len(by_username.lookups), 1)
+
+        self.assertEqual(miner.backends_for([], ['james@mi6.gov.uk']), [slow])
+        self.assertEqual(miner.mine([], []), merge_information([]))
+
+    def test_twitter_backend(self):
+        """
+        Are Twitter accounts found by username, with email addresses from their descriptions?
+        """
+        server = FakeTwitterServer([{
+            'screen_name': 'JamesBond', 'name': 'James Bond',
+            'description': 'Write to james.bond@mi6.gov.uk'
+        }]).start()
+        backend = TwitterBackend(TwitterMiner(api_url=server.url, timeout=5))
+        try:
+            found = backend.find(['jamesbond', 'q'])
+        finally:
+            backend.close()
+            server.stop()
+        self.assertDictEqual(found, {
+            'usernames': ['JamesBond'], 'email_address': ['james.bond@mi6.gov.uk'],
+            'accounts': {'twitter': ['JamesBond']},
+            'profile_urls': {'twitter_url': 'https://twitter.com/JamesBond'},
+            'full_names': ['James Bond']
+        })
+        self.assertEqual(backend.batch_size, 100)
+
+    def test_angellist_backend(self):
+        """
+        Are AngelList users found by email address and slug, with the profiles they link to?
+        """
+        server = FakeAngelListServer([('james@mi6.gov.uk', {
+            'name': 'James Bond', 'angellist_url': 'https://angel.co/james-bond',
+            'twitter_url': 'https://twitter.com/JamesBond/',
+            'github_url': 'https://github.com/007'
+        })]).start()
+        backend = AngelListBackend(AngelListMiner(api_url=server.url, timeout=5))
+        try:
+            by_email = backend.find([], ['james@mi6.gov.uk', 'q@mi6.gov.uk'])
+            by_slug = backend.find(['james-bond'])
+        finally:
+            backend.close()
+            server.stop()
+        self.assertDictEqual(by_email, {
+            'usernames': ['james-bond', 'JamesBond'], 'email_address': [],
+            'accounts': {'angellist': ['james-bond'], 'twitter': ['JamesBond']},
+            'profile_urls': {'angellist_url': 'https://angel.co/james-bond',
+                             'twitter_url': 'https://twitter.com/JamesBond/'},
+            'full_names': ['James Bond']
+        })
+        self.assertDictEqual(by_slug, by_email)
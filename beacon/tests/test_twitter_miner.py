@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from beacon.objects.twitter_miner import TwitterMiner
+from beacon.tests.fakes import FakeTwitterServer
+from beacon.util.rate_limit import RateLimiterRegistry
+
+
+JAMES = {'id': 7, 'screen_name': 'JamesBond', 'name': 'James Bond', 'description': '007'}
+EVE = {'id': 8, 'screen_name': 'eve_moneypenny', 'name': 'Eve Moneypenny'}
+
+
+class TestTwitterMiner(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeTwitterServer([JAMES, EVE], bearer_token='token').start()
+        self.directory = tempfile.mkdtemp()
+        self.miner = self.make_miner()
+
+    def tearDown(self):
+        self.miner.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def make_miner(self, **kwargs):
+        kwargs.setdefault('requests_per_window', 10 ** 9)
+        return TwitterMiner('token', api_url=self.server.url, timeout=5, **kwargs)
+
+    def test_users_by_screen_names(self):
+        """
+        Are users found regardless of case, missing users reported as None, and names nobody
+        could have answered without a request?
+        """
+        users = self.miner.users_by_screen_names(['jamesbond', 'EVE_Moneypenny', 'q', 'james.bond'])
+        self.assertDictEqual(users, {
+            'jamesbond': JAMES, 'EVE_Moneypenny': EVE, 'q': None, 'james.bond': None
+        })
+        self.assertEqual(self.server.requests, [{'screen_name': 'eve_moneypenny,jamesbond,q'}])
+        self.assertEqual(self.miner.profile_url(users['jamesbond']),
+                         'https://twitter.com/JamesBond')
+
+    def test_names_are_looked_up_in_batches(self):
+        """
+        Are names split into requests of at most 100 names?
+        """
+        miner = self.make_miner(concurrency=2)
+        names = ['user{i}'.format(i=i) for i in range(250)] + ['JamesBond']
+        try:
+            users = miner.users_by_screen_names(names)
+        finally:
+            miner.close()
+        self.assertEqual(len(users), 251)
+        self.assertEqual(users['JamesBond'], JAMES)
+        self.assertListEqual(
+            sorted(len(request['screen_name'].split(',')) for request in self.server.requests),
+            [51, 100, 100]
+        )
+        self.assertLessEqual(self.server.connections, 2)
+
+    def test_answers_are_cached_on_disk(self):
+        """
+        Are hits and misses reused by a new miner with the same cache file, while failed
+        lookups are retried?
+        """
+        path = os.path.join(self.directory, 'twitter.sqlite')
+        self.server.failures = 1
+        miner = self.make_miner(cache_path=path)
+        try:
+            self.assertIsNone(miner.user_by_screen_name('JamesBond'))
+            self.assertDictEqual(miner.users_by_screen_names(['JamesBond', 'q']),
+                                 {'JamesBond': JAMES, 'q': None})
+        finally:
+            miner.close()
+
+        miner = self.make_miner(cache_path=path)
+        try:
+            self.assertDictEqual(miner.users_by_screen_names(['jamesbond', 'Q']),
+                                 {'jamesbond': JAMES, 'Q': None})
+        finally:
+            miner.close()
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(miner.requests, 0)
+
+    def test_unauthorized_requests_are_not_cached(self):
+        """
+        Are answers to rejected requests left out rather than cached as misses?
+        """
+        miner = TwitterMiner('wrong', api_url=self.server.url, timeout=5)
+        try:
+            self.assertDictEqual(miner.users_by_screen_names(['JamesBond']), {})
+            self.assertDictEqual(miner.cache.get_many(['screen_name:jamesbond']), {})
+        finally:
+            miner.close()
+
+    def test_requests_are_rate_limited_per_window(self):
+        """
+        Do requests beyond a window's allowance wait for the window to refill?
+        """
+        now = [0.0]
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        miner = self.make_miner(requests_per_window=2, window=60, batch_size=1, concurrency=1,
+                                limits=RateLimiterRegistry(clock=lambda: now[0], sleep=sleep))
+        try:
+            miner.users_by_screen_names(['a', 'b', 'c'])
+        finally:
+            miner.close()
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(waits), 1)
+        self.assertAlmostEqual(waits[0], 30.0)
@@ -0,0 +1,115 @@
+import threading
+
+# The kinds of requests a budget limits
+DNS_QUERIES = 'dns_queries'
+SMTP_PROBES = 'smtp_probes'
+SOCIAL_CALLS = 'social_calls'
+
+
+class LocateBudget(object):
+    """
+    Limits on the requests made while locating a single person, so brute forcing has a
+    predictable cost and latency.  The same budget can be given to any number of locators, each
+    of which tracks its own spending with :meth:`start`.
+
+    :param max_dns_queries: The most MX lookups that aren't already cached. None for no limit
+    :param max_smtp_probes: The most candidate email addresses verified. None for no limit
+    :param max_social_calls: The most requests made to the social services. None for no limit
+    :param deadline: Seconds locating may take before no more work is started. None for no limit
+    """
+    def __init__(self, max_dns_queries=None, max_smtp_probes=None, max_social_calls=None,
+                 deadline=None):
+        self.max_dns_queries = max_dns_queries
+        self.max_smtp_probes = max_smtp_probes
+        self.max_social_calls = max_social_calls
+        self.deadline = deadline
+
+    def start(self):
+        """
+        :return: A new :class:`BudgetTracker` for one person's spending
+        """
+        return BudgetTracker({
+            DNS_QUERIES: self.max_dns_queries,
+            SMTP_PROBES: self.max_smtp_probes,
+            SOCIAL_CALLS: self.max_social_calls
+        })
+
+
+class BudgetTracker(object):
+    """
+    Tracks the requests spent against a :class:`LocateBudget`, and those skipped because the
+    budget ran out.
+
+    :param limits: A dict of request kind to the most that may be spent. None for no limit
+    """
+    def __init__(self, limits=None):
+        self.limits = dict(limits) if limits else {}
+        self.used = {}
+        self.skipped = {}
+        self.not_enumerated = set()
+        self._lock = threading.Lock()
+
+    def remaining(self, kind):
+        """
+        :param kind: The kind of request, e.g. :data:`SMTP_PROBES`
+        :return: How many more requests of ``kind`` may be made. None if there's no limit
+        """
+        limit = self.limits.get(kind)
+        return None if limit is None else max(limit - self.used.get(kind, 0), 0)
+
+    def spend(self, kind, amount=1):
+        """
+        Spend up to ``amount`` requests of ``kind``.  Whatever can't be afforded is recorded as
+        skipped.
+
+        :param kind: The kind of request, e.g. :data:`SMTP_PROBES`
+        :param amount: The number of requests wanted
+        :return: The number of requests that may be made, at most ``amount``
+        """
+        with self._lock:
+            remaining = self.remaining(kind)
+            granted = amount if remaining is None else min(amount, remaining)
+            self.used[kind] = self.used.get(kind, 0) + granted
+            if granted < amount:
+                self.skipped[kind] = self.skipped.get(kind, 0) + amount - granted
+            return granted
+
+    def skip(self, kind, amount=1):
+        """
+        Record requests of ``kind`` that were skipped without trying to spend them
+
+        :param kind: The kind of request, e.g. :data:`SMTP_PROBES`
+        :param amount: The number of requests skipped
+        :return: None
+        """
+        if amount:
+            with self._lock:
+                self.skipped[kind] = self.skipped.get(kind, 0) + amount
+
+    def skip_rest(self, kind):
+        """
+        Record that every remaining request of ``kind`` was skipped without generating them, e.g.
+        the rest of the candidates once the budget ran out, since counting them could mean
+        generating thousands
+
+        :param kind: The kind of request, e.g. :data:`SMTP_PROBES`
+        :return: None
+        """
+        with self._lock:
+            self.not_enumerated.add(kind)
+
+    def report(self):
+        """
+        :return: A dict of the requests ``used`` and ``skipped`` of each kind, the ``limits``, the
+                 kinds of request that were ``exhausted``, and those with more skipped than
+                 ``skipped`` counts because the rest were ``not_enumerated``
+        """
+        with self._lock:
+            skipped = set(self.skipped).union(self.not_enumerated)
+            return {
+                'used': dict(self.used),
+                'skipped': dict(self.skipped),
+                'limits': {kind: limit for kind, limit in self.limits.items() if limit is not None},
+                'exhausted': sorted(kind for kind in skipped if self.remaining(kind) == 0),
+                'not_enumerated': sorted(self.not_enumerated)
+            }
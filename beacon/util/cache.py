@@ -0,0 +1,189 @@
+"""
+Caches shared by the miners and locators.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A thread-safe mapping that evicts the least recently used entry once it holds ``maxsize``
+    entries and counts cache hits and misses.
+
+    :param maxsize: The maximum number of entries to hold. ``None`` for an unbounded cache
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Retrieve the value cached for ``key``, marking it as recently used
+
+        :param key: The key to look up
+        :param default: Returned when ``key`` isn't cached
+        :return: The cached value or ``default``
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Cache ``value`` for ``key``, evicting the least recently used entry if we're full
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self.maxsize is not None and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every entry.  Hit and miss counts are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        """
+        :return: A dict of ``hits``, ``misses``, ``size``, and ``maxsize``
+        """
+        return {
+            'hits': self.hits, 'misses': self.misses,
+            'size': len(self._entries), 'maxsize': self.maxsize
+        }
+
+
+class ExpiringCache(object):
+    """
+    A thread-safe cache of JSON serializable values that each expire after their own TTL.
+    ``None`` is cached like any other value, so "not found" answers can be cached too.
+
+    Values are kept in an :class:`LRUCache` of ``maxsize`` entries.  When a ``path`` is given
+    they're also written to a SQLite file, so restarts and sibling worker processes pointed at
+    the same file reuse each other's values until they expire.
+
+    :param path: A SQLite file to persist values to. Values only live in memory if None
+    :param maxsize: The number of values to keep in memory
+    :param clock: A function returning the current time in seconds since the epoch
+    """
+    def __init__(self, path=None, maxsize=10000, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._memory = LRUCache(maxsize)
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        if path:
+            self._open_disk_cache(path)
+
+    def get(self, key, default=None):
+        """
+        :param key: A string key
+        :param default: Returned when nothing unexpired is cached for ``key``
+        :return: The value cached for ``key``, or ``default``
+        """
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys):
+        """
+        :param keys: An iterable of string keys
+        :return: A dict of each of ``keys`` with an unexpired value to its value
+        """
+        now = self.clock()
+        found = {}
+        missing = []
+        for key in keys:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                found[key] = entry[1]
+            else:
+                missing.append(key)
+
+        if missing and self._disk:
+            for key, entry in self._read_disk_cache(missing, now).items():
+                self._memory.put(key, entry)
+                found[key] = entry[1]
+        return found
+
+    def put(self, key, value, ttl):
+        """
+        Cache ``value`` for ``key`` for ``ttl`` seconds
+        """
+        self.put_many({key: value}, ttl)
+
+    def put_many(self, values, ttl):
+        """
+        Cache each value in the dict ``values`` for ``ttl`` seconds
+        """
+        expires = self.clock() + ttl
+        for key, value in values.items():
+            self._memory.put(key, (expires, value))
+        if self._disk and values:
+            with self._disk_lock, self._disk:
+                self._disk.executemany(
+                    'INSERT OR REPLACE INTO Entries (Key, Value, Expires) VALUES (?, ?, ?)',
+                    [(key, json.dumps(value), expires) for key, value in values.items()]
+                )
+
+    def clear(self):
+        """
+        Forget every value, including those persisted to disk
+        """
+        self._memory.clear()
+        if self._disk:
+            with self._disk_lock, self._disk:
+                self._disk.execute('DELETE FROM Entries')
+
+    def info(self):
+        """
+        :return: A dict of ``hits``, ``misses``, ``size``, and ``maxsize`` of the in-memory cache
+        """
+        return self._memory.info()
+
+    def _open_disk_cache(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # WAL lets sibling processes read while another writes
+        self._disk = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._disk_lock, self._disk:
+            self._disk.execute('PRAGMA journal_mode=WAL')
+            self._disk.execute(
+                'CREATE TABLE IF NOT EXISTS Entries ('
+                'Key TEXT PRIMARY KEY, Value TEXT NOT NULL, Expires REAL NOT NULL)'
+            )
+
+    def _read_disk_cache(self, keys, now):
+        entries = {}
+        with self._disk_lock:
+            # Stay well under the most parameters a statement can have
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._disk.execute(
+                    'SELECT Key, Value, Expires FROM Entries WHERE Expires > ? AND Key IN '
+                    '({p})'.format(p=', '.join('?' * len(batch))), [now] + batch
+                )
+                for key, value, expires in rows:
+                    entries[key] = (expires, json.loads(value))
+        return entries
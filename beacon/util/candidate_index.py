@@ -0,0 +1,84 @@
+from array import array
+
+
+class CandidateIndex(object):
+    """
+    An inverted index from candidates, e.g. usernames or email addresses, to the owners that
+    generated them, used to try each candidate once for a whole batch of people and share the
+    result with everyone it belongs to.
+
+    Each distinct candidate is stored once and assigned an integer id.  Owners are integer ids
+    too, e.g. a person's position in a batch, and each candidate's owners are kept in a compact
+    ``array`` so the index stays small with hundreds of thousands of people.
+    """
+    def __init__(self):
+        self._ids = {}
+        self._candidates = []
+        self._owners = []
+        self._likelihoods = array('d')
+
+    def __len__(self):
+        return len(self._candidates)
+
+    def __contains__(self, candidate):
+        return candidate in self._ids
+
+    def add(self, owner, scored_candidates):
+        """
+        Index candidates generated by ``owner``.  Each owner's candidates should be added in one
+        call.
+
+        :param owner: The integer id of whoever generated the candidates
+        :param scored_candidates: An iterable of (candidate, likelihood) tuples
+        :return: None
+        """
+        ids = self._ids
+        candidates = self._candidates
+        all_owners = self._owners
+        likelihoods = self._likelihoods
+        for candidate, likelihood in scored_candidates:
+            candidate_id = ids.get(candidate)
+            if candidate_id is None:
+                ids[candidate] = len(candidates)
+                candidates.append(candidate)
+                all_owners.append(array('I', [owner]))
+                likelihoods.append(likelihood)
+                continue
+
+            owners = all_owners[candidate_id]
+            if owners[-1] != owner:
+                owners.append(owner)
+            if likelihood > likelihoods[candidate_id]:
+                likelihoods[candidate_id] = likelihood
+
+    def candidates(self, start=0):
+        """
+        :param start: How many candidates to skip, e.g. ``len(index)`` before an :meth:`add`
+        :return: A list of the distinct candidates, in the order they were first added
+        """
+        return self._candidates[start:]
+
+    def owners(self, candidate):
+        """
+        :param candidate: A candidate
+        :return: An array of the ids of everyone who generated ``candidate``. Empty if nobody has
+        """
+        candidate_id = self._ids.get(candidate)
+        return self._owners[candidate_id] if candidate_id is not None else array('I')
+
+    def ranked(self):
+        """
+        :return: A list of every distinct candidate, most likely to anyone first
+        """
+        order = sorted(range(len(self._candidates)), key=lambda i: -self._likelihoods[i])
+        return [self._candidates[i] for i in order]
+
+    def info(self):
+        """
+        :return: A dict with the number of distinct ``candidates`` and the number of
+                 ``postings``, i.e. (candidate, owner) pairs, in the index
+        """
+        return {
+            'candidates': len(self._candidates),
+            'postings': sum(len(owners) for owners in self._owners)
+        }
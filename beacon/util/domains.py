@@ -2,3 +2,266 @@
 Miscellaneous web domain functions to determine the who and what about a domain.
 WHOIS -> Owner, has_dns_record() etc
 """
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dns.exception
+import dns.resolver
+
+from beacon.util.cache import LRUCache
+
+
+class DNSCache(object):
+    """
+    A cache of MX lookups that honors the TTL of each answer.
+
+    Domains without MX records (e.g. NXDOMAIN) are cached for ``negative_ttl`` seconds.  When a
+    ``path`` is given, answers are also written to a SQLite database so restarts and sibling
+    worker processes pointed at the same file reuse each other's answers until they expire.
+    Answers can be persisted to the configured database instead by giving a ``store``.
+
+    :param path: A SQLite file to persist answers to. Answers only live in memory if None
+    :param negative_ttl: Seconds to cache domains that have no MX records
+    :param min_ttl: The shortest time to cache an answer, regardless of its TTL
+    :param max_ttl: The longest time to cache an answer, regardless of its TTL
+    :param maxsize: The number of answers to keep in memory
+    :param clock: A function returning the current time in seconds since the epoch
+    :param store: A :class:`beacon.db.lookups.LookupStore` to persist answers to
+    """
+    def __init__(self, path=None, negative_ttl=300, min_ttl=60, max_ttl=86400, maxsize=10000,
+                 clock=time.time, store=None):
+        self.path = path
+        self.store = store
+        self.negative_ttl = negative_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._memory = LRUCache(maxsize)
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        if path:
+            self._open_disk_cache(path)
+
+    def __contains__(self, domain):
+        entry = self._memory.get(domain)
+        if entry is None:
+            entry = self._read_persisted(domain)
+        return entry is not None and entry[0] > self.clock()
+
+    def get(self, domain):
+        """
+        Retrieve the unexpired answer cached for ``domain``
+
+        :param domain: The domain that was looked up
+        :return: A list of mail servers, or None if nothing is cached
+        """
+        entry = self._memory.get(domain)
+        if entry is None:
+            entry = self._read_persisted(domain)
+            if entry is not None:
+                self._memory.put(domain, entry)
+
+        is_hit = entry is not None and entry[0] > self.clock()
+        with self._stats_lock:
+            if is_hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return entry[1] if is_hit else None
+
+    def put(self, domain, mail_servers, ttl=None):
+        """
+        Cache the answer to an MX lookup
+
+        :param domain: The domain that was looked up
+        :param mail_servers: The list of mail servers found. Empty if the domain has none
+        :param ttl: The TTL of the answer. Ignored for empty answers
+        """
+        if not mail_servers:
+            ttl = self.negative_ttl
+        else:
+            ttl = min(max(ttl if ttl is not None else self.min_ttl, self.min_ttl), self.max_ttl)
+
+        entry = (self.clock() + ttl, list(mail_servers))
+        self._memory.put(domain, entry)
+        if self._disk:
+            self._write_disk_cache(domain, entry)
+        if self.store:
+            self.store.put_mx(domain, *entry)
+
+    def clear(self):
+        """
+        Forget every answer, including those persisted to disk
+        """
+        self._memory.clear()
+        if self._disk:
+            with self._disk_lock, self._disk:
+                self._disk.execute('DELETE FROM MXRecords')
+        if self.store:
+            self.store.clear_mx()
+
+    def info(self):
+        """
+        :return: A dict of ``hits``, ``misses``, ``size``, and ``maxsize``
+        """
+        info = self._memory.info()
+        info.update({'hits': self.hits, 'misses': self.misses})
+        return info
+
+    def _open_disk_cache(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # WAL lets sibling processes read while another writes
+        self._disk = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._disk_lock, self._disk:
+            self._disk.execute('PRAGMA journal_mode=WAL')
+            self._disk.execute(
+                'CREATE TABLE IF NOT EXISTS MXRecords ('
+                'Domain TEXT PRIMARY KEY, MailServers TEXT NOT NULL, Expires REAL NOT NULL)'
+            )
+
+    def _read_persisted(self, domain):
+        """
+        :return: The (expires, mail servers) entry for ``domain`` from disk or the store, or None
+        """
+        entry = self._read_disk_cache(domain) if self._disk else None
+        if entry is None and self.store:
+            entry = self.store.get_mx(domain)
+        return entry
+
+    def _read_disk_cache(self, domain):
+        with self._disk_lock:
+            row = self._disk.execute(
+                'SELECT Expires, MailServers FROM MXRecords WHERE Domain = ? AND Expires > ?',
+                (domain, self.clock())
+            ).fetchone()
+
+        if row is None:
+            return None
+        return row[0], row[1].split()
+
+    def _write_disk_cache(self, domain, entry):
+        expires, mail_servers = entry
+        with self._disk_lock, self._disk:
+            self._disk.execute(
+                'INSERT OR REPLACE INTO MXRecords (Domain, MailServers, Expires) VALUES (?, ?, ?)',
+                (domain, ' '.join(mail_servers), expires)
+            )
+
+
+class MXResolver(object):
+    """
+    Resolves the MX records of many domains concurrently.
+
+    Answers are cached in ``cache`` for as long as their TTLs allow.  Failed lookups aren't
+    cached.
+
+    Lookups run on a pool of ``concurrency`` threads.  Each query may take up to ``timeout``
+    seconds and is retried ``retries`` times, backing off exponentially, when the nameservers
+    time out or fail.  Domains that don't exist or have no MX records are not retried.
+
+    :param resolver: An object with a ``query(domain, rdtype)`` method like
+                     :class:`dns.resolver.Resolver`. Defaults to the system's resolver
+    :param concurrency: The maximum number of lookups in flight at once
+    :param timeout: Seconds to wait for each query
+    :param retries: The number of times to retry a failed query
+    :param retry_backoff: Seconds to wait before the first retry, doubled for each retry after
+    :param cache: The :class:`DNSCache` to cache answers in. Defaults to an in-memory cache
+    :param limits: A :class:`beacon.util.rate_limit.RateLimiterRegistry` pacing queries to the
+                   nameservers, as the ``dns`` destination. None for no limits.  Its circuit
+                   breakers aren't used: a lookup failing says more about the domain than about
+                   the nameservers, so a few broken domains mustn't stop every other lookup
+    """
+    # Errors that mean the domain definitely can't receive email
+    definitive_errors = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+    def __init__(self, resolver=None, concurrency=32, timeout=5.0, retries=2, retry_backoff=0.1,
+                 cache=None, limits=None):
+        self.cache = cache if cache else DNSCache()
+        self.limits = limits
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._resolver = resolver
+
+    @property
+    def resolver(self):
+        # Created on first use, reading resolv.conf isn't free
+        if self._resolver is None:
+            resolver = dns.resolver.Resolver()
+            resolver.timeout = self.timeout
+            resolver.lifetime = self.timeout
+            self._resolver = resolver
+        return self._resolver
+
+    def resolve(self, domain):
+        """
+        Look up the mail servers for ``domain``
+
+        :param domain: The domain to look up
+        :return: A list of mail server host names, most preferred first.  Empty list if the
+                 domain has no MX records.  None if the lookup failed after every retry.
+        """
+        mail_servers = self.cache.get(domain)
+        if mail_servers is None:
+            mail_servers = self._query(domain)
+        return mail_servers
+
+    def _query(self, domain):
+        backoff = self.retry_backoff
+        for attempt in range(self.retries + 1):
+            self._acquire()
+            try:
+                answer = self.resolver.query(domain, 'MX')
+            except self.definitive_errors:
+                self.cache.put(domain, [])
+                return []
+            except dns.exception.DNSException:
+                # Timeouts and failing nameservers may succeed on another try
+                if attempt < self.retries:
+                    time.sleep(backoff)
+                    backoff *= 2
+                continue
+
+            records = sorted(answer, key=lambda record: record.preference)
+            mail_servers = [record.exchange.to_text().rstrip('.') for record in records]
+            self.cache.put(domain, mail_servers, answer.rrset.ttl)
+            return mail_servers
+
+        return None
+
+    def _acquire(self):
+        limiter = self.limits.limiter('dns') if self.limits else None
+        if limiter:
+            limiter.acquire()
+
+    def resolve_many(self, domains):
+        """
+        Look up the mail servers for every domain in ``domains`` concurrently
+
+        :param domains: An iterable of domains
+        :return: A dict of domain to the result of :meth:`resolve`
+        """
+        mail_servers = {}
+        for domain in set(domains):
+            mail_servers[domain] = self.cache.get(domain)
+
+        # Only go to the network for the domains we don't have answers for
+        unknown_domains = [domain for domain, servers in mail_servers.items() if servers is None]
+        if unknown_domains:
+            workers = min(self.concurrency, len(unknown_domains))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                answers = executor.map(self._query, unknown_domains)
+                mail_servers.update(zip(unknown_domains, answers))
+
+        return mail_servers
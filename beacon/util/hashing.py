@@ -0,0 +1,165 @@
+"""
+Bulk hashing of candidate email addresses for services that look people up by email hash.
+"""
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from beacon.util.candidate_index import CandidateIndex
+
+
+def normalize_email(email_address):
+    """
+    :param email_address: An email address
+    :return: ``email_address`` the way services hash it, i.e. stripped and lowercased
+    """
+    return email_address.strip().lower()
+
+
+def md5_hexdigests(email_addresses):
+    """
+    :param email_addresses: A list of normalized email addresses
+    :return: A list of the MD5 hex hash of each address, in the same order
+    """
+    md5 = hashlib.md5
+    return [md5(address.encode('utf-8')).hexdigest() for address in email_addresses]
+
+
+class EmailHasher(object):
+    """
+    Hashes email addresses in bulk, ``chunk_size`` at a time, optionally across a pool of worker
+    processes.  Each distinct address is only hashed once per call.
+
+    Workers only pay off for hundreds of thousands of addresses on several cores, so batches
+    smaller than ``workers * chunk_size`` are always hashed in this process.
+
+    :param workers: The number of worker processes. None to hash in this process
+    :param chunk_size: The number of addresses sent to a worker at once
+    :param mp_context: The :mod:`multiprocessing` context workers are started with. Defaults to
+                       ``spawn``
+    """
+    def __init__(self, workers=None, chunk_size=20000, mp_context=None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.mp_context = mp_context if mp_context else multiprocessing.get_context('spawn')
+        self._pool = None
+
+    def hash_many(self, email_addresses):
+        """
+        :param email_addresses: An iterable of email addresses
+        :return: A dict of each normalized email address to its MD5 hex hash
+        """
+        distinct = list(set(normalize_email(address) for address in email_addresses))
+        return dict(zip(distinct, self._md5_hexdigests(distinct)))
+
+    def close(self):
+        """
+        Stop the worker processes, if any were started
+        """
+        pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True)
+
+    def _md5_hexdigests(self, email_addresses):
+        if not self.workers or len(email_addresses) < self.workers * self.chunk_size:
+            return md5_hexdigests(email_addresses)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=self.mp_context)
+        chunks = [
+            email_addresses[start:start + self.chunk_size]
+            for start in range(0, len(email_addresses), self.chunk_size)
+        ]
+        digests = []
+        for chunk_digests in self._pool.map(md5_hexdigests, chunks):
+            digests.extend(chunk_digests)
+        return digests
+
+
+
+
+class EmailHashIndex(object):
+    """
+    An index from the MD5 hash of candidate email addresses back to the candidates and the people
+    who generated them, so a whole batch's candidates are hashed once, and each distinct hash is
+    looked up once, however many people share it.
+
+    Candidates are normalized and deduplicated as they're added, with their owners kept in a
+    :class:`beacon.util.candidate_index.CandidateIndex`.  Hashing is deferred until
+    :meth:`hash_pending`, which hashes everything added since in one bulk pass.
+
+    :param hasher: The :class:`EmailHasher` candidates are hashed with
+    """
+    def __init__(self, hasher=None):
+        self.hasher = hasher if hasher else EmailHasher()
+        self._candidates = CandidateIndex()
+        self._pending = []
+        self._hashes = {}
+        self._md5s = {}
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, md5):
+        return md5 in self._hashes
+
+    def add(self, owner, scored_email_addresses):
+        """
+        Index candidate email addresses generated by ``owner``.  Each owner's candidates should
+        be added in one call.
+
+        :param owner: The integer id of whoever generated the candidates
+        :param scored_email_addresses: An iterable of (email address, likelihood) tuples, e.g.
+                                       from :meth:`EmailMiner.iter_scored_email_addresses`
+        :return: None
+        """
+        candidates = self._candidates
+        added = len(candidates)
+        candidates.add(owner, (
+            (normalize_email(address), likelihood)
+            for address, likelihood in scored_email_addresses
+        ))
+        self._pending.extend(candidates.candidates(added))
+
+    def hash_pending(self):
+        """
+        Hash every candidate added since the last call
+
+        :return: The number of candidates hashed
+        """
+        pending, self._pending = self._pending, []
+        hashes = self.hasher.hash_many(pending)
+        self._md5s.update(hashes)
+        self._hashes.update((md5, address) for address, md5 in hashes.items())
+        return len(hashes)
+
+    def md5(self, email_address):
+        """
+        :param email_address: A candidate email address that was added and hashed
+        :return: The MD5 hex hash of ``email_address``, or None
+        """
+        return self._md5s.get(normalize_email(email_address))
+
+    def email_address(self, md5):
+        """
+        :param md5: The MD5 hex hash of a candidate
+        :return: The normalized candidate email address with hash ``md5``, or None
+        """
+        return self._hashes.get(md5)
+
+    def owners(self, md5):
+        """
+        :param md5: The MD5 hex hash of a candidate
+        :return: An array of the ids of everyone who generated the candidate with hash ``md5``
+        """
+        return self._candidates.owners(self._hashes.get(md5))
+
+    def ranked(self):
+        """
+        Hash any pending candidates and rank every distinct hash
+
+        :return: A list of the MD5 hex hash of every candidate, most likely to anyone first
+        """
+        self.hash_pending()
+        return [self._md5s[address] for address in self._candidates.ranked()]
@@ -0,0 +1,38 @@
+"""
+HTTP sessions shared by the API clients.
+"""
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def pooled_session(connections):
+    """
+    :param connections: The most connections kept alive to each host
+    :return: A :class:`requests.Session` that keeps up to ``connections`` connections to each
+             host alive and reuses them between requests
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=connections)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def destination(url):
+    """
+    :param url: A URL calls are made to
+    :return: The :class:`beacon.util.rate_limit.RateLimiterRegistry` destination of ``url``'s
+             host, e.g. ``https:api.twitter.com``
+    """
+    parts = urlsplit(url)
+    return '{s}:{h}'.format(s=parts.scheme, h=parts.netloc)
+
+
+def is_failure(response):
+    """
+    :param response: A :class:`requests.Response`
+    :return: True if ``response`` suggests its host is down or throttling us
+    """
+    return response.status_code == 429 or response.status_code >= 500
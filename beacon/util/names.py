@@ -1,25 +1,203 @@
-from beacon.db import db_connect
-from beacon.db.models import Name
+import itertools
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+
+from sqlalchemy import select
+
+from beacon.db import db_connect, ensure_db, names_version
+from beacon.db.models import Name, realname_nickname_association_table
+from beacon.util.cache import LRUCache
+
+
+class NicknameCache(object):
+    """
+    A read-through cache of nicknames in front of the Names table.
+
+    By default the most recently used ``maxsize`` names are kept in an LRU cache.  Calling
+    :meth:`materialize` instead loads every name's nicknames into a frozen dict with a single
+    query, after which lookups never touch the database.  Either way the cache invalidates itself
+    whenever the contents of the Names tables change.
+
+    :param maxsize: The number of names to keep in the LRU cache. ``None`` for unbounded
+    """
+    def __init__(self, maxsize=1024):
+        self.materialized = False
+        self._lru = LRUCache(maxsize)
+        self._frozen = None
+        self._frozen_hits = 0
+        self._frozen_loads = 0
+        self._version = names_version()
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self):
+        return self._lru.hits + self._frozen_hits
+
+    @property
+    def misses(self):
+        return self._lru.misses + self._frozen_loads
+
+    def get(self, name):
+        """
+        Retrieve the nicknames for ``name``, querying the database only on a cache miss
+
+        :param name: The name that might have nicknames
+        :return: A tuple of nicknames, most likely first.  Empty tuple if nicknames were not
+                 found.
+        """
+        return tuple(nick_name for nick_name, likelihood in self.get_scored(name))
+
+    def get_scored(self, name):
+        """
+        Retrieve the nicknames for ``name`` along with how likely someone named ``name`` goes by
+        each, querying the database only on a cache miss
+
+        :param name: The name that might have nicknames
+        :return: A tuple of (nickname, likelihood) tuples, most likely first.  Empty tuple if
+                 nicknames were not found.
+        """
+        ensure_db()
+        if self._version != names_version():
+            self.invalidate()
+
+        if self.materialized:
+            frozen = self._frozen if self._frozen is not None else self._load_all()
+            with self._lock:
+                self._frozen_hits += 1
+            return frozen.get(name, ())
+
+        nick_names = self._lru.get(name)
+        if nick_names is None:
+            nick_names = _most_likely_first(_query_nicknames_for_name(name))
+            self._lru.put(name, nick_names)
+        return nick_names
+
+    def materialize(self):
+        """
+        Switch to a fully materialized cache of every name in the database
+        """
+        ensure_db()
+        self.materialized = True
+        self._lru.clear()
+        self._load_all()
+
+    def invalidate(self):
+        """
+        Forget everything cached.  Materialized caches are reloaded on the next lookup.
+        """
+        with self._lock:
+            self._version = names_version()
+            self._frozen = None
+        self._lru.clear()
+
+    def info(self):
+        """
+        :return: A dict of ``hits``, ``misses``, ``size``, ``maxsize``, and ``materialized``
+        """
+        info = self._lru.info()
+        info.update({
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._frozen) if self._frozen is not None else info['size'],
+            'materialized': self.materialized
+        })
+        return info
+
+    def _load_all(self):
+        nick_names = {}
+        for real_name, nick_name, likelihood in _query_all_nicknames():
+            nick_names.setdefault(real_name, []).append((nick_name, likelihood))
+
+        frozen = MappingProxyType(dict(
+            (real_name, _most_likely_first(nicks)) for real_name, nicks in nick_names.items()
+        ))
+        with self._lock:
+            self._frozen_loads += 1
+            self._frozen = frozen
+        return frozen
+
+
+# The cache used by retrieve_nicknames_for_name()
+nickname_cache = NicknameCache()
 
 
 def retrieve_nicknames_for_name(name):
     """
-    Retrieve nicknames for `name` from the database
+    Retrieve nicknames for `name`, from the database the first time `name` is seen and from
+    :data:`nickname_cache` afterwards
 
     :param name: The name that might have nicknames
     :return: A list of nicknames.  Empty list if nicknames were not found.
     """
+    return list(nickname_cache.get(name))
+
+
+def retrieve_scored_nicknames_for_name(name):
+    """
+    Retrieve nicknames for `name` along with the likelihood that someone named `name` goes by
+    each one, from :data:`nickname_cache`
+
+    :param name: The name that might have nicknames
+    :return: A list of (nickname, likelihood) tuples, most likely first.  Empty list if
+             nicknames were not found.
+    """
+    return list(nickname_cache.get_scored(name))
+
+
+def _most_likely_first(scored_nick_names):
+    return tuple(sorted(scored_nick_names, key=lambda scored: (-scored[1], scored[0])))
+
+
+def _nicknames_query(name=None):
+    """
+    Build a query for (real_name, nick_name, likelihood) rows, optionally only for ``name``
+    """
+    names = Name.__table__
+    association = realname_nickname_association_table
+    real_names, nick_names = names.alias(), names.alias()
+    query = select([real_names.c.RealName, nick_names.c.RealName, association.c.Likelihood])\
+        .select_from(
+            association
+            .join(real_names, association.c.RealNameID == real_names.c.ID)
+            .join(nick_names, association.c.NickNameID == nick_names.c.ID)
+        )
+
+    if name is not None:
+        query = query.where(real_names.c.RealName == name)
+    return query
+
+
+def _query_nicknames_for_name(name):
+    """
+    Retrieve nicknames for `name` from the database
+
+    :param name: The name that might have nicknames
+    :return: A list of (nickname, likelihood) tuples.  Empty list if nicknames were not found.
+    """
     nick_names = []
     with db_connect() as session:
-        # Look for the name in the database and append all nicknames to our nick_names list
-        db_name = session.query(Name).filter_by(real_name=name).first()
-        if db_name:
-            for nick in db_name.nick_names:
-                nick_names.append(nick.real_name)
+        for real_name, nick_name, likelihood in session.execute(_nicknames_query(name)):
+            nick_names.append((nick_name, likelihood))
 
     return nick_names
 
 
+def _query_all_nicknames():
+    """
+    Retrieve every (name, nickname, likelihood) from the database in one query
+
+    :return: A list of (real_name, nick_name, likelihood) tuples
+    """
+    rows = []
+    with db_connect() as session:
+        rows.extend(tuple(row) for row in session.execute(_nicknames_query()))
+
+    return rows
+
+
 def get_fml_name_variations(first_name, middle_name, last_name, include_initials=False):
     """
     Generate different variations of a full name containing the first, middle, and last name.
@@ -30,19 +208,7 @@ def get_fml_name_variations(first_name, middle_name, last_name, include_initials
     :param include_initials: Include variations with names abbreviated by their first letter
     :return: A list of (first_name, middle_name, last_name) tuples
     """
-    variations = [(first_name, middle_name, last_name)]
-    if include_initials:
-        variations.extend([
-            (first_name[0], middle_name, last_name),
-            (first_name, middle_name[0], last_name),
-            (first_name, middle_name, last_name[0]),
-            (first_name[0], middle_name[0], last_name),
-            (first_name[0], middle_name, last_name[0]),
-            (first_name, middle_name[0], last_name[0]),
-            (first_name[0], middle_name[0], last_name[0])
-        ])
-
-    return variations
+    return _name_variations((first_name, middle_name, last_name), include_initials)
 
 
 def get_fl_name_variations(first_name, last_name, include_initials=False):
@@ -54,13 +220,214 @@ def get_fl_name_variations(first_name, last_name, include_initials=False):
     :param include_initials: Include variations with names abbreviated by their first letter
     :return: A list of (first_name, last_name) tuples
     """
-    variations = [(first_name, last_name)]
-    if include_initials:
-        variations.extend([
-            (first_name[0], last_name), (first_name, last_name[0]), (first_name[0], last_name[0])
+    return _name_variations((first_name, last_name), include_initials)
+
+
+def _name_variations(name_parts, include_initials):
+    """
+    :param name_parts: A tuple of the parts of a name, in order
+    :param include_initials: Include variations with parts abbreviated by their first letter
+    :return: A list of tuples of ``name_parts``, abbreviated each way :func:`_abbreviations` lists
+    """
+    abbreviations = _abbreviations(len(name_parts)) if include_initials else ((),)
+    return [
+        tuple(part[0] if position in positions else part
+              for position, part in enumerate(name_parts))
+        for positions in abbreviations
+    ]
+
+
+@lru_cache(maxsize=None)
+def _abbreviations(count):
+    """
+    :param count: The number of parts in a name
+    :return: A tuple of every combination of the positions of the parts abbreviated to their
+             initial, fewest abbreviated first
+    """
+    return tuple(
+        positions
+        for abbreviated in range(count + 1)
+        for positions in itertools.combinations(range(count), abbreviated)
+    )
+
+
+# Username parts may be separated by any of these. '' To represent *no special character*
+USERNAME_SEPARATORS = ('.', '_', '')
+
+# The parts of a name username templates are built from
+_FIRST, _FIRST_INITIAL, _MIDDLE, _MIDDLE_INITIAL, _LAST, _LAST_INITIAL = range(6)
+_NAME_PARTS = (_FIRST, _MIDDLE, _LAST)
+
+_FL_ORDERS = ((_FIRST, _LAST), (_LAST, _FIRST))
+_FML_ORDERS = ((_FIRST, _MIDDLE, _LAST), (_LAST, _FIRST, _MIDDLE), (_MIDDLE, _LAST, _FIRST))
+
+
+@lru_cache(maxsize=None)
+def _username_templates(has_middle_name, single_letter_parts):
+    """
+    Precompute every combination of name order and abbreviation as a template of the name parts
+    its usernames are built from.  Parts index the tuple (first, first initial, middle, middle
+    initial, last, last initial), so a template is expanded by looking its parts up and joining
+    them with every combination of separators.
+
+    :param has_middle_name: Whether the middle name is used
+    :param single_letter_parts: Whether the first, middle, and last names are a single letter to
+                                begin with, in which case they count as initials even when used
+                                in full
+    :return: A tuple of (initials, three part templates, two part templates) tuples, fewest
+             initials first, where each template is a tuple of parts
+    """
+    orders = _FML_ORDERS + _FL_ORDERS if has_middle_name else _FL_ORDERS
+    single_letters = [part for part, single in zip(_NAME_PARTS, single_letter_parts) if single]
+    templates = {}
+    for order in orders:
+        # Every part may be used in full or abbreviated to its initial
+        for positions in _abbreviations(len(order)):
+            parts = tuple(
+                part + 1 if position in positions else part
+                for position, part in enumerate(order)
+            )
+            initials = len([
+                part for part in parts if part not in order or part in single_letters
+            ])
+            templates.setdefault(initials, ([], []))[len(parts) == 2].append(parts)
+
+    return tuple(
+        (initials, tuple(triples), tuple(pairs))
+        for initials, (triples, pairs) in sorted(templates.items())
+    )
+
+
+@lru_cache(maxsize=8192)
+def strip_accents(name):
+    """
+    Normalize characters in ``name`` to their decomposed equivalents without accents, e.g.
+    José > Jose.  Results are cached since the same names come up again and again.
+
+    :param name: A name
+    :return: The name without accents
+    """
+    return ''.join([
+        c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c)
+    ])
+
+
+def expand_username_templates(first_name, middle_name, last_name):
+    """
+    Generate usernames from a full name by concatenating the first and last name, and the
+    middle name if there is one, in every supported order with every combination of
+    abbreviations and separators.  Equivalent to joining every variation from
+    :func:`get_fml_name_variations` and :func:`get_fl_name_variations` with every combination of
+    :data:`USERNAME_SEPARATORS`, but in a single pass over precomputed templates.
+
+    For example, *James Herbert Bond* includes James.Bond, JHBond, Bond_James.H, and H.BondJ.
+
+    :param first_name: The first name
+    :param middle_name: The middle name, or None
+    :param last_name: The last name
+    :return: A tuple of (initials, usernames) tuples where ``initials`` is the number of
+             single letter parts in each of ``usernames``, fewest first.  Usernames may be
+             repeated.
+    """
+    middle_name = middle_name or ''
+    templates = _username_templates(
+        bool(middle_name), (len(first_name) == 1, len(middle_name) == 1, len(last_name) == 1)
+    )
+    values = (first_name, first_name[:1], middle_name, middle_name[:1], last_name, last_name[:1])
+    separators = USERNAME_SEPARATORS
+
+    expanded = []
+    for initials, triples, pairs in templates:
+        # The first two parts joined by each separator are shared by every second separator
+        usernames = [
+            joined + second + values[last]
+            for first, middle, last in triples
+            for separator in separators
+            for joined in (values[first] + separator + values[middle],)
+            for second in separators
+        ]
+        usernames.extend([
+            values[first] + separator + values[last]
+            for first, last in pairs
+            for separator in separators
         ])
+        expanded.append((initials, usernames))
+    return tuple(expanded)
+
+
+# Anything that isn't a letter or digit separates the tokens of a full name
+_FULL_NAME_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def normalize_full_name(name):
+    """
+    Normalize a full name into the key it's matched on: casefolded, without accents, and with
+    every run of punctuation and whitespace collapsed to a single space.  The order of the
+    tokens is kept, so *Bond, James* matches *bond  james* but not *James Bond*.
+
+    :param name: A full name, e.g. as returned by a service
+    :return: The normalized full name
+    """
+    return ' '.join(
+        token for token in _FULL_NAME_SEPARATORS.split(strip_accents(name).casefold()) if token
+    )
+
+
+def index_full_names(scored_full_names):
+    """
+    Key full names by their normalized form so they can be matched with a single lookup.
+
+    :param scored_full_names: A dict of full name to likelihood
+    :return: A dict of normalized full name to the highest likelihood of any full name with it
+    """
+    index = {}
+    for full_name, likelihood in scored_full_names.items():
+        key = normalize_full_name(full_name)
+        if likelihood > index.get(key, -1.0):
+            index[key] = likelihood
+    return index
+
+
+class FullNameIndex(object):
+    """
+    An inverted index from normalized full names to the people they might belong to, used to
+    match a name returned by a service against every person in a batch with a single lookup.
+    """
+    def __init__(self):
+        self._owners = {}
+
+    def __len__(self):
+        return len(self._owners)
 
-    return variations
+    def add(self, owner, scored_full_names):
+        """
+        Index the full names of ``owner``
 
+        :param owner: Whoever the full names belong to, e.g. a
+                      :class:`beacon.objects.person.Person`.  Must be hashable
+        :param scored_full_names: A dict of full name to likelihood, or normalized full name to
+                                  likelihood as returned by :func:`index_full_names`
+        :return: None
+        """
+        for key, likelihood in index_full_names(scored_full_names).items():
+            owners = self._owners.setdefault(key, {})
+            if likelihood > owners.get(owner, -1.0):
+                owners[owner] = likelihood
 
+    def match(self, name):
+        """
+        :param name: A full name, e.g. as returned by a service
+        :return: A list of (owner, likelihood) tuples for everyone ``name`` might belong to, most
+                 likely first
+        """
+        owners = self._owners.get(normalize_full_name(name))
+        if not owners:
+            return []
+        return sorted(owners.items(), key=lambda scored: -scored[1])
 
+    def match_many(self, names):
+        """
+        :param names: An iterable of full names
+        :return: A dict of each name to the list returned by :meth:`match`
+        """
+        return {name: self.match(name) for name in names}
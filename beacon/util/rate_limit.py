@@ -0,0 +1,381 @@
+"""
+Rate limiting and circuit breaking for outbound network calls.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+# Limits applied to every kind of destination unless a registry is given others, as
+# (calls per second, largest burst) tuples
+DEFAULT_LIMITS = {
+    'smtp': (20, 20),
+}
+
+# The states of a circuit breaker
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half open'
+
+
+class TokenBucket(object):
+    """
+    A thread-safe token bucket.  Tokens refill at ``rate`` per second up to ``capacity`` and
+    each call spends one or more tokens, waiting for them to refill if necessary.
+
+    :param rate: Tokens added per second
+    :param capacity: The most tokens the bucket holds, i.e. the largest burst. Defaults to
+                     ``rate``
+    :param clock: A monotonic clock returning seconds
+    :param sleep: A function that sleeps for a number of seconds
+    """
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        """
+        Spend ``tokens`` if they're available right now
+
+        :param tokens: The number of tokens to spend
+        :return: 0 if the tokens were spent, otherwise the seconds until they will be available
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Allow for floating point error so waiting the exact time returned always succeeds
+            if self._tokens + 1e-9 >= tokens:
+                self._tokens = max(self._tokens - tokens, 0.0)
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        Spend ``tokens``, waiting until they're available.  Requests for more tokens than the
+        bucket can hold are spent a bucketful at a time.
+
+        :param tokens: The number of tokens to spend
+        :return: The number of seconds spent waiting
+        """
+        waited = 0.0
+        while tokens > 0:
+            spend = min(tokens, self.capacity)
+            wait = self.try_acquire(spend)
+            if wait:
+                self.sleep(wait)
+                waited += wait
+            else:
+                tokens -= spend
+
+        return waited
+
+    async def acquire_async(self, tokens=1):
+        """
+        Like :meth:`acquire`, but waits without blocking the event loop, so other tasks keep
+        running
+
+        :param tokens: The number of tokens to spend
+        :return: The number of seconds spent waiting
+        """
+        waited = 0.0
+        while tokens > 0:
+            spend = min(tokens, self.capacity)
+            wait = self.try_acquire(spend)
+            if wait:
+                await asyncio.sleep(wait)
+                waited += wait
+            else:
+                tokens -= spend
+
+        return waited
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    A token bucket kept in a SQLite file, so every process using the same ``path`` and ``key``
+    draws from the same tokens.  Each spend is a short ``BEGIN IMMEDIATE`` transaction.
+
+    :param path: The SQLite file buckets are kept in
+    :param key: Which bucket in the file this is, e.g. a destination
+    :param rate: Tokens added per second
+    :param capacity: The most tokens the bucket holds. Defaults to ``rate``
+    :param clock: A clock returning seconds that every process shares, i.e. wall clock time
+    :param sleep: A function that sleeps for a number of seconds
+    """
+    def __init__(self, path, key, rate, capacity=None, clock=time.time, sleep=time.sleep):
+        TokenBucket.__init__(self, rate, capacity, clock, sleep)
+        self.path = path
+        self.key = key
+        self._db = _connect_shared_store(path)
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._db.execute('SELECT Tokens, Updated FROM Buckets WHERE Key = ?',
+                                       (self.key,)).fetchone()
+                now = self.clock()
+                available, updated = row if row else (self.capacity, now)
+                # Clocks of different processes can disagree slightly, never refill backwards
+                available = min(self.capacity,
+                                available + max(now - updated, 0.0) * self.rate)
+
+                wait = 0
+                if available + 1e-9 >= tokens:
+                    available = max(available - tokens, 0.0)
+                else:
+                    wait = (tokens - available) / self.rate
+                self._db.execute(
+                    'INSERT OR REPLACE INTO Buckets (Key, Tokens, Updated) VALUES (?, ?, ?)',
+                    (self.key, available, max(now, updated))
+                )
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+            return wait
+
+
+class CircuitBreaker(object):
+    """
+    Stops calls to a destination that keeps failing, so we back off rather than get throttled
+    or blocklisted.
+
+    The circuit opens after ``failure_threshold`` failures in a row, refusing calls for
+    ``reset_timeout`` seconds.  Then a single trial call is allowed: if it succeeds the circuit
+    closes, otherwise it opens for another ``reset_timeout`` seconds.
+
+    :param failure_threshold: Failures in a row that open the circuit
+    :param reset_timeout: Seconds the circuit stays open before a trial call
+    :param clock: A monotonic clock returning seconds
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """
+        :return: :data:`CLOSED`, :data:`OPEN`, or :data:`HALF_OPEN` once a trial call is due
+        """
+        with self._lock:
+            return self._state()
+
+    def allow(self):
+        """
+        :return: True if a call may be made now.  When the circuit is half open only the first
+                 caller is allowed, to make the trial call
+        """
+        with self._lock:
+            state = self._state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        """
+        Close the circuit after a call succeeded
+        """
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        """
+        Count a failed call, opening the circuit if it was a trial call or one failure too many
+        """
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial_running = False
+
+    def _state(self):
+        if self._opened_at is None:
+            return CLOSED
+        if self.clock() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+
+class RateLimiterRegistry(object):
+    """
+    A token bucket and circuit breaker for every destination calls are made to, e.g. a mail
+    server or an API host, created when the destination is first seen.  Everyone given the same
+    registry shares its limits, across threads and async tasks, and with a ``shared_path``,
+    every process using that file shares the token buckets too.
+
+    Destinations are strings of a kind and a host, e.g. ``smtp:mx.example.com`` or
+    ``https:api.twitter.com``.  Each gets the ``limits`` given for its full name, otherwise for
+    its kind, otherwise the default ``rate`` and ``capacity``.  :data:`DEFAULT_LIMITS` applies
+    unless ``limits`` overrides it, and API clients set the documented limits of their own
+    hosts with :meth:`set_default`.
+
+    :param rate: The default calls per second to each destination. None for no limit
+    :param capacity: The default largest burst of calls. Defaults to ``rate``
+    :param limits: A dict of destination or kind to a (rate, capacity) tuple, or None for no
+                   limit
+    :param failure_threshold: Failures in a row that open a destination's circuit. None to never
+                              open circuits
+    :param reset_timeout: Seconds a circuit stays open before a trial call
+    :param shared_path: A SQLite file to keep token buckets in, shared between processes. None
+                        to keep them in memory
+    :param clock: A clock returning seconds. Defaults to a monotonic clock, or the wall clock
+                  when buckets are shared
+    :param sleep: A function that sleeps for a number of seconds
+    """
+    def __init__(self, rate=None, capacity=None, limits=None, failure_threshold=5,
+                 reset_timeout=30.0, shared_path=None, clock=None, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.limits = dict(DEFAULT_LIMITS, **limits) if limits else dict(DEFAULT_LIMITS)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.shared_path = shared_path
+        self.clock = clock if clock else time.time if shared_path else time.monotonic
+        self.sleep = sleep
+        self._limiters = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, destination):
+        """
+        :param destination: Where calls are made to, e.g. ``smtp:mx.example.com``
+        :return: The :class:`TokenBucket` for ``destination``, or None if it isn't limited
+        """
+        with self._lock:
+            if destination not in self._limiters:
+                self._limiters[destination] = self._new_limiter(destination)
+            return self._limiters[destination]
+
+    def set_default(self, destination, rate, capacity=None):
+        """
+        Limit calls to ``destination`` unless it was given limits of its own
+
+        :param destination: Where calls are made to, e.g. ``https:api.twitter.com``
+        :param rate: Calls per second
+        :param capacity: The largest burst of calls. Defaults to ``rate``
+        :return: None
+        """
+        with self._lock:
+            self.limits.setdefault(destination, (rate, capacity))
+
+    def breaker(self, destination):
+        """
+        :param destination: Where calls are made to, e.g. ``smtp:mx.example.com``
+        :return: The :class:`CircuitBreaker` for ``destination``, or None if circuits never open
+        """
+        if self.failure_threshold is None:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(destination)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout,
+                                         self.clock)
+                self._breakers[destination] = breaker
+            return breaker
+
+    def acquire(self, destination, tokens=1):
+        """
+        Wait until ``tokens`` calls may be made to ``destination``, unless its circuit is open
+
+        :param destination: Where calls are made to, e.g. ``smtp:mx.example.com``
+        :param tokens: The number of calls about to be made
+        :return: True if the calls may be made, False if the circuit is open and they mustn't be
+        """
+        breaker = self.breaker(destination)
+        if breaker and not breaker.allow():
+            return False
+        limiter = self.limiter(destination)
+        if limiter:
+            limiter.acquire(tokens)
+        return True
+
+    async def acquire_async(self, destination, tokens=1):
+        """
+        Like :meth:`acquire`, but waits without blocking the event loop
+        """
+        breaker = self.breaker(destination)
+        if breaker and not breaker.allow():
+            return False
+        limiter = self.limiter(destination)
+        if limiter:
+            await limiter.acquire_async(tokens)
+        return True
+
+    def record(self, destination, succeeded):
+        """
+        Tell ``destination``'s circuit breaker how a call went
+
+        :param destination: Where the call was made to
+        :param succeeded: False if the call failed in a way that suggests the destination is
+                          down or refusing us, e.g. a timeout or being throttled
+        :return: None
+        """
+        breaker = self.breaker(destination)
+        if breaker is None:
+            return
+        if succeeded:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+    def info(self):
+        """
+        :return: A dict of each destination seen to the state of its circuit
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {destination: breaker.state for destination, breaker in breakers.items()}
+
+    def _new_limiter(self, destination):
+        kind = destination.split(':', 1)[0]
+        if destination in self.limits:
+            limit = self.limits[destination]
+        elif kind in self.limits:
+            limit = self.limits[kind]
+        else:
+            limit = (self.rate, self.capacity) if self.rate is not None else None
+        if limit is None:
+            return None
+
+        rate, capacity = limit
+        if self.shared_path:
+            return SharedTokenBucket(self.shared_path, destination, rate, capacity,
+                                     clock=self.clock, sleep=self.sleep)
+        return TokenBucket(rate, capacity, clock=self.clock, sleep=self.sleep)
+
+
+def _connect_shared_store(path):
+    """
+    :return: A connection to the SQLite file of shared token buckets at ``path``, created if
+             needed
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    # Transactions are managed explicitly so a bucket is read and written atomically
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                 check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('CREATE TABLE IF NOT EXISTS Buckets ('
+                       'Key TEXT PRIMARY KEY, Tokens REAL NOT NULL, Updated REAL NOT NULL)')
+    return connection
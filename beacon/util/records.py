@@ -0,0 +1,103 @@
+"""
+Read person records from JSONL and CSV streams.
+"""
+import csv
+import json
+
+
+# The fields a person record may contain.  Matches find_online_presence()'s parameters.
+PERSON_FIELDS = (
+    'first_name', 'last_name', 'middle_name', 'domains', 'linkedin_url', 'angellist_url',
+    'twitter_url'
+)
+RECORD_FORMATS = ('jsonl', 'csv')
+# The fields every person record must have
+REQUIRED_FIELDS = ('first_name', 'last_name')
+
+
+class InvalidRecord(ValueError):
+    """
+    A person record that can't be located, e.g. because it's missing a name
+    """
+
+
+def guess_record_format(filename):
+    """
+    Guess the record format of a file from its extension
+
+    :param filename: The file's name
+    :return: ``'csv'`` for .csv files, otherwise ``'jsonl'``
+    """
+    return 'csv' if filename.lower().endswith('.csv') else 'jsonl'
+
+
+def read_person_records(stream, record_format='jsonl', on_invalid=None):
+    """
+    Lazily read person records from ``stream``, one line or row at a time.
+
+    JSONL records are objects keyed by :data:`PERSON_FIELDS`, where ``domains`` is a list.  CSV
+    records have a header row naming the fields, where ``domains`` is separated by spaces or
+    semicolons.  Unknown fields and empty values are dropped.  Records that can't be read or are
+    missing any :data:`REQUIRED_FIELDS` are skipped, so one bad record doesn't stop the rest.
+
+    :param stream: A text stream of records
+    :param record_format: One of :data:`RECORD_FORMATS`
+    :param on_invalid: A function called with the number of each record skipped, counting from
+                       1, and the :class:`InvalidRecord` saying why
+    :return: A generator of dicts suitable for ``find_online_presence(**record)``
+    """
+    if record_format == 'csv':
+        records = csv.DictReader(stream)
+    elif record_format == 'jsonl':
+        records = (line for line in stream if line.strip())
+    else:
+        raise ValueError('Unknown record format: {f}'.format(f=record_format))
+
+    for number, record in enumerate(records, 1):
+        try:
+            if record_format == 'jsonl':
+                record = _parse_json_record(record)
+            person = _clean_person_record(record)
+        except InvalidRecord as error:
+            if on_invalid:
+                on_invalid(number, error)
+            continue
+        yield person
+
+
+def _parse_json_record(line):
+    try:
+        record = json.loads(line)
+    except ValueError as error:
+        raise InvalidRecord('Not JSON: {e}'.format(e=error))
+    if not isinstance(record, dict):
+        raise InvalidRecord('Not a JSON object')
+    return record
+
+
+def _clean_person_record(record):
+    """
+    :return: ``record`` with only the :data:`PERSON_FIELDS` that have values
+    :raises InvalidRecord: If ``record`` is missing a required field or has a field of the
+                           wrong type
+    """
+    person = {}
+    for field in PERSON_FIELDS:
+        value = record.get(field)
+        if field == 'domains' and isinstance(value, str):
+            value = value.replace(';', ' ').split()
+        if not value:
+            continue
+
+        if field == 'domains':
+            valid = isinstance(value, list) and all(isinstance(domain, str) for domain in value)
+        else:
+            valid = isinstance(value, str)
+        if not valid:
+            raise InvalidRecord('Invalid {f}: {v!r}'.format(f=field, v=value))
+        person[field] = value
+
+    missing = [field for field in REQUIRED_FIELDS if field not in person]
+    if missing:
+        raise InvalidRecord('Missing {f}'.format(f=', '.join(missing)))
+    return person
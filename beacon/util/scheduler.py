@@ -0,0 +1,123 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Why a scheduler stopped running tasks
+FINISHED = 'finished'
+DEADLINE_EXCEEDED = 'deadline exceeded'
+
+
+class TaskScheduler(object):
+    """
+    Runs tasks from a priority queue on a pool of threads, most important first.
+
+    Tasks may schedule more tasks as they discover new information, and independent tasks run
+    concurrently, so the time taken is bounded by the slowest chain of tasks rather than the sum
+    of them all.  :meth:`run` returns once the queue is empty and nothing is running, the
+    deadline has passed, or a stop condition is met.  Tasks that were never started are kept in
+    ``skipped``.
+
+    :param concurrency: The most tasks run at once
+    :param deadline: Seconds from now after which no more tasks are started and running tasks
+                     are no longer waited for. None for no deadline
+    :param clock: A function returning the current time in seconds
+    """
+    def __init__(self, concurrency=8, deadline=None, clock=time.monotonic):
+        self.concurrency = concurrency
+        self.clock = clock
+        self.deadline_at = clock() + deadline if deadline is not None else None
+        self.stop_reason = None
+        self.skipped = []
+        self._queue = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def stopped(self):
+        """
+        :return: True once the scheduler has stopped early, after which no more tasks are run
+        """
+        return self.stop_reason is not None
+
+    def schedule(self, priority, task, *args):
+        """
+        Queue ``task(*args)`` to run.  Tasks with a higher ``priority`` run first, and tasks with
+        the same priority run in the order they were scheduled.
+
+        :param priority: How important the task is, e.g. the likelihood it finds something
+        :param task: The function to run
+        :param args: Arguments for ``task``
+        :return: None
+        """
+        with self._lock:
+            if self.stopped:
+                self.skipped.append((task, args))
+            else:
+                heapq.heappush(self._queue, (-priority, next(self._counter), task, args))
+
+    def stop(self, reason):
+        """
+        Stop running tasks, skipping any that haven't started
+
+        :param reason: Why the scheduler stopped
+        :return: None
+        """
+        with self._lock:
+            if self.stop_reason is None:
+                self.stop_reason = reason
+            while self._queue:
+                _, _, task, args = heapq.heappop(self._queue)
+                self.skipped.append((task, args))
+
+    def remaining(self):
+        """
+        :return: Seconds until the deadline, or None if there isn't one
+        """
+        if self.deadline_at is None:
+            return None
+        return max(self.deadline_at - self.clock(), 0.0)
+
+    def run(self, stop_when=None):
+        """
+        Run tasks until there are none left or the scheduler stops early.  Exceptions raised by
+        tasks are re-raised.
+
+        :param stop_when: A function returning a reason to stop early, or None to keep going.
+                          Checked whenever a task finishes
+        :return: Why the scheduler stopped: :data:`FINISHED`, :data:`DEADLINE_EXCEEDED`, or the
+                 reason returned by ``stop_when``
+        """
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        running = set()
+        try:
+            while not self.stopped:
+                reason = self._stop_condition(stop_when)
+                if reason:
+                    self.stop(reason)
+                    break
+
+                with self._lock:
+                    while self._queue and len(running) < self.concurrency:
+                        _, _, task, args = heapq.heappop(self._queue)
+                        running.add(executor.submit(task, *args))
+                if not running:
+                    return FINISHED
+
+                done, running = wait(running, self.remaining(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+
+            # Let running tasks finish unless we're out of time
+            if self.stop_reason != DEADLINE_EXCEEDED:
+                for future in running:
+                    future.result()
+            return self.stop_reason
+        finally:
+            executor.shutdown(wait=False)
+
+    def _stop_condition(self, stop_when):
+        if self.deadline_at is not None and self.clock() >= self.deadline_at:
+            return DEADLINE_EXCEEDED
+        return stop_when() if stop_when else None
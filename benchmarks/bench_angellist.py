@@ -0,0 +1,65 @@
+"""
+Measure how many AngelList email lookups per second the miner gets through against a local fake
+AngelList API, with a new connection per request, a pooled session, concurrent requests, and a
+warm cache.
+
+Usage: ``python benchmarks/bench_angellist.py [addresses]``
+"""
+import os
+import sys
+import timeit
+
+import requests
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from beacon.objects.angellist_miner import AngelListMiner
+from beacon.tests.fakes import FakeAngelListServer
+
+
+class UnpooledSession(requests.Session):
+    """
+    Opens a new connection for every request
+    """
+    def request(self, *args, **kwargs):
+        with requests.Session() as session:
+            return session.request(*args, **kwargs)
+
+
+def run(server, addresses, concurrency, pooled, warm):
+    miner = AngelListMiner(api_url=server.url, requests_per_hour=10 ** 9,
+                           concurrency=concurrency,
+                           session=None if pooled else UnpooledSession())
+    try:
+        if warm:
+            miner.users_by_emails(addresses)
+        connections = server.connections
+        seconds = timeit.timeit(lambda: miner.users_by_emails(addresses), number=1)
+    finally:
+        miner.close()
+    return seconds, server.connections - connections
+
+
+def main(count):
+    addresses = ['user{n}@domain{d}.com'.format(n=n, d=n % 10) for n in range(count)]
+    server = FakeAngelListServer([
+        (address, {'id': n, 'name': address}) for n, address in enumerate(addresses[::10])
+    ]).start()
+    scenarios = [
+        ('new connection per request', 1, False, False),
+        ('pooled session', 1, True, False),
+        ('pooled session, 8 threads', 8, True, False),
+        ('warm cache', 8, True, True),
+    ]
+    try:
+        for label, concurrency, pooled, warm in scenarios:
+            seconds, connections = run(server, addresses, concurrency, pooled, warm)
+            print('{label:<30} {rate:>9.0f} lookups/s  {connections:>4} connections'.format(
+                label=label, rate=count / seconds, connections=connections
+            ))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
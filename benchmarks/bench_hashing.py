@@ -0,0 +1,74 @@
+"""
+Measure how fast a batch of people's candidate email addresses are hashed and indexed back to
+their owners for lookups by email hash: hashing every candidate of every person one at a time
+versus deduplicating them into an :class:`beacon.util.hashing.EmailHashIndex` and hashing the
+distinct candidates in bulk, in this process and across worker processes.
+
+People are drawn from a small pool of names, so many share candidates, as in real batches.
+
+Usage: ``python benchmarks/bench_hashing.py [people]``
+"""
+import hashlib
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from beacon.util.hashing import EmailHasher, EmailHashIndex
+
+FIRST_NAMES = ['james', 'john', 'jane', 'william', 'mary', 'robert', 'linda', 'david']
+LAST_NAMES = ['bond', 'smith', 'jones', 'turner', 'brown', 'moore', 'clark', 'lewis', 'hall']
+DOMAINS = ['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'aol.com', 'icloud.com']
+
+
+def candidates_for(n):
+    first = FIRST_NAMES[n % len(FIRST_NAMES)]
+    last = LAST_NAMES[n // len(FIRST_NAMES) % len(LAST_NAMES)]
+    usernames = [
+        '{f}{s}{l}{suffix}'.format(f=f, s=s, l=l, suffix=suffix)
+        for f, l in ((first, last), (last, first), (first[0], last), (first, last[0]))
+        for s in ('', '.', '_')
+        for suffix in ('', '1', '01', '123', '2015')
+    ]
+    return [
+        (username + '@' + domain, 1.0 / (rank + 1))
+        for rank, username in enumerate(usernames) for domain in DOMAINS + ['corp{n}.com'.format(
+            n=n % 50)]
+    ]
+
+
+def one_at_a_time(people):
+    owners = {}
+    for owner, candidates in enumerate(people):
+        for address, _ in candidates:
+            md5 = hashlib.md5(address.strip().lower().encode('utf-8')).hexdigest()
+            owners.setdefault(md5, []).append(owner)
+    return len(owners)
+
+
+def indexed(people, hasher):
+    index = EmailHashIndex(hasher)
+    for owner, candidates in enumerate(people):
+        index.add(owner, candidates)
+    return len(index.ranked())
+
+
+def main(count):
+    people = [candidates_for(n) for n in range(count)]
+    total = sum(len(candidates) for candidates in people)
+    workers = os.cpu_count() or 1
+    scenarios = [
+        ('one at a time', lambda: one_at_a_time(people)),
+        ('indexed', lambda: indexed(people, EmailHasher())),
+        ('indexed, {w} workers'.format(w=workers),
+         lambda: indexed(people, EmailHasher(workers=workers, chunk_size=5000))),
+    ]
+    print('{c} candidates, {d} distinct'.format(c=total, d=indexed(people, EmailHasher())))
+    for label, run in scenarios:
+        seconds = timeit.timeit(run, number=1)
+        print('{label:<24} {rate:>12.0f} candidates/s'.format(label=label, rate=total / seconds))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
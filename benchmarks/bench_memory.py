@@ -0,0 +1,133 @@
+"""
+Measure how many bytes each person and their locator take while a batch is held in memory.
+
+Compares slotted people with interned names and domains to the previous ``__dict__`` people, and
+locators sharing cached candidates to the previous ones that kept private copies of them.  Names
+are rebuilt for every record the way a CSV reader produces them, so equal names start out as
+distinct strings.  Candidates for every distinct name are generated before measuring, as they
+would be early on in a large batch.
+
+Usage: ``python benchmarks/bench_memory.py [people]``
+"""
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from beacon.objects.email_miner import EmailMiner
+from beacon.objects.person import Person
+from beacon.objects.person_locator import PersonLocator
+from beacon.util.cache import LRUCache
+from beacon.util.names import nickname_cache
+
+FIRST_NAMES = ['James', 'William', 'Robert', 'Mary', 'Patricia', 'Jennifer', 'Michael', 'Linda',
+               'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Margaret']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Taylor']
+MIDDLE_NAMES = ['', 'A', 'Lee', 'Marie', 'J']
+DOMAINS = ['example.com', 'example.org', 'mi6.gov.uk', 'acme.test']
+
+
+class LegacyPerson(object):
+    """
+    Person as it was before: every attribute in ``__dict__`` and no interning
+    """
+    def __init__(self, first_name, last_name, middle_name=None, domains=None):
+        self.first_name = first_name.capitalize()
+        self.last_name = last_name.capitalize()
+        self.middle_name = middle_name.capitalize() if middle_name else ""
+        self.domains = domains if domains else []
+        self.linkedin_url = ""
+        self.angellist_url = ""
+        self.usernames = {}
+        self.email_addresses = []
+        self.twitter_url = ""
+
+    def has_middle_name(self):
+        return len(self.middle_name) > 0
+
+
+class LegacyPersonLocator(PersonLocator):
+    """
+    PersonLocator as it was before: private copies of the candidates shared between people
+    """
+    def _enumerate_full_name_representations(self):
+        PersonLocator._enumerate_full_name_representations(self)
+        self.scored_full_names = dict(self.scored_full_names)
+        self.full_name_representations = set(self.scored_full_names)
+
+    def _enumerate_probable_usernames(self):
+        PersonLocator._enumerate_probable_usernames(self)
+        self.scored_usernames = dict(self.scored_usernames)
+        self.probable_usernames = set(self.scored_usernames)
+
+
+def read_records(count):
+    """
+    :return: A list of (first, middle, last, domain) records as freshly parsed strings
+    """
+    random.seed(0)
+    lines = [','.join([
+        random.choice(FIRST_NAMES), random.choice(MIDDLE_NAMES), random.choice(LAST_NAMES),
+        random.choice(DOMAINS)
+    ]).lower() for _ in range(count)]
+    return [tuple(line.split(',')) for line in lines]
+
+
+def bytes_per_item(build, count):
+    """
+    :return: The bytes allocated per item by ``build``, which returns a list of ``count`` items
+    """
+    gc.collect()
+    tracemalloc.start()
+    items = build()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return allocated / count
+
+
+def main(count):
+    records = read_records(count)
+    email_miner = EmailMiner()
+    nickname_cache.materialize()
+
+    def people(person_class):
+        return [
+            person_class(first, last, middle_name=middle, domains=[domain])
+            for first, middle, last, domain in records
+        ]
+
+    candidate_cache = LRUCache(3 * len(records))
+    for first, middle, last, domain in set(records):
+        PersonLocator(Person(first, last, middle), email_miner,
+                      candidate_cache)._enumerate_probable_usernames()
+
+    def located(person_class, locator_class):
+        locators = []
+        for person in people(person_class):
+            locator = locator_class(person, email_miner, candidate_cache)
+            locator._enumerate_probable_usernames()
+            locators.append(locator)
+        return locators
+
+    print('{what:<28} {before:>12} {after:>12} {saved:>8}'.format(
+        what='{n} people'.format(n=count), before='before', after='after', saved='saved'
+    ))
+    for what, before, after in [
+        ('bytes per person', lambda: people(LegacyPerson), lambda: people(Person)),
+        ('bytes per located person', lambda: located(LegacyPerson, LegacyPersonLocator),
+         lambda: located(Person, PersonLocator)),
+    ]:
+        before = bytes_per_item(before, count)
+        after = bytes_per_item(after, count)
+        print('{what:<28} {before:>12.0f} {after:>12.0f} {saved:>7.0%}'.format(
+            what=what, before=before, after=after, saved=1 - after / before
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
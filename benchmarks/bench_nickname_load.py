@@ -0,0 +1,45 @@
+"""
+Measure how long the Names table takes to build from nickname datasets of increasing size.
+
+Usage: ``python benchmarks/bench_nickname_load.py [rows ...]``
+"""
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from beacon.db import create_db, destroy_db
+
+
+def write_dataset(path, rows):
+    """
+    Write ``rows`` random ``nickname,real_name,likelihood`` rows with plenty of shared names
+    """
+    real_names = max(rows // 5, 1)
+    with open(path, 'w') as nicknames_csv:
+        for i in range(rows):
+            nicknames_csv.write('NICK{n},NAME{r},{p:.2f}\n'.format(
+                n=random.randrange(rows), r=random.randrange(real_names), p=random.random()
+            ))
+
+
+def main(sizes):
+    directory = tempfile.mkdtemp()
+    for rows in sizes:
+        path = os.path.join(directory, 'nicknames_{r}.csv'.format(r=rows))
+        write_dataset(path, rows)
+
+        destroy_db()
+        seconds = timeit.timeit(lambda: create_db(path), number=1)
+        print('{rows:>9} rows  {seconds:8.3f} s  {rate:>10.0f} rows/s'.format(
+            rows=rows, seconds=seconds, rate=rows / seconds
+        ))
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000, 500000])
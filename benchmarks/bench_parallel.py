@@ -0,0 +1,66 @@
+"""
+Measure how locating a batch of people scales with the number of worker processes.
+
+Every request is budgeted away so only candidate generation, which is CPU bound, is measured,
+and each worker's candidate cache holds a single name so every person's candidates are
+generated as they would be for a batch of mostly distinct names.  Worker start up, including
+opening the nickname snapshot, is included in each time.
+
+Usage: ``python benchmarks/bench_parallel.py [people] [max workers]``
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from beacon.objects.batch_locator import BatchLocator
+from beacon.objects.parallel_batch_locator import ParallelBatchLocator
+from beacon.objects.person import Person
+from beacon.util.budget import LocateBudget
+
+FIRST_NAMES = ['James', 'William', 'Robert', 'Mary', 'Patricia', 'Jennifer', 'Michael', 'Linda',
+               'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Margaret']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis']
+MIDDLE_NAMES = ['', 'Lee', 'Marie', 'Alexander']
+BUDGET = LocateBudget(max_dns_queries=0, max_smtp_probes=0, max_social_calls=0)
+
+
+def people(count):
+    random.seed(0)
+    return [
+        Person(random.choice(FIRST_NAMES), random.choice(LAST_NAMES), random.choice(MIDDLE_NAMES),
+               domains=['example.com'])
+        for _ in range(count)
+    ]
+
+
+def seconds(locator, count):
+    started = time.perf_counter()
+    for _ in locator.locate_all(people(count)):
+        pass
+    return time.perf_counter() - started
+
+
+def main(count, max_workers):
+    print('{workers:<12} {seconds:>10} {rate:>14} {speedup:>8}'.format(
+        workers='workers', seconds='seconds', rate='people/second', speedup='speedup'
+    ))
+
+    baseline = seconds(BatchLocator(candidate_cache_size=1, budget=BUDGET,
+                                    materialize_nicknames=True), count)
+    print('{workers:<12} {seconds:>10.2f} {rate:>14.0f} {speedup:>7.2f}x'.format(
+        workers='in process', seconds=baseline, rate=count / baseline, speedup=1.0
+    ))
+    for workers in range(1, max_workers + 1):
+        elapsed = seconds(ParallelBatchLocator(workers=workers, candidate_cache_size=1,
+                                               budget=BUDGET), count)
+        print('{workers:<12} {seconds:>10.2f} {rate:>14.0f} {speedup:>7.2f}x'.format(
+            workers=workers, seconds=elapsed, rate=count / elapsed, speedup=baseline / elapsed
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+         int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1)
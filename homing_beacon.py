@@ -1,12 +1,57 @@
+import sys
+
 import beacon
+from beacon.db import configure
+from beacon.db.lookups import LookupStore
+from beacon.objects.result_cache import ResultCache
+from beacon.util.records import guess_record_format
+
+
+def report_invalid(number, error):
+    sys.stderr.write('Skipped record {n}: {e}\n'.format(n=number, e=error))
+
+
+def stream(args, store, limits):
+    input_stream = sys.stdin if args.input == '-' else open(args.input, 'r', newline='')
+    output_stream = open(args.output, 'w') if args.output else sys.stdout
+    record_format = args.format or guess_record_format(args.input)
+
+    try:
+        beacon.stream_online_presence(input_stream, output_stream, record_format,
+                                      budget=beacon.budget_from_arguments(args),
+                                      workers=args.workers, store=store,
+                                      max_age=args.max_age, incremental=args.incremental,
+                                      limits=limits,
+                                      budget_report=args.budget_report,
+                                      on_invalid=report_invalid,
+                                      social_backends=beacon.social_backends_from_arguments(args))
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
 
 
 if __name__ == '__main__':
     args = beacon.parse_arguments()
 
-    located_person = beacon.find_online_presence(
-        args.first_name, args.last_name, args.middle_name, args.domains,
-        args.linkedin_url, args.angellist_url, args.twitter_url
-    )
+    store = None
+    if args.database:
+        configure(args.database)
+        store = LookupStore()
+
+    limits = beacon.limits_from_arguments(args)
+    if args.input:
+        stream(args, store, limits)
+    else:
+        social_miner = beacon.social_miner_from_arguments(args, limits)
+        located_person = beacon.find_online_presence(
+            args.first_name, args.last_name, args.middle_name, args.domains,
+            args.linkedin_url, args.angellist_url, args.twitter_url,
+            budget=beacon.budget_from_arguments(args), store=store,
+            result_cache=ResultCache(store, args.max_age) if store else None,
+            incremental=args.incremental, social_miner=social_miner, limits=limits,
+            budget_report=args.budget_report
+        )
 
-    print(located_person)
+        print(located_person)